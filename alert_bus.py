@@ -0,0 +1,310 @@
+# alert_bus.py
+# 프로세스 안 알림 버스: 신호 평가와 알림 전달을 분리
+# - 평가 쪽은 emit(Signal) 만 호출 → 크기가 정해진 큐에 넣고 바로 반환 (가득 차면 가장 오래된 것을 버림)
+# - 디스패처 스레드가 큐에서 꺼내 BATCH_SEC 동안 모은 뒤 (티커, 룰) 별로
+#     중복 제거 : 직전 신호와 같은 kind 면 버림 (상태가 바뀔 때만 전달)
+#     쿨다운   : 같은 (티커, 룰, kind) 를 COOLDOWN_SEC 안에 다시 전달하지 않음 (신호가 깜빡일 때)
+#              (쿨다운으로 막힌 kind 는 상태로 기록하지 않음 → 끝난 뒤 다시 오면 전달)
+#   통과한 신호를 묶음으로 싱크마다 전달
+# - 싱크(콘솔/파일/웹훅)는 각자 스레드 + 큐 → 느린 싱크(웹훅 타임아웃 등)가 평가도, 다른 싱크도 막지 않음
+# - stats() : 큐 깊이/최대 깊이/버린 수/중복·쿨다운 수/싱크별 전송·오류·지연 (instrument.add_source 용)
+#
+# 환경 변수
+#   ALERT_FILE=reports/alerts.jsonl        파일 싱크 경로 (빈 값이면 끔)
+#   ALERT_WEBHOOK_URL=http://127.0.0.1:8765/  웹훅 싱크 (JSON 묶음 POST)
+#
+# 사용 예)
+#   bus = make_bus()
+#   bus.emit(Signal("KRW-XRP", "macd_sma200", "ENTRY", price=812.0, message="..."))
+#   python alert_bus.py serve 8765       # 웹훅 수신 확인용 로컬 서버 (받은 묶음을 출력)
+
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from instrument import error
+
+QUEUE_SIZE = 10_000      # 평가 → 디스패처 큐 크기
+SINK_QUEUE_SIZE = 1_000  # 싱크별 큐 크기 (묶음 단위)
+BATCH_SEC = 0.2          # 첫 신호 후 이만큼 더 모아서 한 번에 처리
+BATCH_MAX = 500
+COOLDOWN_SEC = 300
+QUIET_KINDS = ("NONE",)  # 상태만 갱신하고 싱크로는 보내지 않는 kind
+WEBHOOK_TIMEOUT_SEC = 3.0
+
+ALERT_FILE = os.environ.get("ALERT_FILE", "reports/alerts.jsonl")
+WEBHOOK_URL = os.environ.get("ALERT_WEBHOOK_URL", "")
+
+_STOP = object()
+
+
+class Signal:
+    """평가 결과 한 건. kind 예: ENTRY / EXIT / NONE / GOLDEN / PEAK / CONFLUENCE"""
+
+    __slots__ = ("ticker", "rule", "kind", "price", "ts", "message", "created")
+
+    def __init__(self, ticker, rule, kind, price=None, ts=None, message=""):
+        self.ticker = ticker
+        self.rule = rule
+        self.kind = kind
+        self.price = price
+        self.ts = ts              # 신호 기준 시각 (봉/사이클 시각)
+        self.message = message
+        self.created = time.time()
+
+    @property
+    def key(self):
+        return self.ticker, self.rule
+
+    def to_dict(self):
+        return {"ticker": self.ticker, "rule": self.rule, "kind": self.kind, "price": self.price,
+                "ts": self.ts.isoformat(sep=" ") if hasattr(self.ts, "isoformat") else self.ts,
+                "message": self.message, "created": round(self.created, 3)}
+
+    def __repr__(self):
+        return f"Signal({self.ticker}, {self.rule}, {self.kind})"
+
+
+# ===== 싱크 =====
+class ConsoleSink:
+    name = "console"
+
+    def send(self, batch):
+        for s in batch:
+            print(s.message or f"[{s.ticker}] {s.rule} {s.kind}")
+
+
+class FileSink:
+    """신호 한 건당 JSON 한 줄 추가"""
+    name = "file"
+
+    def __init__(self, path=ALERT_FILE):
+        self.path = path
+
+    def send(self, batch):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n"
+                            for s in batch))
+
+
+class WebhookSink:
+    """묶음을 {"alerts": [...]} JSON 으로 POST (표준 라이브러리 urllib)"""
+    name = "webhook"
+
+    def __init__(self, url=WEBHOOK_URL, timeout=WEBHOOK_TIMEOUT_SEC):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, batch):
+        import urllib.request
+
+        body = json.dumps({"alerts": [s.to_dict() for s in batch]}, ensure_ascii=False,
+                          default=str).encode("utf-8")
+        req = urllib.request.Request(self.url, data=body, method="POST",
+                                     headers={"Content-Type": "application/json; charset=utf-8"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+def _put_latest(q, item):
+    """가득 찬 큐면 가장 오래된 항목을 버리고 넣음 → 버린 개수"""
+    dropped = 0
+    while True:
+        try:
+            q.put_nowait(item)
+            return dropped
+        except queue.Full:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                pass
+
+
+class _SinkWorker:
+    """싱크 하나 전용 스레드 (묶음 큐)"""
+
+    def __init__(self, sink, maxsize=SINK_QUEUE_SIZE):
+        self.sink = sink
+        self.name = getattr(sink, "name", type(sink).__name__)
+        self.q = queue.Queue(maxsize)
+        self.sent = self.batches = self.errors = self.dropped = 0
+        self.last_sec = 0.0
+        self.max_sec = 0.0
+        self.thread = threading.Thread(target=self._loop, name=f"alert-{self.name}", daemon=True)
+        self.thread.start()
+
+    def submit(self, batch):
+        self.dropped += _put_latest(self.q, batch)
+
+    def _loop(self):
+        while True:
+            batch = self.q.get()
+            if batch is _STOP:
+                return
+            t0 = time.perf_counter()
+            try:
+                self.sink.send(batch)
+                self.sent += len(batch)
+                self.batches += 1
+            except Exception as e:   # 싱크 오류가 다른 싱크/디스패처를 멈추지 않도록
+                self.errors += 1
+                error(f"alert.{self.name}", e)
+            self.last_sec = time.perf_counter() - t0
+            self.max_sec = max(self.max_sec, self.last_sec)
+
+    def stop(self, timeout):
+        _put_latest(self.q, _STOP)
+        self.thread.join(timeout)
+
+    def stats(self):
+        return {"depth": self.q.qsize(), "sent": self.sent, "batches": self.batches,
+                "errors": self.errors, "dropped": self.dropped,
+                "last_ms": round(self.last_sec * 1000, 2), "max_ms": round(self.max_sec * 1000, 2)}
+
+
+# ===== 버스 =====
+class AlertBus:
+    def __init__(self, sinks, maxsize=QUEUE_SIZE, batch_sec=BATCH_SEC, batch_max=BATCH_MAX,
+                 cooldown=COOLDOWN_SEC, quiet_kinds=QUIET_KINDS):
+        self.q = queue.Queue(maxsize)
+        self.batch_sec = batch_sec
+        self.batch_max = batch_max
+        self.cooldown = cooldown
+        self.quiet_kinds = set(quiet_kinds)
+        self.workers = [_SinkWorker(s) for s in sinks]
+        self._last_kind = {}     # (티커, 룰) → 마지막 kind (디스패처 스레드만 사용)
+        self._last_sent = {}     # (티커, 룰, kind) → 마지막 전달 시각
+        self.counts = {"emitted": 0, "dropped": 0, "delivered": 0, "duplicate": 0,
+                       "cooldown": 0, "quiet": 0, "batches": 0}
+        self.max_depth = 0
+        self._closed = False
+        self.thread = threading.Thread(target=self._loop, name="alert-bus", daemon=True)
+        self.thread.start()
+
+    # ----- 평가 쪽 (막히지 않음) -----
+    def emit(self, signal):
+        if self._closed:
+            return
+        self.counts["emitted"] += 1
+        self.counts["dropped"] += _put_latest(self.q, signal)
+        depth = self.q.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def prime(self, ticker, rule, kind):
+        """재시작 시 마지막 상태를 알려 둠 → 같은 상태를 다시 알리지 않음 (emit 전에 호출)"""
+        self._last_kind[(ticker, rule)] = kind
+
+    # ----- 디스패처 스레드 -----
+    def _loop(self):
+        while True:
+            first = self.q.get()
+            if first is _STOP:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.batch_sec
+            stop = False
+            while len(batch) < self.batch_max:
+                wait = deadline - time.monotonic()
+                try:
+                    item = self.q.get(timeout=wait) if wait > 0 else self.q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch):
+        out = []
+        for s in batch:
+            key = s.key
+            if self._last_kind.get(key) == s.kind:
+                self.counts["duplicate"] += 1
+                continue
+            if s.kind in self.quiet_kinds:
+                self._last_kind[key] = s.kind
+                self.counts["quiet"] += 1
+                continue
+            sent_key = (s.ticker, s.rule, s.kind)
+            last = self._last_sent.get(sent_key)
+            if last is not None and s.created - last < self.cooldown:
+                # 전달하지 않은 kind 는 현재 상태로 두지 않음 → 쿨다운이 끝난 뒤 같은 신호가 오면 전달
+                self.counts["cooldown"] += 1
+                continue
+            self._last_kind[key] = s.kind
+            self._last_sent[sent_key] = s.created
+            out.append(s)
+        if not out:
+            return
+        self.counts["delivered"] += len(out)
+        self.counts["batches"] += 1
+        for w in self.workers:
+            w.submit(out)
+
+    # ----- 종료/지표 -----
+    def close(self, timeout=5.0):
+        """남은 신호까지 전달하고 스레드 종료 (atexit 에서도 호출)"""
+        if self._closed:
+            return
+        self._closed = True
+        _put_latest(self.q, _STOP)
+        self.thread.join(timeout)
+        for w in self.workers:
+            w.stop(timeout)
+
+    def stats(self):
+        return dict(self.counts, depth=self.q.qsize(), max_depth=self.max_depth,
+                    sinks={w.name: w.stats() for w in self.workers})
+
+
+def default_sinks(console=True, path=ALERT_FILE, url=WEBHOOK_URL):
+    sinks = [ConsoleSink()] if console else []
+    if path:
+        sinks.append(FileSink(path))
+    if url:
+        sinks.append(WebhookSink(url))
+    return sinks
+
+
+def make_bus(sinks=None, **kwargs):
+    """기본 싱크(콘솔 + ALERT_FILE + ALERT_WEBHOOK_URL)로 버스 생성, 종료 시 남은 알림 전달"""
+    bus = AlertBus(default_sinks() if sinks is None else sinks, **kwargs)
+    atexit.register(bus.close)
+    return bus
+
+
+# ===== 웹훅 수신 확인용 로컬 서버 =====
+def serve_webhook(port=8765, host="127.0.0.1"):
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            for a in json.loads(body).get("alerts", []):
+                print(f"[webhook] {a['ticker']} {a['rule']} {a['kind']} {a.get('message', '')}")
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    print(f"웹훅 수신 대기: http://{host}:{port}/ (Ctrl+C 로 종료)")
+    HTTPServer((host, port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "serve":
+        serve_webhook(int(args[1]) if len(args) > 1 else 8765)
+    else:
+        print("사용법: python alert_bus.py serve [포트]")
@@ -1,8 +1,32 @@
 # alert_macd.py
-import time
-import pyupbit
+# - 알림은 평가 중에 바로 출력하지 않고 alert_bus 로 보냄 (중복 제거/쿨다운/싱크 전달은 디스패처 스레드)
+import asyncio
+import sys
 import pandas as pd
 from datetime import datetime
+from market_data import make_client
+from scheduler import BarScheduler, in_quiet
+from resample import MultiTimeframe, BASE_INTERVAL
+from strategies.macd_strategy import hist_alert
+from alert_bus import Signal, make_bus
+
+TICKERS = ["KRW-XRP"]   # 알림 대상 마켓 목록
+QUIET_HOURS = [("00:00", "04:55")]   # 휴식 시간대 (자정~04:55)
+TIMEFRAMES = ["minute15", "minute60", "minute240", "day"]   # 1분봉 하나로 함께 평가할 봉
+
+# 알림 종류 → 메시지 (룰 = 봉 주기, 합류는 "{봉 주기}/confluence")
+MESSAGES = {
+    "GOLDEN": "[{interval}] 🔔 {name} MACD 골든크로스 (파랑→핑크 전환)",    # 1) 파랑→핑크 전환
+    "PEAK": "[{interval}] ⚠️ {name} 고점 경고 (핑크인데 5MA 하락)",          # 2) 핑크 상태 + 5MA 하락 전환
+    "CONFLUENCE": "[{interval}] 🚀 {name} 상위 봉 추세와 합류 (진입 신호 + 상위 타임프레임 상승)",
+}
+_bus = None
+
+def get_bus():
+    global _bus
+    if _bus is None:
+        _bus = make_bus()
+    return _bus
 
 # ===== MACD 계산 함수 =====
 def calc_macd(df, short=12, long=26, signal=9):
@@ -13,9 +37,19 @@ def calc_macd(df, short=12, long=26, signal=9):
     return macd, signal_line
 
 # ===== 시그널 체크 함수 =====
-def check_signal(interval="minute60"):
-    df = pyupbit.get_ohlcv("KRW-XRP", interval=interval, count=200)
+def check_signal(interval="minute60", ticker="KRW-XRP", client=None):
+    client = client or make_client()
+    df = asyncio.run(client.get_ohlcv(ticker, interval=interval, count=200))
+    evaluate_signal(df, interval, ticker)
 
+async def check_signals(tickers, interval="minute60", client=None):
+    """여러 티커의 봉을 동시에 받아 각각 평가"""
+    client = client or make_client()
+    frames = await client.get_ohlcv_many(tickers, interval=interval, count=200)
+    for ticker, df in frames.items():
+        evaluate_signal(df, interval, ticker)
+
+def evaluate_signal(df, interval, ticker):
     macd, signal_line = calc_macd(df)
     hist = macd - signal_line
     df["MACD"] = macd
@@ -24,25 +58,66 @@ def check_signal(interval="minute60"):
     df["MA5"] = df["close"].rolling(5).mean()
 
     prev, curr = df.iloc[-2], df.iloc[-1]
+    notify(interval, ticker, hist_alert(prev["Hist"], curr["Hist"], prev["MA5"], curr["MA5"]),
+           price=float(curr["close"]), ts=df.index[-1])
+
+def notify(interval, ticker, alert, confluence=False, price=None, ts=None):
+    """
+    평가 결과를 알림 버스로 보냄 (바로 반환)
+    알림이 없어도 NONE 으로 보냄 → 같은 알림이 연속되면 처음 한 번만 전달 (버스의 중복 제거)
+    """
+    name = ticker.split("-")[-1]
+    bus = get_bus()
+    for rule, kind in ((interval, alert or "NONE"),
+                       (f"{interval}/confluence", "CONFLUENCE" if confluence else "NONE")):
+        msg = MESSAGES[kind].format(interval=interval, name=name) if kind in MESSAGES else ""
+        bus.emit(Signal(ticker, rule, kind, price, ts, msg))
 
-    # 1) 파랑→핑크 전환
-    if prev["Hist"] < 0 and curr["Hist"] > 0:
-        print(f"[{interval}] 🔔 XRP MACD 골든크로스 (파랑→핑크 전환)")
+# ===== 다중 타임프레임 (1분봉 하나로 모든 봉 갱신) =====
+async def seed_timeframes(tickers, client, intervals=TIMEFRAMES):
+    """시작 시 타임프레임별 이력을 한 번만 받아 시드"""
+    mtfs = {t: MultiTimeframe(intervals) for t in tickers}
+    for interval in intervals:
+        frames = await client.get_ohlcv_many(tickers, interval=interval, count=200)
+        for ticker, df in frames.items():
+            mtfs[ticker].seed(interval, df)
+    return mtfs
 
-    # 2) 핑크 상태 + 5MA 하락 전환
-    elif curr["Hist"] > 0 and curr["MA5"] < prev["MA5"]:
-        print(f"[{interval}] ⚠️ XRP 고점 경고 (핑크인데 5MA 하락)")
+async def feed_minute(mtfs, client, active=True):
+    """
+    1분봉(직전 마감 봉 + 진행 중 봉)만 받아 모든 타임프레임 갱신
+    상위 봉이 마감되면 그 봉 기준으로 알림 (active=False 면 갱신만)
+    """
+    frames = await client.get_ohlcv_many(list(mtfs), interval=BASE_INTERVAL, count=2)
+    for ticker, df in frames.items():
+        for key, r in zip(df.index, df.itertuples(index=False)):
+            events = mtfs[ticker].on_bar(key, r.open, r.high, r.low, r.close, r.volume)
+            if not active:
+                continue
+            for ev in events:
+                notify(ev["interval"], ticker, ev["Alert"], ev["Confluence"], ev["Close"], ev["Date"])
+
+async def stream_alerts(tickers, client):
+    """
+    WebSocket 체결 스트림 모드: 1분봉 갱신/마감 이벤트를 바로 모든 타임프레임에 반영
+    상위 봉이 마감되는 순간(다음 체결 또는 시계 마감) 알림 - 1분 폴링 지연 없음
+    """
+    from ws_feed import WsFeed
+
+    mtfs = await seed_timeframes(tickers, client)
+
+    def on_event(ev):
+        events = mtfs[ev["ticker"]].on_bar(ev["Date"], ev["Open"], ev["High"], ev["Low"],
+                                           ev["Close"], ev["Volume"])
+        if events and is_active_time():
+            for e in events:
+                notify(e["interval"], ev["ticker"], e["Alert"], e["Confluence"], e["Close"], e["Date"])
+
+    await WsFeed(tickers, on_event, intervals=[BASE_INTERVAL], client=client).run()
 
 # ===== 가동 시간 제어 (자정~04:55는 휴식) =====
-def is_active_time():
-    now = datetime.now()
-    # 00:00 <= 시각 < 05:00 은 휴식
-    if 0 <= now.hour < 5:
-        # 단, 04:55 이후면 작동 시작
-        if now.hour == 4 and now.minute >= 55:
-            return True
-        return False
-    return True
+def is_active_time(now=None):
+    return not in_quiet(now or datetime.now(), QUIET_HOURS)
 
 # ===== 정각 체크 =====
 def is_on_the_hour():
@@ -52,11 +127,14 @@ def is_on_the_hour():
 # ===== 메인 루프 =====
 if __name__ == "__main__":
     print("🚀 XRP MACD 알림 봇 시작")
-    while True:
-        try:
-            if is_active_time() and is_on_the_hour():
-                check_signal("minute60")   # 60분봉
-            time.sleep(60)   # 1분마다 확인
-        except Exception as e:
-            print("에러:", e)
-            time.sleep(60)
\ No newline at end of file
+    client = make_client()   # MARKET_DATA_SOURCE=replay 면 로컬 파일로 실행
+    if "--stream" in sys.argv[1:]:
+        asyncio.run(stream_alerts(TICKERS, client))   # WebSocket 체결 스트림 (websockets 필요)
+        sys.exit(0)
+    mtfs = asyncio.run(seed_timeframes(TICKERS, client))
+    # 1분봉 마감마다 1분봉만 받아 TIMEFRAMES 전체를 갱신 - 각 봉이 마감되는 순간 그 봉 기준으로 알림
+    # 휴식 시간대에도 봉은 계속 이어서 만들고 알림만 끔
+    sched = BarScheduler()
+    sched.add(BASE_INTERVAL, BASE_INTERVAL,
+              lambda bar_close: asyncio.run(feed_minute(mtfs, client, is_active_time(bar_close))))
+    sched.run_forever(report_every=6 * 3600)
@@ -1,5 +1,4 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 
 # CSV 예시 파일: data/price.csv
 # 형식: Date,Open,High,Low,Close,Volume (Date는 YYYY-MM-DD)
@@ -10,7 +9,17 @@ def load_price_data(filepath="data/price.csv"):
     df.set_index("Date", inplace=True)
     return df
 
-def calc_macd(df, short=12, long=26, signal=9):
+def calc_macd(df, short=12, long=26, signal=9, cache=None):
+    """cache(indicator_cache.IndicatorCache) 를 넘기면 같은 데이터의 EMA 는 캐시에서 재사용"""
+    if cache is not None:
+        close = df["Close"].to_numpy(dtype=float)
+        fp = cache.fingerprint(close)
+        df["EMA12"] = cache.get("ema", close, fp=fp, span=short)
+        df["EMA26"] = cache.get("ema", close, fp=fp, span=long)
+        df["MACD"] = df["EMA12"] - df["EMA26"]
+        df["Signal"] = cache.get("ema", df["MACD"].to_numpy(), span=signal)
+        df["Hist"] = df["MACD"] - df["Signal"]
+        return df
     df["EMA12"] = df["Close"].ewm(span=short, adjust=False).mean()
     df["EMA26"] = df["Close"].ewm(span=long, adjust=False).mean()
     df["MACD"] = df["EMA12"] - df["EMA26"]
@@ -18,19 +27,32 @@ def calc_macd(df, short=12, long=26, signal=9):
     df["Hist"] = df["MACD"] - df["Signal"]
     return df
 
-def calc_sma(df, window=200):
+def calc_sma(df, window=200, cache=None):
+    if cache is not None:
+        df[f"SMA{window}"] = cache.get("sma", df["Close"].to_numpy(dtype=float), window=window)
+        return df
     df[f"SMA{window}"] = df["Close"].rolling(window=window, min_periods=1).mean()
     return df
 
+# ===== 배열 버전 (DataFrame 없이 NumPy 배열 → 배열) =====
+def ema_values(values, span):
+    """calc_macd 와 같은 ewm(adjust=False) EMA"""
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+def sma_values(values, window):
+    """calc_sma 와 같은 rolling(window, min_periods=1) 평균"""
+    return pd.Series(values, copy=False).rolling(window=window, min_periods=1).mean().to_numpy()
+
 if __name__ == "__main__":
     try:
         from strategies.macd_strategy import macd_cross_signals, macd_with_ma_filter
+        from indicator_cache import default_cache
         import os
         import matplotlib.pyplot as plt
 
         df = load_price_data("data/price.csv")
-        df = calc_macd(df)
-        df = calc_sma(df, 200)
+        df = calc_macd(df, cache=default_cache())
+        df = calc_sma(df, 200, cache=default_cache())
 
         # 1) 크로스 신호 추출
         signals = macd_cross_signals(df)
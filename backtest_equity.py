@@ -2,13 +2,19 @@
 # MACD+SMA200 Entry/Exit + 수수료/슬리피지 + 퍼센트 손절 / 익절 → 잔고곡선
 
 import os
-import matplotlib.pyplot as plt
+import sys
+import numpy as np
 import pandas as pd
 from backtest import load_price_data, calc_macd, calc_sma
-from strategies.macd_strategy import macd_with_ma_filter
+from strategies.base import IndicatorSet
+from strategies.macd_strategy import macd_with_ma_filter, MacdMaFilter
+from backtest_fast import simulate, simulate_loop
+from indicator_cache import default_cache
+from metrics import evaluate
 
 DATA_PATH   = "data/price.csv"
 OUT_EQUITY  = "reports/equity_curve.png"
+OUT_TRADES  = "reports/trades.csv"
 INIT_CASH   = 1_000_000     # 초기 자본(원)
 
 # ===== 현실 계수 =====
@@ -19,91 +25,84 @@ SLIP = 0.0005   # 슬리피지 0.05% (원하면 0으로)
 STOP_PCT = 0.03   # -3% 손절
 TAKE_PCT = 0.06   # +6% 익절
 
+def signal_arrays(df, sig):
+    """simulate 에 넘길 (Close, High, Low, Entry, Exit) 연속 배열"""
+    return (
+        sig["Close"].to_numpy(dtype=float),
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        sig["Entry"].to_numpy(dtype=bool),
+        sig["Exit"].to_numpy(dtype=bool),
+    )
+
+def strategy_signals(close, short=12, long=26, signal=9, window=200, ind=None):
+    """
+    DataFrame 없이 가격 배열(memmap 뷰 포함)에서 바로 (Entry, Exit) 계산
+    - calc_macd / calc_sma / macd_with_ma_filter 와 같은 룰
+    - ind(IndicatorSet) 를 넘기면 이미 계산된 EMA/SMA 를 재사용
+    """
+    ind = ind or IndicatorSet(close)
+    return MacdMaFilter(short, long, signal, window).signals(ind)
+
+def backtest_arrays(close, high, low, short=12, long=26, signal=9, window=200,
+                    stop_pct=STOP_PCT, take_pct=TAKE_PCT):
+    """배열 입력 백테스트 → (equity, trades)"""
+    entry, exit_ = strategy_signals(close, short, long, signal, window)
+    return simulate(close, high, low, entry, exit_, FEE, SLIP, stop_pct, take_pct, INIT_CASH)
+
+def verify_engine():
+    """배열 엔진 결과가 봉 단위 기준 루프와 완전히 같은지 확인"""
+    df = load_price_data(DATA_PATH)
+    df = calc_macd(df)
+    df = calc_sma(df, 200)
+    sig = macd_with_ma_filter(df)
+    args = signal_arrays(df, sig) + (FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH)
+    fast, _ = simulate(*args)
+    ref = simulate_loop(*args)
+    if not np.array_equal(fast, ref):
+        bad = int(np.flatnonzero(fast != ref)[0])
+        raise AssertionError(f"equity 불일치: {sig.index[bad]} fast={fast[bad]} ref={ref[bad]}")
+    print(f"✅ 엔진 검증 통과 ({len(fast)}봉)")
+
 def run_backtest():
     if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(f"{DATA_PATH} 없음")
 
-    # 1) 데이터 & 지표
+    # 1) 데이터 & 지표 (같은 데이터면 디스크 캐시에서, 새 봉만 붙었으면 그 구간만 계산)
     df = load_price_data(DATA_PATH)   # columns: Date, Open, High, Low, Close, Volume
-    df = calc_macd(df)
-    df = calc_sma(df, 200)
+    cache = default_cache()
+    df = calc_macd(df, cache=cache)
+    df = calc_sma(df, 200, cache=cache)
 
     # 2) 신호 (MACD + SMA200 필터)
     sig = macd_with_ma_filter(df)     # index 가 날짜로 동일해야 함
 
-    # 3) 포지션/잔고
-    cash = INIT_CASH
-    coin = 0.0
-    position = None
-    entry_price = None
-
-    equity_rows = []
-
-    for dt, row in sig.iterrows():
-        px_close = float(row["Close"])
-        px_high  = float(df.loc[dt, "High"])
-        px_low   = float(df.loc[dt, "Low"])
-
-        # === 매수 ===
-        if row["Entry"] and position is None:
-            buy_price = px * (1 + FEE + SLIP)    # 체결가(비용 반영)
-            coin = cash / buy_price              # 살 수 있는 수량
-            cash = 0.0
-            position = "LONG"
-            entry_price = buy_price
-        # === 보유 중일 때 손절/일절/신호 청산 체크 ===
-        elif position == "LONG":
-            stop_lvl = entry_price * (1 - STOP_PCT)
-            takc_lvl = entry_price * (1 + TAKE_PCT)
-
-            exited = False
-
-            # 1) 보수적으로: 같은 봉에서 둘 다 맞으면 '손절' 우선
-            if px_low <= stop_lvl:
-                sell_price = stop_lvl * (1 - FEE - SLIP)   # 손절 체결가에 비용 반영
-                cash = coin * sell_price
-                coin = 0.0
-                position = None
-                entry_price = None
-                exited  = True
-
-            elif px_high >= take_lvl:
-                sell_price = take_lvl * (1 - FEE - SLIP)   # 익절 체결가에 비용 반영
-                cash = coin * sell_price
-                coin = 0.0
-                position = None
-                entry_price = None
-                exited = True
-
-            # 2) 퍼센트 조건이 걸리지 않았을 때만 MACD Exit 신호로 청산
-            if (not extied) and row["Exit"]:
-                sell_price = px_close * (1 - FEE - SLIP)
-                cash = coin * sell_price
-                coin = 0.0
-                position = None
-                entry_price = None
-        
-        # 평가자산
-        equity = cash + coin * px_close
-        equity_rows.append({"Date": dt, "Equity": equity})
-
-    equity_df = pd.DataFrame(equity_rows).set_index("Date")
-
-    # 4) 성과지표
-    total_return = equity_df["Equity"].iloc[-1] / INIT_CASH - 1
+    # 3) 포지션/잔고 (NumPy 배열 기반 엔진)
+    equity, trades = simulate(*signal_arrays(df, sig), FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH)
+    equity_df = pd.DataFrame({"Equity": equity}, index=sig.index.rename("Date"))
+
+    # 4) 성과지표 + 거래 원장
+    result = evaluate(equity, trades, dates=sig.index, close=sig["Close"].to_numpy(), init_cash=INIT_CASH)
+    m = result["metrics"]
     equity_df["Peak"] = equity_df["Equity"].cummax()
     equity_df["Drawdown"] = equity_df["Equity"] / equity_df["Peak"] - 1
-    mdd = float(equity_df["Drawdown"].min())
 
     print("=== 백테스트 결과 (수수료/슬리피지 반영) ===")
     print(f"초기 자본 : {INIT_CASH:,.0f}원")
     print(f"최종 자본 : {equity_df['Equity'].iloc[-1]:,.0f}원")
-    print(f"총 수익률 : {total_return*100:.2f}%")
-    print(f"최대 낙폭 : {mdd*100:.2f}%")
+    print(f"총 수익률 : {m['total_return']*100:.2f}%  (연 {m['cagr']*100:.2f}%)")
+    print(f"최대 낙폭 : {m['mdd']*100:.2f}%  (최장 {m['max_dd_bars']:.0f}봉)")
+    print(f"샤프 {m['sharpe']:.2f} | 소르티노 {m['sortino']:.2f} | 칼마 {m['calmar']:.2f}")
+    print(f"거래 횟수 : {m['trades']}회  승률 {m['win_rate']*100:.1f}%  손익비 {m['profit_factor']:.2f}  "
+          f"노출 {m['exposure']*100:.1f}%")
     print(f"(적용) 수수료 {FEE*100:.3f}% | 슬리피지 {SLIP*100:.3f}%")
 
-    # 5) 잔고곡선 저장
     os.makedirs("reports", exist_ok=True)
+    result["ledger"].to_csv(OUT_TRADES, index=False, encoding="utf-8")
+    print(f"✅ 거래 원장 저장: {OUT_TRADES}")
+
+    # 5) 잔고곡선 저장 (pyplot 은 그릴 때만 import - sweep/walk_forward 등은 matplotlib 없이 사용)
+    import matplotlib.pyplot as plt
     plt.figure()
     plt.plot(equity_df.index, equity_df["Equity"], label="Equity")
     # 드로우다운 영역(피크 대비 하락 분)
@@ -124,5 +123,11 @@ def run_backtest():
     plt.close()
     print(f"✅ Equity Curve 저장: {OUT_EQUITY}")
 
+    result["equity"] = equity_df
+    return result
+
 if __name__ == "__main__":
-    run_backtest()
+    if "--verify" in sys.argv[1:]:
+        verify_engine()
+    else:
+        run_backtest()
@@ -0,0 +1,157 @@
+# backtest_fast.py
+# backtest_equity.run_backtest 의 시뮬레이션을 NumPy 배열 위에서 수행하는 엔진
+# - 수수료/슬리피지/퍼센트 손절·익절, 같은 봉에서 둘 다 맞으면 '손절' 우선 (기존 규칙 동일)
+# - 봉 단위가 아니라 '거래' 단위로 루프: 다음 Entry/Exit 위치는 searchsorted,
+#   보유 구간의 손절/익절 도달 봉은 구간을 점점 넓혀가며 벡터 검색
+# - float32 가격 배열(memmap 등)도 복사 없이 그대로 받고, 평가자산/비교 계산은 float64 로 수행
+# - exit_trade 는 포지션 하나의 청산 봉/가격 계산 (portfolio_backtest 도 같은 규칙으로 사용)
+# - simulate_loop 는 비교용 기준(봉 단위 루프) 구현
+
+import numpy as np
+
+# 보유 구간에서 손절/익절 도달 봉을 찾을 때 처음 검사하는 봉 수 (이후 4배씩 확장)
+FIRST_SCAN = 16
+
+
+def _price_array(x):
+    """float32/float64 는 그대로(뷰 유지), 그 밖의 타입만 float64 로 변환"""
+    x = np.asarray(x)
+    if x.dtype not in (np.float32, np.float64):
+        x = x.astype(np.float64)
+    return x
+
+
+def _as_arrays(close, high, low, entry, exit_):
+    close = _price_array(close)
+    high = _price_array(high)
+    low = _price_array(low)
+    entry = np.ascontiguousarray(entry, dtype=bool)
+    exit_ = np.ascontiguousarray(exit_, dtype=bool)
+    return close, high, low, entry, exit_
+
+
+def _first_hit(low, high, stop_lvl, take_lvl, start, end):
+    """[start, end) 구간에서 처음으로 손절 또는 익절 가격에 닿은 봉 위치 (없으면 -1)"""
+    step = FIRST_SCAN
+    s = start
+    while s < end:
+        t = min(s + step, end)
+        lo, hi = low[s:t], high[s:t]
+        if lo.dtype != np.float64:
+            lo, hi = lo.astype(np.float64), hi.astype(np.float64)
+        hit = (lo <= stop_lvl) | (hi >= take_lvl)
+        k = int(hit.argmax())
+        if hit[k]:
+            return s + k
+        s = t
+        step *= 4
+    return -1
+
+
+def exit_trade(close, high, low, exit_idx, e, buy_price, fee, slip, stop_pct, take_pct):
+    """
+    e 봉에 buy_price 로 산 포지션의 청산 → (청산 위치, 매도 체결가, 사유)
+    - 다음 Exit 신호 봉까지 중 손절/익절 가격에 먼저 닿은 봉이 있으면 그 봉
+    - 끝까지 청산되지 않으면 (-1, nan, "open")
+    exit_idx: Exit 신호 위치 (정렬된 정수 배열)
+    """
+    n = len(close)
+    stop_lvl = buy_price * (1 - stop_pct)
+    take_lvl = buy_price * (1 + take_pct)
+    m = int(np.searchsorted(exit_idx, e, side="right"))
+    sig_j = int(exit_idx[m]) if m < len(exit_idx) else n
+    j = _first_hit(low, high, stop_lvl, take_lvl, e + 1, min(sig_j + 1, n))
+    if j < 0:
+        j = sig_j
+    if j >= n:
+        return -1, np.nan, "open"
+    if float(low[j]) <= stop_lvl:
+        return j, stop_lvl * (1 - fee - slip), "stop"
+    if float(high[j]) >= take_lvl:
+        return j, take_lvl * (1 - fee - slip), "take"
+    return j, float(close[j]) * (1 - fee - slip), "signal"
+
+
+def simulate(close, high, low, entry, exit_, fee, slip, stop_pct, take_pct, init_cash):
+    """
+    반환: (equity, trades)
+       - equity : 봉별 평가자산 (float64 배열, 기준 루프와 동일한 연산 순서)
+       - trades : [(진입 위치, 청산 위치, 매수 체결가, 매도 체결가, 사유), ...]
+                  사유 = "stop" / "take" / "signal" / "open"(미청산, 청산 위치 -1)
+    """
+    close, high, low, entry, exit_ = _as_arrays(close, high, low, entry, exit_)
+    n = len(close)
+    equity = np.empty(n, dtype=np.float64)
+    trades = []
+
+    entry_idx = np.flatnonzero(entry)
+    exit_idx = np.flatnonzero(exit_)
+    cash = float(init_cash)
+    i = 0
+
+    while i < n:
+        # === 다음 매수 봉 ===
+        k = int(np.searchsorted(entry_idx, i))
+        if k >= len(entry_idx):
+            break
+        e = int(entry_idx[k])
+        equity[i:e] = cash
+
+        buy_price = float(close[e]) * (1 + fee + slip)
+        coin = cash / buy_price
+        j, sell_price, reason = exit_trade(close, high, low, exit_idx, e, buy_price,
+                                           fee, slip, stop_pct, take_pct)
+
+        if j < 0:
+            # 끝까지 보유
+            np.multiply(close[e:], coin, out=equity[e:], dtype=np.float64)
+            trades.append((e, -1, buy_price, np.nan, "open"))
+            cash = 0.0
+            i = n
+            break
+
+        np.multiply(close[e:j], coin, out=equity[e:j], dtype=np.float64)
+        cash = coin * sell_price
+        equity[j] = cash
+        trades.append((e, j, buy_price, sell_price, reason))
+        i = j + 1
+
+    if i < n:
+        equity[i:] = cash
+    return equity, trades
+
+
+def simulate_loop(close, high, low, entry, exit_, fee, slip, stop_pct, take_pct, init_cash):
+    """봉 단위 기준 구현 (검증용). simulate 와 같은 equity 를 반환"""
+    close, high, low, entry, exit_ = _as_arrays(close, high, low, entry, exit_)
+    cash = float(init_cash)
+    coin = 0.0
+    position = None
+    entry_price = None
+    equity = np.empty(len(close), dtype=np.float64)
+
+    for t in range(len(close)):
+        px_close = float(close[t])
+        if entry[t] and position is None:
+            buy_price = px_close * (1 + fee + slip)
+            coin = cash / buy_price
+            cash = 0.0
+            position = "LONG"
+            entry_price = buy_price
+        elif position == "LONG":
+            stop_lvl = entry_price * (1 - stop_pct)
+            take_lvl = entry_price * (1 + take_pct)
+            sell_price = None
+            if float(low[t]) <= stop_lvl:
+                sell_price = stop_lvl * (1 - fee - slip)
+            elif float(high[t]) >= take_lvl:
+                sell_price = take_lvl * (1 - fee - slip)
+            elif exit_[t]:
+                sell_price = px_close * (1 - fee - slip)
+            if sell_price is not None:
+                cash = coin * sell_price
+                coin = 0.0
+                position = None
+                entry_price = None
+        equity[t] = cash + coin * px_close
+    return equity
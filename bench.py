@@ -0,0 +1,304 @@
+# bench.py
+# 지표 / 신호 / 백테스트 / 리포트 렌더링 단계별 벤치마크 (거래소 접속 없이 합성 데이터로 실행)
+# - 단계별 소요 시간(여러 번 반복 중 최솟값)과 최대 메모리(tracemalloc) 측정
+# - 결과는 reports/bench/bench_<커밋>_<프리셋>.json 으로 저장 → 커밋 간 비교 가능
+#
+# 사용 예)
+#   python bench.py                 # 기본 프리셋(small)
+#   python bench.py large           # 10M 분봉, 500 티커 포함
+#   python bench.py compare reports/bench/bench_aaa.json reports/bench/bench_bbb.json
+#   python bench.py imports         # 프로세스 시작(import) 시간 예산 확인 - 넘거나 금지 패키지를 불러오면 종료 코드 1
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from backtest import calc_macd, calc_sma
+from strategies.macd_strategy import macd_with_ma_filter
+from backtest_fast import simulate
+from backtest_equity import signal_arrays, FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH
+from live_indicators import LiveMacd
+
+OUT_DIR = "reports/bench"
+REPEAT = 3
+
+# 프로세스 시작 예산: 새 인터프리터에서 `import 모듈` 까지 걸린 시간(ms, 인터프리터 기동 포함)
+# 실시간 루프/알림은 pandas 까지만, 리포트는 그릴 것이 있을 때만 matplotlib 을 불러와야 함
+IMPORT_BUDGET_MS = {
+    "run_loop": 900,
+    "alert_macd": 900,
+    "make_report": 400,
+    "make_daily_report": 400,
+}
+IMPORT_BANNED = ("matplotlib",)   # 위 모듈들이 import 시점에 불러오면 안 되는 패키지
+
+# 프리셋: (봉 수, 봉 주기, 티커 수)
+PRESETS = {
+    "small":  [(1_000, "D", 1), (100_000, "min", 1), (1_000, "D", 50)],
+    "medium": [(1_000, "D", 1), (1_000_000, "min", 1), (1_000, "D", 100), (10_000, "h", 100)],
+    "large":  [(1_000, "D", 1), (10_000_000, "min", 1), (1_000, "D", 500), (10_000, "h", 500)],
+}
+
+
+# ===== 합성 데이터 =====
+def synthetic_ohlcv(n, freq="D", seed=0, start="2015-01-01"):
+    """data/price.csv 와 같은 형식(index=Date, Open/High/Low/Close/Volume)의 랜덤워크 시세"""
+    rng = np.random.default_rng(seed)
+    vol = 0.03 if freq == "D" else 0.002
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, vol, n)))
+    spread = np.abs(rng.normal(0, vol / 2, n))
+    df = pd.DataFrame({
+        "Open": np.concatenate(([close[0]], close[:-1])),
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Close": close,
+        "Volume": rng.uniform(1, 100, n),
+    }, index=pd.date_range(start, periods=n, freq=freq, name="Date"))
+    return df
+
+
+def synthetic_summary(days=365, tickers=("KRW-XRP",), seed=0):
+    """daily_summary.csv 형식의 합성 요약 행"""
+    rows = []
+    for k, ticker in enumerate(tickers):
+        df = synthetic_ohlcv(days, "D", seed + k)
+        rng = np.random.default_rng(seed + k)
+        for dt, r in df.iterrows():
+            rows.append({"date": dt.strftime("%Y-%m-%d"), "ticker": ticker,
+                         "open": r["Open"], "high": r["High"], "low": r["Low"], "close": r["Close"],
+                         "entry_count": int(rng.integers(0, 3)), "exit_count": int(rng.integers(0, 3))})
+    return pd.DataFrame(rows)
+
+
+# ===== 측정 =====
+def measure(fn, repeat=REPEAT):
+    """(최소 소요 시간 초, 최대 메모리 MB) - 메모리는 별도 1회 실행으로 측정"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+
+# ===== 단계 =====
+def stage_fns(df):
+    """단일 시리즈 단계: 지표 → 신호 → 백테스트"""
+    ind = calc_sma(calc_macd(df.copy()), 200)
+    sig = macd_with_ma_filter(ind)
+    args = signal_arrays(ind, sig) + (FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH)
+    return {
+        "indicators": lambda: calc_sma(calc_macd(df.copy()), 200),
+        "signals": lambda: macd_with_ma_filter(ind),
+        "backtest": lambda: simulate(*args),
+    }
+
+
+def multi_ticker_fns(frames):
+    """티커 여러 개: 지표 엔진 시드 + 한 사이클(티커별 현재가 1회 반영)"""
+    engines = {t: LiveMacd().seed(df) for t, df in frames.items()}
+    last = {t: (df.index[-1], float(df["Close"].iloc[-1])) for t, df in frames.items()}
+
+    def seed_all():
+        for df in frames.values():
+            LiveMacd().seed(df)
+
+    def cycle():
+        for t, e in engines.items():
+            key, close = last[t]
+            e.update(key, close * 1.001)
+
+    def backtest_all():
+        for df in frames.values():
+            ind = calc_sma(calc_macd(df.copy()), 200)
+            sig = macd_with_ma_filter(ind)
+            simulate(*signal_arrays(ind, sig), FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH)
+
+    return {"live_seed": seed_all, "live_cycle": cycle, "backtest_all": backtest_all}
+
+
+def report_fns(days=365, tickers=1):
+    """리포트 렌더링: make_report 차트 2장 + make_daily_report 합본 (임시 폴더에서 실행)"""
+    import make_report
+    import make_daily_report
+
+    workdir = tempfile.mkdtemp(prefix="bench_report_")
+    os.makedirs(os.path.join(workdir, "reports"), exist_ok=True)
+    synthetic_summary(days, [f"KRW-T{i}" for i in range(tickers)]).to_csv(
+        os.path.join(workdir, "reports", "daily_summary.csv"), index=False)
+
+    def in_workdir(fn):
+        def run():
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                fn()
+            finally:
+                os.chdir(cwd)
+        return run
+
+    def charts():
+        rows = make_report.read_summary()
+        make_report.save_price_curve(rows)
+        make_report.save_change_bars(rows)
+
+    return {"report_charts": in_workdir(charts),
+            "report_daily": in_workdir(lambda: make_daily_report.build_report(force=True)),
+            "report_cached": in_workdir(make_daily_report.build_report)}
+
+
+def import_time(module, repeat=REPEAT):
+    """
+    새 프로세스에서 module 을 import → (최소 소요 시간 초, 모듈 자체 import 시간 초, 불러온 최상위 패키지)
+    - 소요 시간은 인터프리터 기동 포함 벽시계 시간, 모듈 import 시간은 -X importtime 누적값
+    """
+    code = f"import sys, {module}; print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    root = os.path.dirname(os.path.abspath(__file__))
+    best = best_import = float("inf")
+    loaded = set()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=root,
+                              capture_output=True, text=True, check=True)
+        best = min(best, time.perf_counter() - t0)
+        # 마지막 줄: "import time:  self | cumulative | module"
+        best_import = min(best_import, int(proc.stderr.strip().splitlines()[-1].split("|")[1]) / 1e6)
+        loaded = set(proc.stdout.split())
+    return best, best_import, loaded
+
+
+def import_fns(budget=IMPORT_BUDGET_MS):
+    """시작 시간 측정 결과 행 + 예산 초과/금지 패키지 목록"""
+    results, failures = [], []
+    for module, limit in budget.items():
+        sec, own, loaded = import_time(module)
+        banned = sorted(p for p in IMPORT_BANNED if p in loaded)
+        results.append({"stage": f"import_{module}", "bars": 0, "freq": "-", "tickers": 0,
+                        "sec": round(sec, 6), "peak_mb": 0.0, "import_sec": round(own, 6)})
+        flag = ""
+        if sec * 1000 > limit:
+            failures.append(f"{module}: {sec*1000:.0f}ms > 예산 {limit}ms")
+            flag = "  ⚠️ 예산 초과"
+        if banned:
+            failures.append(f"{module}: {', '.join(banned)} 을(를) import 시점에 불러옴")
+            flag += f"  ⚠️ {', '.join(banned)}"
+        print(f"  {'import_' + module:<24} {sec*1000:>8.1f} ms (모듈 {own*1000:>6.1f} ms)  "
+              f"예산 {limit} ms{flag}")
+    return results, failures
+
+
+def run_preset(name):
+    results = []
+    for n, freq, tickers in PRESETS[name]:
+        if tickers == 1:
+            df = synthetic_ohlcv(n, freq)
+            fns = stage_fns(df)
+        else:
+            frames = {f"KRW-T{i}": synthetic_ohlcv(n, freq, seed=i) for i in range(tickers)}
+            fns = multi_ticker_fns(frames)
+        for stage, fn in fns.items():
+            sec, peak = measure(fn, 1 if n * tickers >= 5_000_000 else REPEAT)
+            results.append({"stage": stage, "bars": n, "freq": freq, "tickers": tickers,
+                            "sec": round(sec, 6), "peak_mb": round(peak, 2)})
+            print(f"  {stage:<14} bars={n:>10,} freq={freq:<3} tickers={tickers:<4} "
+                  f"{sec*1000:>10.2f} ms  peak {peak:>9.2f} MB")
+
+    for stage, fn in _quiet(report_fns(365, 1)).items():
+        sec, peak = measure(fn)
+        results.append({"stage": stage, "bars": 365, "freq": "D", "tickers": 1,
+                        "sec": round(sec, 6), "peak_mb": round(peak, 2)})
+        print(f"  {stage:<14} days=365{'':>22} {sec*1000:>10.2f} ms  peak {peak:>9.2f} MB")
+
+    imports, _ = import_fns()
+    return results + imports
+
+
+def _quiet(fns):
+    """리포트 함수의 저장 완료 print 를 숨김"""
+    def wrap(fn):
+        def run():
+            stdout = sys.stdout
+            sys.stdout = open(os.devnull, "w")
+            try:
+                fn()
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+        return run
+    return {k: wrap(v) for k, v in fns.items()}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def meta(preset):
+    return {
+        "commit": git_commit(),
+        "preset": preset,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def compare(path_a, path_b):
+    """두 결과 파일의 같은 단계끼리 소요 시간/메모리 비율 출력 (b / a)"""
+    with open(path_a, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(path_b, encoding="utf-8") as f:
+        b = json.load(f)
+    key = lambda r: (r["stage"], r["bars"], r["freq"], r["tickers"])
+    base = {key(r): r for r in a["results"]}
+    print(f"=== {a['meta']['commit']} → {b['meta']['commit']} ===")
+    for r in b["results"]:
+        old = base.get(key(r))
+        if old is None:
+            continue
+        ratio = r["sec"] / old["sec"] if old["sec"] else float("nan")
+        mem = r["peak_mb"] / old["peak_mb"] if old["peak_mb"] else float("nan")
+        flag = "  ⚠️ 느려짐" if ratio > 1.10 else ""
+        print(f"  {r['stage']:<14} bars={r['bars']:>10,} tickers={r['tickers']:<4} "
+              f"시간 x{ratio:.2f}  메모리 x{mem:.2f}{flag}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and args[0] == "compare":
+        compare(args[1], args[2])
+    elif args and args[0] == "imports":
+        print("=== 시작 시간 ===")
+        _, failures = import_fns()
+        for f in failures:
+            print(f"ERROR: {f}")
+        sys.exit(1 if failures else 0)
+    else:
+        preset = args[0] if args else "small"
+        print(f"=== 벤치마크: {preset} ===")
+        results = run_preset(preset)
+        os.makedirs(OUT_DIR, exist_ok=True)
+        info = meta(preset)
+        out = os.path.join(OUT_DIR, f"bench_{info['commit']}_{preset}.json")
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({"meta": info, "results": results}, f, ensure_ascii=False, indent=1)
+        print(f"✅ 결과 저장: {out}")
@@ -0,0 +1,200 @@
+# candle_store.py
+# (티커, interval) 별 로컬 캔들 저장소 - 추가 전용 컬럼 파일
+# - 위치: data/store/{티커}/{interval}/{컬럼}.bin  (ts=int64 ns, open/high/low/close/volume=float64 또는 float32)
+#         + meta.json (값 컬럼 dtype)
+# - 마지막 저장 봉 이후만 요청해서 뒤에 붙이고, 아직 만들어지는 중인 마지막 봉은 제자리 덮어쓰기
+# - 읽기는 np.memmap 으로 바로 (CSV 파싱 없음), 이력 길이 제한 없음
+# - 일봉은 어디서 왔든(pyupbit 09:00 / CSV 자정) 키를 '날짜 09:00' 로 맞춰 저장 → 같은 날이 두 번 들어가지 않음
+
+import asyncio
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from instrument import error
+
+STORE_DIR = "data/store"
+INITIAL_BARS = 2000     # 저장소가 비어 있을 때 처음 받을 봉 수
+
+TS_COL = "ts"
+VALUE_COLS = ["open", "high", "low", "close", "volume"]
+VALUE_DTYPE = np.float64   # 새 시리즈의 기본 값 dtype (시리즈별로 meta.json 에 기록)
+DAY_START_HOUR = 9         # 일봉 키 = 그 날짜 09:00 (업비트/pyupbit 일봉과 같음, KST)
+
+# interval → 봉 길이(초). 새로 받아야 할 봉 수 계산에 사용
+INTERVAL_SEC = {
+    "minute1": 60, "minute3": 180, "minute5": 300, "minute10": 600, "minute15": 900,
+    "minute30": 1800, "minute60": 3600, "minute240": 14400,
+    "day": 86400, "week": 7 * 86400, "month": 31 * 86400,
+}
+
+
+_NS_PER_DAY = 86400 * 1_000_000_000
+
+
+def day_keys(ts):
+    """일봉 시각(int64 ns) → 그 날짜의 DAY_START_HOUR 시각 (자정 키와 09:00 키를 같은 날로 맞춤)"""
+    ts = np.asarray(ts, dtype=np.int64)
+    return ts - ts % _NS_PER_DAY + DAY_START_HOUR * 3600 * 1_000_000_000
+
+
+class CandleStore:
+    def __init__(self, root=STORE_DIR, dtype=VALUE_DTYPE):
+        self.root = root
+        self.dtype = np.dtype(dtype)   # 새로 만드는 시리즈에만 적용
+
+    def path_for(self, ticker, interval):
+        return os.path.join(self.root, ticker, interval)
+
+    def _col_path(self, ticker, interval, col):
+        return os.path.join(self.path_for(ticker, interval), f"{col}.bin")
+
+    def value_dtype(self, ticker, interval):
+        """시리즈의 값 컬럼 dtype (meta.json 이 없으면 float64)"""
+        path = os.path.join(self.path_for(ticker, interval), "meta.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return np.dtype(json.load(f)["dtype"])
+        except FileNotFoundError:
+            return np.dtype(np.float64)
+
+    def _write_meta(self, ticker, interval):
+        path = os.path.join(self.path_for(ticker, interval), "meta.json")
+        if not os.path.exists(path):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"dtype": self.dtype.name, "columns": [TS_COL] + VALUE_COLS}, f)
+
+    # ===== 읽기 =====
+    def length(self, ticker, interval):
+        """저장된 봉 수 (ts 파일 기준 - 값 컬럼은 ts 보다 먼저 기록되므로 ts 가 커밋 기준)"""
+        path = self._col_path(ticker, interval, TS_COL)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // np.dtype(np.int64).itemsize
+
+    def last_timestamp(self, ticker, interval):
+        """마지막 봉 시각 (pd.Timestamp) 또는 None"""
+        n = self.length(ticker, interval)
+        if n == 0:
+            return None
+        ts = np.memmap(self._col_path(ticker, interval, TS_COL), dtype=np.int64, mode="r", shape=(n,))
+        return pd.Timestamp(int(ts[-1]))
+
+    def load_arrays(self, ticker, interval, tail=None):
+        """
+        {컬럼: 배열} - 파일을 memmap 으로 연 읽기 전용 뷰 (tail 지정 시 마지막 tail 개만)
+        """
+        n = self.length(ticker, interval)
+        start = 0 if tail is None else max(0, n - tail)
+        value_dtype = self.value_dtype(ticker, interval)
+        out = {}
+        for col, dtype in [(TS_COL, np.int64)] + [(c, value_dtype) for c in VALUE_COLS]:
+            if n == 0:
+                out[col] = np.empty(0, dtype=dtype)
+            else:
+                mm = np.memmap(self._col_path(ticker, interval, col), dtype=dtype, mode="r", shape=(n,))
+                out[col] = mm[start:]
+        return out
+
+    def load(self, ticker, interval, tail=None):
+        """pyupbit 와 같은 형식의 DataFrame (index=시각, open/high/low/close/volume)"""
+        cols = self.load_arrays(ticker, interval, tail)
+        index = pd.DatetimeIndex(np.asarray(cols[TS_COL]).view("datetime64[ns]"))
+        return pd.DataFrame({c: np.asarray(cols[c]) for c in VALUE_COLS}, index=index)
+
+    def load_price_frame(self, ticker, interval="day", tail=None):
+        """backtest.load_price_data 와 같은 형식 (index=Date, Open/High/Low/Close/Volume)"""
+        df = self.load(ticker, interval, tail)
+        df.columns = [c.capitalize() for c in df.columns]
+        df.index.name = "Date"
+        if interval == "day":
+            df.index = df.index.normalize()
+            df = df[~df.index.duplicated(keep="last")]   # 예전에 자정/09:00 키가 섞여 저장된 시리즈 대비
+        return df
+
+    # ===== 쓰기 =====
+    def _repair(self, ticker, interval):
+        """기록 도중 중단돼 값 컬럼이 ts 보다 길어졌으면 ts 길이에 맞춰 잘라냄"""
+        n = self.length(ticker, interval)
+        size = n * self.value_dtype(ticker, interval).itemsize
+        for col in VALUE_COLS:
+            path = self._col_path(ticker, interval, col)
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+        return n
+
+    def upsert(self, ticker, interval, df):
+        """
+        pyupbit 형식 DataFrame 반영
+           - 마지막 저장 봉보다 오래된 봉: 무시
+           - 마지막 저장 봉과 같은 시각: 덮어쓰기 (진행 중이던 봉 갱신)
+             (일봉은 날짜 기준 - 자정 키 CSV 봉 뒤에 같은 날 09:00 봉이 오면 덮어씀)
+           - 더 새로운 봉: 뒤에 추가
+        반환: 추가된 봉 수
+        """
+        if df is None or len(df) == 0:
+            return 0
+        os.makedirs(self.path_for(ticker, interval), exist_ok=True)
+        self._write_meta(ticker, interval)
+        n = self._repair(ticker, interval)
+        value_dtype = self.value_dtype(ticker, interval)
+
+        df = df.sort_index()
+        ts = df.index.values.astype("datetime64[ns]").view(np.int64)
+        if interval == "day":
+            ts = day_keys(ts)
+        keep = np.append(ts[1:] != ts[:-1], True)   # 같은 키(같은 날)는 마지막 봉만
+        ts, df = ts[keep], df[keep]
+        last = self.last_timestamp(ticker, interval)
+        last_key = None
+        if last is not None:
+            last_key = int(day_keys(last.value)) if interval == "day" else last.value
+            start = int(np.searchsorted(ts, last_key, side="left"))
+            ts = ts[start:]
+            df = df.iloc[start:]
+            if len(ts) == 0:
+                return 0
+        overwrite = last_key is not None and ts[0] == last_key
+        offset = n - 1 if overwrite else n
+
+        # 값 컬럼 먼저, ts 는 마지막에 기록 (ts 길이 = 커밋된 봉 수)
+        for col, values in [(c, df[c].to_numpy(dtype=value_dtype)) for c in VALUE_COLS] + [(TS_COL, ts)]:
+            path = self._col_path(ticker, interval, col)
+            mode = "r+b" if os.path.exists(path) else "wb"
+            with open(path, mode) as f:
+                f.seek(offset * values.dtype.itemsize)
+                f.write(np.ascontiguousarray(values).tobytes())
+        return len(ts) - (1 if overwrite else 0)
+
+    # ===== 동기화 =====
+    def bars_to_fetch(self, ticker, interval, now=None):
+        """마지막 저장 봉부터 지금까지 필요한 봉 수 (마지막 봉 포함 → 진행 중이던 봉도 갱신)"""
+        last = self.last_timestamp(ticker, interval)
+        if last is None:
+            return INITIAL_BARS
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        elapsed = max(0.0, (now - last).total_seconds())
+        return int(math.ceil(elapsed / INTERVAL_SEC[interval])) + 1
+
+    async def sync(self, client, ticker, interval="day", now=None):
+        """새 봉만 받아 저장 (market_data 클라이언트 사용). 반환: 추가된 봉 수"""
+        count = self.bars_to_fetch(ticker, interval, now)
+        df = await client.get_ohlcv(ticker, interval=interval, count=count)
+        return self.upsert(ticker, interval, df)
+
+    async def sync_many(self, client, tickers, interval="day", now=None):
+        """여러 티커 동시 동기화 → {티커: 추가된 봉 수} (실패한 티커는 제외)"""
+        results = await asyncio.gather(
+            *(self.sync(client, t, interval, now) for t in tickers), return_exceptions=True
+        )
+        out = {}
+        for ticker, res in zip(tickers, results):
+            if isinstance(res, Exception):
+                error("store_sync", res, ticker)
+            else:
+                out[ticker] = res
+        return out
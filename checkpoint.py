@@ -0,0 +1,48 @@
+# checkpoint.py
+# run_loop 재시작용 상태 체크포인트
+# - 티커별 지표 엔진 상태 / 마지막 알림 상태 / 마지막 처리 봉 + 루프 공통 상태를 JSON 한 파일로
+# - 임시 파일에 쓰고 os.replace 로 교체 → 기록 중에 죽어도 이전 체크포인트가 온전히 남음
+# - 내용 해시를 함께 저장해 잘린/손상된 파일은 읽지 않음 (None → 콜드 스타트)
+# - VERSION 이 다르면 무시 (상태 형식이 바뀐 뒤 예전 파일로 잘못 복원하지 않도록)
+
+import hashlib
+import json
+import os
+
+CHECKPOINT_FILE = "reports/state/checkpoint.json"
+VERSION = 1
+FSYNC = False      # True 면 교체 전에 디스크까지 동기화 (전원 차단 대비, 사이클마다 수 ms 추가)
+
+
+def _digest(body):
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def save_checkpoint(state, path=CHECKPOINT_FILE, fsync=FSYNC):
+    body = json.dumps(state, separators=(",", ":"))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        # 1행: 버전/해시 헤더, 2행: 본문
+        f.write(json.dumps({"version": VERSION, "digest": _digest(body)}) + "\n")
+        f.write(body)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """체크포인트 dict. 파일이 없거나 버전이 다르거나 손상됐으면 None"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            head = json.loads(f.readline())
+            body = f.read()
+    except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    if head.get("version") != VERSION or head.get("digest") != _digest(body):
+        return None
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError:
+        return None
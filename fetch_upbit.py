@@ -1,25 +1,42 @@
 # fetch_upbit.py
-# KRW-XRPgi 일봉 시세를 가져와 data/price.csv 로 저장
+# KRW-XRPgi 일봉 시세를 로컬 캔들 저장소(data/store)에 새 봉만 받아 붙이고,
+# 백테스트 스크립트용으로 data/price.csv 를 내보냄
 # columns: Date,Open,High,Low,Close,Volume
+# (시세 요청은 market_data 클라이언트를 통해 → MARKET_DATA_SOURCE=replay 로 오프라인 실행 가능)
 
-import pyupbit
-import pandas as pd
+import asyncio
 import os
+from market_data import make_client, to_price_frame
+from candle_store import CandleStore
 
 TICKER = "KRW-XRP"    # 필요하면 KRW-ETH 등으로 바꿔도 됨
+TICKERS = [TICKER]    # 멀티 티커 루프(run_loop)에서 감시할 마켓 목록
 COUNT  = 200          # 최근 200일
 
+def fetch_ohlcv(count=COUNT, ticker=TICKER, client=None):
+    """최근 count 개 일봉을 data/price.csv 와 같은 컬럼 형식으로 반환"""
+    client = client or make_client()
+    df = asyncio.run(client.get_ohlcv(ticker, interval="day", count=count))
+    return to_price_frame(df)
+
+def fetch_current_prices(tickers=TICKERS, client=None):
+    """여러 티커의 현재가 → {티커: 가격} (PRICE_BATCH 개씩 묶어 요청)"""
+    client = client or make_client()
+    return asyncio.run(client.get_current_price(tickers))
+
+def sync_store(ticker=TICKER, interval="day", store=None, client=None):
+    """저장소에 마지막 봉 이후만 받아 반영 → 추가된 봉 수"""
+    store = store or CandleStore()
+    client = client or make_client()
+    return asyncio.run(store.sync(client, ticker, interval))
+
 def main():
     os.makedirs("data", exist_ok=True)
-    df = pyupbit.get_ohlcv(ticker=TICKER, interval="day", count=COUNT)
-    # Upbit df: index=Datetime, columns=['open','high','low','close','volume','value']
-    df = df.rename(columns={
-        "open":"Open", "high":"High", "low":"Low", "close":"Close", "volume":"Volume"
-    })
-    df["Date"] = pd.to_datetime(df.index.date)  # YYYY-MM-DD
-    out = df[["Date","Open","High","Low","Close","Volume"]].sort_values("Date")
+    store = CandleStore()
+    added = sync_store(TICKER, "day", store)
+    out = to_price_frame(store.load(TICKER, "day"))
     out.to_csv("data/price.csv", index=False, encoding="utf-8")
-    print(f"✅ 저장 완료: data/price.csv  (티커: {TICKER}, 행수: {len(out)})")
+    print(f"✅ 저장 완료: data/price.csv  (티커: {TICKER}, 행수: {len(out)}, 새 봉: {added})")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
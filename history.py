@@ -0,0 +1,87 @@
+# history.py
+# 대용량 백테스트용 memmap 이력 로더
+# - candle_store 와 같은 컬럼 파일 형식(ts=int64 ns, 값=float64/float32)을 np.memmap 으로 열어
+#   OHLCV 를 타입이 정해진 읽기 전용 배열 뷰로 제공 (DataFrame/복사 없음)
+# - 기존 data/price.csv 형식 CSV → 컬럼 파일 변환기 (청크 단위로 읽어 전체를 메모리에 올리지 않음)
+#
+# 사용 예)
+#   python history.py convert data/price.csv KRW-XRP day float32
+#   python history.py backtest KRW-XRP day
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, STORE_DIR, TS_COL, VALUE_COLS
+
+CHUNK_ROWS = 1_000_000   # CSV 변환 시 한 번에 읽을 행 수
+
+
+class History:
+    """한 (티커, interval) 시리즈의 memmap 뷰 모음"""
+
+    def __init__(self, arrays):
+        self.ts = arrays[TS_COL]          # int64 (ns)
+        self.open = arrays["open"]
+        self.high = arrays["high"]
+        self.low = arrays["low"]
+        self.close = arrays["close"]
+        self.volume = arrays["volume"]
+
+    def __len__(self):
+        return len(self.ts)
+
+    @property
+    def dtype(self):
+        return self.close.dtype
+
+    @property
+    def dates(self):
+        """ts 를 datetime64[ns] 로 본 뷰 (복사 없음)"""
+        return np.asarray(self.ts).view("datetime64[ns]")
+
+
+def open_history(ticker, interval="day", root=STORE_DIR, tail=None):
+    return History(CandleStore(root).load_arrays(ticker, interval, tail))
+
+
+def convert_csv(csv_path, ticker, interval="day", root=STORE_DIR, dtype="float64",
+                chunksize=CHUNK_ROWS):
+    """
+    Date,Open,High,Low,Close,Volume CSV(시간순 정렬) → 컬럼 파일
+    - 이미 있는 시리즈라면 마지막 봉 이후만 이어 붙임
+    - interval="day" 이면 Date(자정)는 저장소 일봉 키(그 날짜 09:00)로 맞춰 저장 (CandleStore.upsert)
+    반환: 추가된 봉 수
+    """
+    store = CandleStore(root, dtype=dtype)
+    added = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        chunk.columns = [c.lower() for c in chunk.columns]
+        index = pd.DatetimeIndex(pd.to_datetime(chunk["date"]))
+        frame = pd.DataFrame({c: chunk[c].to_numpy() for c in VALUE_COLS}, index=index)
+        added += store.upsert(ticker, interval, frame)
+    return added
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) >= 3 and args[0] == "convert":
+        csv_path, ticker = args[1], args[2]
+        interval = args[3] if len(args) > 3 else "day"
+        dtype = args[4] if len(args) > 4 else "float64"
+        added = convert_csv(csv_path, ticker, interval, dtype=dtype)
+        print(f"✅ 변환 완료: {csv_path} → {STORE_DIR}/{ticker}/{interval} ({added}봉, {dtype})")
+    elif len(args) >= 2 and args[0] == "backtest":
+        from backtest_equity import backtest_arrays, INIT_CASH
+
+        hist = open_history(args[1], args[2] if len(args) > 2 else "day")
+        equity, trades = backtest_arrays(hist.close, hist.high, hist.low)
+        peak = np.maximum.accumulate(equity)
+        print(f"=== memmap 백테스트: {args[1]} ({len(hist)}봉, {hist.dtype}) ===")
+        print(f"총 수익률 : {(equity[-1] / INIT_CASH - 1) * 100:.2f}%")
+        print(f"최대 낙폭 : {(equity / peak - 1).min() * 100:.2f}%")
+        print(f"거래 횟수 : {len(trades)}회")
+    else:
+        print("사용법: python history.py convert <csv> <티커> [interval] [float64|float32]")
+        print("        python history.py backtest <티커> [interval]")
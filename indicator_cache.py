@@ -0,0 +1,283 @@
+# indicator_cache.py
+# 지표 결과 캐시 (메모리 LRU + 선택적 디스크)
+# - 키 = (지표 이름, 파라미터, 입력 시리즈 지문) → 같은 데이터/파라미터의 EWM/rolling 을 다시 계산하지 않음
+# - 입력 뒤에 새 봉만 붙은 경우: 앞부분 지문이 같은 캐시 결과를 찾아 새 봉 구간만 이어서 계산
+#     ema : 마지막 EMA 값에서 점화식 그대로 이어감 (전체 재계산과 비트 단위 동일)
+#     sma : 직전 window-1 개 입력부터 다시 굴림 (전체 재계산과 부동소수 반올림 차이 이내)
+# - 디스크는 DISK_MAX_BYTES 상한 → 넘으면 오래 안 쓴 파일(mtime 순, 읽을 때 갱신)부터 삭제
+#   (진행 중인 마지막 봉이 바뀔 때마다 새 지문 파일이 생기므로 상한 없이는 계속 쌓임)
+# - 적중/디스크 적중/연장/미스/축출(메모리·디스크) 통계 → 캐시 크기 정하는 데 사용
+#
+# 사용 예)
+#   cache = IndicatorCache(disk_dir=CACHE_DIR)
+#   ema12 = cache.get("ema", close, span=12)
+#   print(cache.stats())
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from backtest import ema_values, sma_values
+
+CACHE_DIR = "reports/cache/indicators"
+MAX_BYTES = 256 * 1024 * 1024    # 메모리 캐시 상한
+DISK_MAX_BYTES = 1024 * 1024 * 1024   # 디스크 캐시 상한
+DISK_TRIM_TO = 0.9      # 상한을 넘으면 이 비율까지 줄임 (저장할 때마다 디렉터리를 훑지 않도록)
+
+
+def fingerprint(values):
+    """입력 배열 지문 (dtype + 길이 + 내용 해시). memmap 도 복사 없이 해시"""
+    a = np.ascontiguousarray(values)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{a.dtype.str}:{len(a)}:".encode())
+    h.update(a.view(np.uint8))
+    return h.hexdigest()
+
+
+# ===== 지표별 계산 / 이어 계산 =====
+def _ema(values, span):
+    return ema_values(values, span)
+
+
+def _ema_extend(values, prev, span):
+    """prev = values[:len(prev)] 의 EMA. 마지막 EMA 값을 첫 입력으로 두면 ewm(adjust=False) 가 그대로 이어짐"""
+    seed = np.concatenate(([prev[-1]], np.asarray(values[len(prev):], dtype=np.float64)))
+    return np.concatenate((prev, ema_values(seed, span)[1:]))
+
+
+def _sma(values, window):
+    return sma_values(values, window)
+
+
+def _sma_extend(values, prev, window):
+    m = len(prev)
+    start = max(0, m - window + 1)
+    return np.concatenate((prev, sma_values(values[start:], window)[m - start:]))
+
+
+KINDS = {
+    "ema": (_ema, _ema_extend),
+    "sma": (_sma, _sma_extend),
+}
+
+
+def _param_str(params):
+    return ",".join(f"{k}={params[k]}" for k in sorted(params))
+
+
+class IndicatorCache:
+    fingerprint = staticmethod(fingerprint)
+
+    def __init__(self, max_bytes=MAX_BYTES, disk_dir=None, disk_max_bytes=DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes = None      # 디스크 캐시 크기 (첫 저장 때 디렉터리를 훑어 채움)
+        self._mem = OrderedDict()    # (이름, 파라미터, 지문) → 결과 배열
+        self._lengths = {}           # (이름, 파라미터) → {지문: 입력 길이}
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.extends = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+    # ===== 조회 =====
+    def get(self, name, values, fp=None, **params):
+        """
+        지표 결과 (읽기 전용 배열). fp 에 입력 지문을 넘기면 해시 계산을 건너뜀
+        (같은 배열로 여러 번 조회할 때 지문을 한 번만 계산해 재사용)
+        """
+        key = (name, _param_str(params))
+        fp = fp or fingerprint(values)
+        full = key + (fp,)
+
+        out = self._mem.get(full)
+        if out is not None:
+            self._mem.move_to_end(full)
+            self.hits += 1
+            return out
+
+        out = self._load(key, fp, len(values))
+        if out is not None:
+            self.disk_hits += 1
+        else:
+            compute, extend = KINDS[name]
+            prev, prev_fp = self._find_prefix(key, values)
+            if prev is not None:
+                out = extend(values, prev, **params)
+                self.extends += 1
+                self._remove_disk(key, prev_fp, len(prev))   # 앞부분 결과는 새 결과에 포함됨
+            else:
+                out = compute(values, **params)
+                self.misses += 1
+            out = np.asarray(out, dtype=np.float64)
+            self._save(key, fp, out)
+        out.flags.writeable = False
+        self._put(full, out)
+        return out
+
+    def _find_prefix(self, key, values):
+        """같은 (이름, 파라미터) 의 더 짧은 결과 중 입력 앞부분 지문이 일치하는 것 (긴 것부터)"""
+        n = len(values)
+        lengths = dict(self._lengths.get(key, {}))
+        for fp, m in self._disk_entries(key):
+            lengths.setdefault(fp, m)
+        by_len = {}
+        for fp, m in lengths.items():
+            if 0 < m < n:
+                by_len.setdefault(m, []).append(fp)
+        for m in sorted(by_len, reverse=True):
+            prefix_fp = fingerprint(values[:m])
+            if prefix_fp in by_len[m]:
+                prev = self._mem.get(key + (prefix_fp,))
+                if prev is None:
+                    prev = self._load(key, prefix_fp, m)
+                if prev is not None:
+                    return prev, prefix_fp
+        return None, None
+
+    # ===== 메모리 LRU =====
+    def _put(self, full, arr):
+        if full in self._mem:
+            return
+        self._mem[full] = arr
+        self._lengths.setdefault(full[:2], {})[full[2]] = len(arr)
+        self._bytes += arr.nbytes
+        while self._bytes > self.max_bytes and len(self._mem) > 1:
+            old, val = self._mem.popitem(last=False)
+            self._lengths[old[:2]].pop(old[2], None)
+            self._bytes -= val.nbytes
+            self.evictions += 1
+
+    # ===== 디스크 =====
+    def _disk_path(self, key, fp, n):
+        return os.path.join(self.disk_dir, f"{key[0]}-{key[1]}-{n}-{fp}.npy")
+
+    def _disk_entries(self, key):
+        """디스크에 있는 같은 (이름, 파라미터) 결과: [(지문, 길이), ...]"""
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return []
+        prefix = f"{key[0]}-{key[1]}-"
+        entries = []
+        for fname in os.listdir(self.disk_dir):
+            if fname.startswith(prefix) and fname.endswith(".npy"):
+                n, _, fp = fname[len(prefix):-len(".npy")].partition("-")
+                if n.isdigit():
+                    entries.append((fp, int(n)))
+        return entries
+
+    def _load(self, key, fp, n):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key, fp, n)
+        try:
+            arr = np.load(path)
+            os.utime(path)   # 최근에 쓴 파일 → 축출 순서에서 뒤로
+            return arr
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def _save(self, key, fp, arr):
+        if not self.disk_dir:
+            return
+        os.makedirs(self.disk_dir, exist_ok=True)
+        path = self._disk_path(key, fp, len(arr))
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        os.replace(tmp, path)
+        size = os.path.getsize(path)
+        if self._disk_bytes is None or self._disk_bytes + size > self.disk_max_bytes:
+            self._trim_disk(keep=path)
+        else:
+            self._disk_bytes += size
+
+    def _trim_disk(self, keep=None):
+        """
+        디렉터리를 훑어 실제 크기를 다시 잼 → 상한을 넘으면 mtime 이 오래된 파일부터
+        상한 × DISK_TRIM_TO 까지 삭제 (keep 은 남김)
+        """
+        entries = []
+        for fname in os.listdir(self.disk_dir):
+            if not fname.endswith(".npy"):
+                continue
+            path = os.path.join(self.disk_dir, fname)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * DISK_TRIM_TO if total > self.disk_max_bytes else total
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self.disk_evictions += 1
+            except FileNotFoundError:
+                pass   # 다른 프로세스가 먼저 지움
+            total -= size
+        self._disk_bytes = total
+
+    def _remove_disk(self, key, fp, n):
+        if self.disk_dir:
+            path = self._disk_path(key, fp, n)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    # ===== 통계 =====
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.extends + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "extends": self.extends,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._mem),
+            "mem_mb": round(self._bytes / 1e6, 2),
+            "disk_mb": round(self._disk_bytes / 1e6, 2) if self._disk_bytes is not None else None,
+        }
+
+    def clear(self):
+        self._mem.clear()
+        self._lengths.clear()
+        self._bytes = 0
+
+
+_default = None
+
+
+def default_cache():
+    """프로세스 공용 캐시 (디스크: CACHE_DIR) - backtest / backtest_equity 스크립트가 함께 사용"""
+    global _default
+    if _default is None:
+        _default = IndicatorCache(disk_dir=CACHE_DIR)
+    return _default
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["clear"]:
+        removed = 0
+        if os.path.isdir(CACHE_DIR):
+            for fname in os.listdir(CACHE_DIR):
+                os.remove(os.path.join(CACHE_DIR, fname))
+                removed += 1
+        print(f"✅ 디스크 캐시 {removed}개 삭제: {CACHE_DIR}")
+    else:
+        print("사용법: python indicator_cache.py clear")
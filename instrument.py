@@ -0,0 +1,291 @@
+# instrument.py
+# 실시간 루프 계측: 단계별 소요 시간 히스토그램 / 카운터 / 샘플링 프로파일러 / 지표 파일·엔드포인트
+# - with stage("refresh"): ...               단계별 소요 시간 (티커별: stage("handle", ticker))
+# - count("signals.ENTRY")                    카운터
+# - error("refresh", e)                       오류 카운터 + 예외 종류/위치 한 줄 출력
+# - add_source("scheduler", fn)               스냅샷에 같이 넣을 외부 지표 (fn() → dict/list)
+# - maybe_write()                             METRICS_EVERY_SEC 마다 reports/metrics/{이름}.json 저장
+# - serve(port)                               http://127.0.0.1:port/metrics 로 같은 JSON (스레드)
+# - SamplingProfiler                          ms 단위로 주 스레드 스택을 샘플링 → collapsed stack 파일
+#                                             (flamegraph.pl / speedscope 로 볼 수 있음)
+#
+# 꺼져 있으면(LOOP_METRICS=0) stage() 는 미리 만든 빈 컨텍스트를 돌려주고 count() 는 바로 반환
+# → 호출당 1us 미만이라 운영 중에도 켜 둘 수 있음. 켜져 있을 때도 기록은 O(1) (고정 버킷)
+#
+# 환경 변수
+#   LOOP_METRICS=0          계측 끔
+#   LOOP_METRICS_PORT=9108  지표 엔드포인트
+#   LOOP_PROFILE=1          시작부터 샘플링 프로파일러 켬 (SIGUSR1 로 켜고/끄기 가능)
+
+import atexit
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from bisect import bisect_left
+from collections import Counter
+
+ENABLED = os.environ.get("LOOP_METRICS", "1") != "0"
+METRICS_DIR = "reports/metrics"
+METRICS_EVERY_SEC = 60
+PROFILE_INTERVAL_SEC = 0.005   # 샘플링 간격 (5ms)
+
+# 히스토그램 버킷 상한 (초): 10us ~ 100s, 한 자릿수당 4개 (로그 간격)
+BUCKETS = [10 ** (e / 4) for e in range(-20, 9)]
+
+
+class Histogram:
+    """고정 로그 버킷 히스토그램 (분위수는 버킷 상한으로 근사)"""
+
+    __slots__ = ("counts", "n", "total", "min", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, sec):
+        self.counts[bisect_left(BUCKETS, sec)] += 1
+        self.n += 1
+        self.total += sec
+        if sec < self.min:
+            self.min = sec
+        if sec > self.max:
+            self.max = sec
+
+    def quantile(self, q):
+        if not self.n:
+            return 0.0
+        rank = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return min(self.max, BUCKETS[i]) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        if not self.n:
+            return {"n": 0}
+        return {"n": self.n, "mean": self.total / self.n, "min": self.min, "max": self.max,
+                "p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+
+class _Timer:
+    __slots__ = ("reg", "key", "started")
+
+    def __init__(self, reg, key):
+        self.reg = reg
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.reg.observe(self.key, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullTimer()
+
+
+class Registry:
+    def __init__(self, name="run_loop", enabled=ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self.hist = {}        # "단계" 또는 "단계/티커" → Histogram
+        self.counters = Counter()
+        self.sources = {}     # 이름 → fn() (스냅샷 때 호출)
+        self.started = time.time()
+        self._last_write = time.monotonic()
+        self._lock = threading.Lock()   # 엔드포인트 스레드의 스냅샷과 기록이 겹치지 않도록
+
+    def stage(self, name, ticker=None):
+        if not self.enabled:
+            return _NULL
+        return _Timer(self, name if ticker is None else f"{name}/{ticker}")
+
+    def observe(self, key, sec):
+        h = self.hist.get(key)
+        if h is None:
+            with self._lock:
+                h = self.hist.setdefault(key, Histogram())
+        h.record(sec)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def error(self, where, exc, detail=""):
+        """오류 카운터(errors.{where}) + 예외 종류와 발생 위치(마지막 프레임) 한 줄"""
+        self.count(f"errors.{where}")
+        tb = traceback.extract_tb(exc.__traceback__)
+        loc = f" @ {os.path.basename(tb[-1].filename)}:{tb[-1].lineno} {tb[-1].name}" if tb else ""
+        print(f"ERROR: [{where}]{' ' + detail if detail else ''} {type(exc).__name__}: {exc}{loc}")
+
+    def add_source(self, name, fn):
+        self.sources[name] = fn
+
+    def snapshot(self):
+        with self._lock:
+            stages = {k: h.summary() for k, h in sorted(self.hist.items())}
+        out = {"name": self.name, "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+               "uptime_sec": round(time.time() - self.started, 1),
+               "stages": stages, "counters": dict(self.counters)}
+        for name, fn in self.sources.items():
+            try:
+                out[name] = fn()
+            except Exception as e:   # 지표 수집 때문에 루프가 죽지 않도록
+                out[name] = {"error": repr(e)}
+        return out
+
+    def write(self, path=None):
+        """스냅샷을 JSON 으로 저장 (임시 파일 → 교체)"""
+        path = path or os.path.join(METRICS_DIR, f"{self.name}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp, path)
+        return path
+
+    def maybe_write(self, every=METRICS_EVERY_SEC):
+        if not self.enabled or time.monotonic() - self._last_write < every:
+            return None
+        self._last_write = time.monotonic()
+        return self.write()
+
+    def serve(self, port, host="127.0.0.1"):
+        """GET /metrics → 스냅샷 JSON (데몬 스레드, 표준 라이브러리 http.server)"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        reg = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = json.dumps(reg.snapshot(), ensure_ascii=False, default=str).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        return server
+
+
+class SamplingProfiler:
+    """
+    주 스레드 스택을 interval 초마다 샘플링 (sys._current_frames, 별도 스레드)
+    → 함수 스택별 샘플 수. stop() 시 collapsed stack 형식으로 저장 ("a;b;c 횟수")
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_SEC, out_dir=METRICS_DIR):
+        self.interval = interval
+        self.out_dir = out_dir
+        self.samples = Counter()
+        self._target = threading.main_thread().ident
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """샘플링 중지 → 파일 경로 (샘플이 없으면 None)"""
+        if not self.running:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if not self.samples:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, n in self.samples.most_common():
+                f.write(f"{stack} {n}\n")
+        self.samples.clear()
+        return path
+
+    def toggle(self, *_):
+        if self.running:
+            path = self.stop()
+            print(f"[프로파일러] 중지 → {path}")
+        else:
+            self.start()
+            print("[프로파일러] 시작")
+
+
+# ===== 모듈 기본 레지스트리 =====
+METRICS = Registry()
+stage = METRICS.stage
+count = METRICS.count
+error = METRICS.error
+add_source = METRICS.add_source
+maybe_write = METRICS.maybe_write
+
+
+def setup(name=None):
+    """
+    프로세스 시작 시 한 번: 레지스트리 이름 지정, 환경 변수에 따라 엔드포인트/프로파일러 준비
+    반환: SamplingProfiler (SIGUSR1 로 켜고 끔, 종료 시 결과 저장)
+    """
+    if name:
+        METRICS.name = name
+    port = os.environ.get("LOOP_METRICS_PORT")
+    if port and METRICS.enabled:
+        METRICS.serve(int(port))
+        print(f"[지표] http://127.0.0.1:{port}/metrics")
+    profiler = SamplingProfiler()
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, profiler.toggle)
+    if os.environ.get("LOOP_PROFILE") == "1":
+        profiler.start()
+    atexit.register(profiler.stop)
+    if METRICS.enabled:
+        atexit.register(METRICS.write)
+    return profiler
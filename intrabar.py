@@ -0,0 +1,227 @@
+# intrabar.py
+# 하위 봉(분봉) 경로로 체결을 재현하는 백테스트 엔진
+# - backtest_fast.simulate 는 한 봉 안에서 손절/익절이 둘 다 닿으면 무조건 '손절 우선', 진입은 그 봉 종가
+#   → 여기서는 신호 봉(일봉 등) 안의 분봉을 시간순으로 따라가 어느 가격에 먼저, 언제 닿았는지 판정
+# - 신호는 부모 봉 종가에 확정 → 지연(latency) 후 첫 분봉 시가로 체결 (지연 0 이면 부모 봉 종가 그대로)
+# - 고정 SLIP 대신 슬리피지 모델 (고정 비율 / 분봉 변동폭 비례), 손절·익절은 갭이면 분봉 시가로 체결
+# - 부모 봉 → 분봉 구간은 searchsorted 로 한 번 만든 색인으로 조회 (DataFrame 슬라이싱 없음)
+# - 분봉이 비어 있는 구간은 판정할 수 없으므로 그다음 분봉에서 판정
+# - 마지막 부모 봉 마감 뒤의 분봉(분봉 이력이 더 최신일 때)은 쓰지 않음
+# - 같은 분봉 안에서 둘 다 닿으면 손절 우선 (분봉보다 세밀한 순서는 알 수 없음)
+#
+# 사용 예)
+#   python intrabar.py KRW-XRP day minute1     # candle_store 이력으로 봉 단위 엔진과 비교
+
+import sys
+
+import numpy as np
+
+from backtest_fast import _first_hit, _price_array
+from backtest_equity import FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH
+from candle_store import INTERVAL_SEC
+
+NS = 1_000_000_000
+
+
+# ===== 지연 모델 (초) =====
+class FixedLatency:
+    def __init__(self, sec=0.0):
+        self.sec = sec
+
+    def __call__(self):
+        return self.sec
+
+
+class JitterLatency:
+    """mean ± jitter 초 균등분포 (seed 고정 → 재현 가능)"""
+
+    def __init__(self, mean=1.0, jitter=0.5, seed=0):
+        self.mean = mean
+        self.jitter = jitter
+        self._rng = np.random.default_rng(seed)
+
+    def __call__(self):
+        return max(0.0, self.mean + self._rng.uniform(-self.jitter, self.jitter))
+
+
+# ===== 슬리피지 모델 (체결가 대비 비율) =====
+class FixedSlippage:
+    def __init__(self, pct=SLIP):
+        self.pct = pct
+
+    def __call__(self, price, high, low):
+        return self.pct
+
+
+class RangeSlippage:
+    """base + k × (체결 분봉 고가-저가)/가격 → 변동이 큰 분봉일수록 불리하게 체결"""
+
+    def __init__(self, base=0.0002, k=0.5, cap=0.01):
+        self.base = base
+        self.k = k
+        self.cap = cap
+
+    def __call__(self, price, high, low):
+        return min(self.cap, self.base + self.k * (high - low) / price)
+
+
+# ===== 색인 =====
+def _as_ns(ts):
+    """int64(ns) 또는 datetime64(단위 무관) 배열 → int64 ns"""
+    ts = np.asarray(ts)
+    if np.issubdtype(ts.dtype, np.datetime64):
+        return ts.astype("datetime64[ns]").view(np.int64)
+    return ts.astype(np.int64, copy=False)
+
+
+class SubBarIndex:
+    """
+    부모 봉 ↔ 하위 봉 색인 (시각 = 봉 시작, int64 ns 또는 datetime64)
+       - start[k] : 부모 봉 k 의 첫 하위 봉 위치 (start[n] = 하위 봉 개수)
+       - close_ts[k] : 부모 봉 k 의 마감 시각 (신호 확정 시각)
+    """
+
+    def __init__(self, parent_ts, sub_ts, sub_open, sub_high, sub_low, interval):
+        self.parent_ts = _as_ns(parent_ts)
+        self.sub_ts = _as_ns(sub_ts)
+        self.open = _price_array(sub_open)
+        self.high = _price_array(sub_high)
+        self.low = _price_array(sub_low)
+        self.close_ts = self.parent_ts + int(INTERVAL_SEC[interval]) * NS
+        self.start = np.searchsorted(self.sub_ts, np.append(self.parent_ts, self.close_ts[-1]))
+
+    @classmethod
+    def from_history(cls, parent, sub, interval):
+        """history.History 두 개(부모 봉, 하위 봉)로 색인 생성 (memmap 그대로 사용)"""
+        return cls(parent.ts, sub.ts, sub.open, sub.high, sub.low, interval)
+
+    def minute_at(self, ts):
+        """ts 이후(포함) 첫 하위 봉 위치"""
+        return int(np.searchsorted(self.sub_ts, ts))
+
+    def parent_of(self, m):
+        """하위 봉 m 이 속한 부모 봉"""
+        return int(np.searchsorted(self.start, m, side="right")) - 1
+
+    def coverage(self):
+        """하위 봉이 하나라도 있는 부모 봉 비율"""
+        return float(np.mean(np.diff(self.start) > 0))
+
+
+# ===== 시뮬레이션 =====
+def simulate_intrabar(close, entry, exit_, index, fee=FEE, stop_pct=STOP_PCT, take_pct=TAKE_PCT,
+                      init_cash=INIT_CASH, slippage=None, latency=None, gap_fill=True):
+    """
+    반환: (equity, trades)
+       - equity : 부모 봉별 평가자산 (float64)
+       - trades : [(진입 봉, 청산 봉, 매수 체결가, 매도 체결가, 사유, 진입 시각 ns, 청산 시각 ns), ...]
+                  앞 5개 항목은 backtest_fast.simulate 와 같은 형식 (미청산: 청산 봉 -1, 매도가 nan)
+    지연은 부모 봉 길이보다 짧다고 가정
+    """
+    slippage = slippage or FixedSlippage()
+    latency = latency or FixedLatency()
+    close = _price_array(close)
+    entry_idx = np.flatnonzero(np.asarray(entry, dtype=bool))
+    exit_idx = np.flatnonzero(np.asarray(exit_, dtype=bool))
+    n = len(close)
+    n_sub = int(index.start[-1])   # 마지막 부모 봉 마감 전까지의 하위 봉만 사용
+    equity = np.empty(n, dtype=np.float64)
+    trades = []
+
+    def execute(k):
+        """부모 봉 k 종가 신호의 체결 → (기준가, 체결 부모 봉, 체결 분봉 위치, 체결 시각, 슬리피지 비율)"""
+        lat = latency()
+        ts = int(index.close_ts[k]) + int(lat * NS)
+        m = index.minute_at(ts)
+        if lat <= 0 or m >= n_sub:
+            # 지연 없음(또는 분봉 끝) → 부모 봉 종가 체결, 다음 분봉부터 판정
+            px = float(close[k])
+            return px, k, min(m, n_sub), ts, slippage(px, px, px)
+        px = float(index.open[m])
+        return px, index.parent_of(m), m, int(index.sub_ts[m]), \
+            slippage(px, float(index.high[m]), float(index.low[m]))
+
+    cash = float(init_cash)
+    i = 0
+    while i < n:
+        # === 매수 ===
+        q = int(np.searchsorted(entry_idx, i))
+        if q >= len(entry_idx):
+            break
+        k = int(entry_idx[q])
+        px, fb, scan_from, entry_ts, slip = execute(k)
+        equity[i:fb] = cash
+        buy_price = px * (1 + fee + slip)
+        coin = cash / buy_price
+        stop_lvl = buy_price * (1 - stop_pct)
+        take_lvl = buy_price * (1 + take_pct)
+
+        # === 청산: 다음 Exit 신호 체결 전까지 분봉 경로에서 손절/익절 먼저 닿은 곳 ===
+        r = int(np.searchsorted(exit_idx, k, side="right"))
+        sig = execute(int(exit_idx[r])) if r < len(exit_idx) else None
+        scan_to = sig[2] if sig is not None else n_sub
+        h = _first_hit(index.low, index.high, stop_lvl, take_lvl, scan_from, scan_to)
+
+        if h >= 0:
+            lo, hi, op = float(index.low[h]), float(index.high[h]), float(index.open[h])
+            if lo <= stop_lvl:
+                fill = min(op, stop_lvl) if gap_fill else stop_lvl
+                sell_price = fill * (1 - fee - slippage(fill, hi, lo))
+                reason = "stop"
+            else:
+                fill = max(op, take_lvl) if gap_fill else take_lvl
+                sell_price = fill * (1 - fee - slippage(fill, hi, lo))
+                reason = "take"
+            xb, exit_ts = index.parent_of(h), int(index.sub_ts[h])
+        elif sig is not None:
+            spx, xb, _, exit_ts, slip = sig
+            sell_price = spx * (1 - fee - slip)
+            reason = "signal"
+        else:
+            np.multiply(close[fb:], coin, out=equity[fb:], dtype=np.float64)
+            trades.append((k, -1, buy_price, np.nan, "open", entry_ts, -1))
+            cash = 0.0
+            i = n
+            break
+
+        xb = max(xb, fb)
+        np.multiply(close[fb:xb], coin, out=equity[fb:xb], dtype=np.float64)
+        cash = coin * sell_price
+        equity[xb] = cash
+        trades.append((k, xb, buy_price, sell_price, reason, entry_ts, exit_ts))
+        i = xb + 1
+
+    if i < n:
+        equity[i:] = cash
+    return equity, trades
+
+
+def compare(ticker, parent_interval="day", sub_interval="minute1"):
+    """봉 단위 엔진(손절 우선 규칙) vs 분봉 재현 엔진 결과 비교 출력"""
+    from history import open_history
+    from backtest_fast import simulate
+    from backtest_equity import strategy_signals
+
+    parent = open_history(ticker, parent_interval)
+    sub = open_history(ticker, sub_interval)
+    index = SubBarIndex.from_history(parent, sub, parent_interval)
+    entry, exit_ = strategy_signals(parent.close)
+
+    base_eq, base_trades = simulate(parent.close, parent.high, parent.low, entry, exit_,
+                                    FEE, SLIP, STOP_PCT, TAKE_PCT, INIT_CASH)
+    intra_eq, intra_trades = simulate_intrabar(parent.close, entry, exit_, index,
+                                               slippage=RangeSlippage(), latency=FixedLatency(1.0))
+    print(f"=== {ticker} {parent_interval} (하위 봉 {sub_interval}, 커버리지 {index.coverage()*100:.1f}%) ===")
+    for name, eq, tr in (("봉 단위", base_eq, base_trades), ("분봉 재현", intra_eq, intra_trades)):
+        reasons = {}
+        for t in tr:
+            reasons[t[4]] = reasons.get(t[4], 0) + 1
+        print(f"  {name:<6} 수익률 {(eq[-1] / INIT_CASH - 1)*100:+.2f}%  거래 {len(tr)}회  {reasons}")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print("사용법: python intrabar.py 티커 [부모 interval] [하위 interval]")
+    else:
+        compare(*args)
@@ -0,0 +1,213 @@
+# live_indicators.py
+# 실시간 루프용 증분 지표 엔진
+# - EMA12/EMA26/MACD/Signal/Hist : backtest.calc_macd 의 ewm(adjust=False) 와 같은 점화식
+#   (adjust=True 면 alert_macd.calc_macd 의 기본 ewm 과 같은 가중 평균)
+# - SMA : 링버퍼 + 누적합 (backtest.calc_sma 의 rolling(window, min_periods=1) 과 동일)
+# - 과거 이력으로 한 번 시드한 뒤, 새 봉/갱신된 봉마다 O(1) 로 갱신
+# - 같은 키(진행 중인 마지막 봉)가 다시 들어오면 직전 봉까지의 상태에서 다시 계산해 덮어씀
+# - to_state / from_state : JSON 으로 저장 가능한 상태 (재시작 시 이력 재계산 없이 이어서 갱신)
+
+import math
+
+
+def _ema_next(state, x, a, adjust):
+    """EMA 한 단계 → (새 상태, 값). adjust=True 면 상태 = (가중합, 가중치합)"""
+    if adjust:
+        if state is None:
+            num, den = x, 1.0
+        else:
+            num = x + (1 - a) * state[0]
+            den = 1.0 + (1 - a) * state[1]
+        return (num, den), num / den
+    if state is None:
+        # ewm(adjust=False) 의 첫 값은 입력값 그대로
+        return x, x
+    v = (1 - a) * state + a * x
+    return v, v
+
+
+def _as_tuple(st):
+    """JSON 왕복으로 list 가 된 상태를 tuple 로 되돌림"""
+    if isinstance(st, list):
+        return tuple(_as_tuple(x) for x in st)
+    return st
+
+
+class LiveSma:
+    """rolling(window, min_periods).mean() 과 같은 값을 내는 링버퍼 이동평균"""
+
+    def __init__(self, window, min_periods=1):
+        self.window = window
+        self.min_periods = min_periods
+        self.reset()
+
+    def reset(self):
+        self._buf = [0.0] * self.window
+        self._pos = 0          # 다음에 쓸 위치
+        self._count = 0        # 버퍼에 들어있는 값 개수 (최대 window)
+        self._sum = 0.0
+        self._since_resync = 0
+        self.prev_value = math.nan   # 마지막 값 직전 봉의 평균
+
+    @property
+    def value(self):
+        if self._count < self.min_periods or self._count == 0:
+            return math.nan
+        return self._sum / self._count
+
+    def append(self, x):
+        self.prev_value = self.value
+        w = self.window
+        if self._count == w:
+            self._sum -= self._buf[self._pos]
+        else:
+            self._count += 1
+        self._buf[self._pos] = x
+        self._sum += x
+        self._pos = (self._pos + 1) % w
+        # 누적합 오차가 쌓이지 않도록 window 개마다 한 번 정확히 다시 합산 (분할상환 O(1))
+        self._since_resync += 1
+        if self._since_resync >= w:
+            self._resync()
+
+    def replace_last(self, x):
+        last = (self._pos - 1) % self.window
+        self._sum += x - self._buf[last]
+        self._buf[last] = x
+
+    def _resync(self):
+        if self._count == self.window:
+            self._sum = math.fsum(self._buf)
+        else:
+            self._sum = math.fsum(self._buf[:self._count])
+        self._since_resync = 0
+
+    def to_state(self):
+        return {"window": self.window, "min_periods": self.min_periods, "buf": list(self._buf),
+                "pos": self._pos, "count": self._count, "sum": self._sum,
+                "since_resync": self._since_resync, "prev_value": self.prev_value}
+
+    @classmethod
+    def from_state(cls, state):
+        sma = cls(state["window"], state["min_periods"])
+        if len(state["buf"]) != sma.window:
+            raise ValueError("SMA 상태의 버퍼 길이가 window 와 다릅니다.")
+        sma._buf = [float(x) for x in state["buf"]]
+        sma._pos = state["pos"]
+        sma._count = state["count"]
+        sma._sum = state["sum"]
+        sma._since_resync = state["since_resync"]
+        sma.prev_value = state["prev_value"]
+        return sma
+
+
+class LiveMacd:
+    def __init__(self, short=12, long=26, signal=9, sma_window=200, adjust=False, sma_min_periods=1):
+        self.short = short
+        self.long = long
+        self.signal = signal
+        self.sma_window = sma_window
+        self.adjust = adjust
+        self._a_short = 2.0 / (short + 1)
+        self._a_long = 2.0 / (long + 1)
+        self._a_signal = 2.0 / (signal + 1)
+        self._sma = LiveSma(sma_window, sma_min_periods)
+        self.reset()
+
+    def reset(self):
+        self._sma.reset()
+        # 상태: (ema_short 상태, ema_long 상태, signal 상태, ema_short, ema_long, signal, hist)
+        self._prev = None      # 마지막 봉 직전까지 반영된 상태
+        self._cur = None       # 마지막 봉까지 반영된 상태
+        self.last_key = None
+        self.last_close = None
+        self.bars = 0
+
+    # ===== 내부 계산 =====
+    def _step(self, base, close):
+        adj = self.adjust
+        s_st, ema_s = _ema_next(base and base[0], close, self._a_short, adj)
+        l_st, ema_l = _ema_next(base and base[1], close, self._a_long, adj)
+        macd = ema_s - ema_l
+        g_st, sig = _ema_next(base and base[2], macd, self._a_signal, adj)
+        return (s_st, l_st, g_st, ema_s, ema_l, sig, macd - sig)
+
+    # ===== 공개 API =====
+    def seed(self, df, col="Close"):
+        """DataFrame(index=날짜) 전체 이력으로 상태 초기화"""
+        self.reset()
+        for key, close in zip(df.index, df[col].to_numpy(dtype=float)):
+            self.update(key, close)
+        return self
+
+    def update(self, key, close):
+        """
+        새 봉(key 증가)이면 추가, 같은 key 면 마지막 봉을 교체, 더 과거 key 는 무시.
+        반환: 최신 스냅샷(dict)
+        """
+        close = float(close)
+        if self.last_key is not None and key < self.last_key:
+            return self.snapshot()
+
+        if self.last_key is not None and key == self.last_key:
+            self._cur = self._step(self._prev, close)
+            self._sma.replace_last(close)
+        else:
+            self._prev = self._cur
+            self._cur = self._step(self._prev, close)
+            self._sma.append(close)
+            self.bars += 1
+
+        self.last_key = key
+        self.last_close = close
+        return self.snapshot()
+
+    def to_state(self):
+        """
+        재시작용 상태 dict (JSON 직렬화 가능한 값만, 단 last_key 는 받은 그대로)
+        봉 마감 직전 상태(_prev)까지 포함 → 복원 후 진행 중인 봉을 update 로 계속 교체 가능
+        """
+        return {
+            "params": [self.short, self.long, self.signal, self.sma_window, self.adjust,
+                       self._sma.min_periods],
+            "prev": self._prev, "cur": self._cur,
+            "last_key": self.last_key, "last_close": self.last_close, "bars": self.bars,
+            "sma": self._sma.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        engine = cls(*state["params"])
+        engine._prev = _as_tuple(state["prev"])
+        engine._cur = _as_tuple(state["cur"])
+        engine.last_key = state["last_key"]
+        engine.last_close = state["last_close"]
+        engine.bars = state["bars"]
+        engine._sma = LiveSma.from_state(state["sma"])
+        return engine
+
+    def snapshot(self):
+        """macd_with_ma_filter 의 마지막 행과 같은 형태의 dict"""
+        if self._cur is None:
+            return None
+        ema_s, ema_l, sig, hist = self._cur[3:]
+        sma = self._sma.value
+        prev_diff = self._prev[6] if self._prev is not None else math.nan
+        golden = (prev_diff <= 0) and (hist > 0)
+        dead = (prev_diff >= 0) and (hist < 0)
+        return {
+            "Date": self.last_key,
+            "Close": self.last_close,
+            "EMA12": ema_s,
+            "EMA26": ema_l,
+            "MACD": ema_s - ema_l,
+            "Signal": sig,
+            "Hist": hist,
+            "Prev_Hist": prev_diff,
+            f"SMA{self.sma_window}": sma,
+            f"Prev_SMA{self.sma_window}": self._sma.prev_value,
+            "GoldenCross": golden,
+            "DeadCross": dead,
+            "Entry": golden and (self.last_close > sma),
+            "Exit": dead,
+        }
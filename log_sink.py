@@ -0,0 +1,115 @@
+# log_sink.py
+# reports/logs 용 버퍼링 로그 기록기
+# - 티커별 파일 핸들을 열어둔 채로 행을 모아 두었다가 행 수/시간 기준으로 한 번에 기록
+# - 날짜가 바뀌면 그 티커의 이전 날짜 파일을 닫고 새 파일로 회전
+# - 선택: gzip 압축(.csv.gz, 이어쓰기 가능한 멀티 멤버), flush 때마다 fsync
+# - 크래시 시 잃을 수 있는 행은 최대 FLUSH_ROWS 행 / FLUSH_SEC 초 분량 (둘 다 0 이면 매 행 기록)
+#   (시간 기준은 write 때만 확인 → 주기적으로 쓰는 쪽은 사이클 끝에 flush() 호출, run_loop 참고)
+
+import atexit
+import gzip
+import os
+import time
+
+LOG_DIR = "reports/logs"
+HEADER = "timestamp,ticker,price,state\n"
+FLUSH_ROWS = 500      # 버퍼에 이만큼 쌓이면 기록
+FLUSH_SEC = 5.0       # 마지막 기록 후 이만큼 지나면 기록
+FSYNC = False         # True 면 기록할 때마다 디스크까지 동기화 (전원 차단 대비)
+COMPRESS = False      # True 면 signals_YYYY-MM-DD.csv.gz
+
+
+class LogSink:
+    def __init__(self, root=LOG_DIR, flush_rows=FLUSH_ROWS, flush_sec=FLUSH_SEC,
+                 fsync=FSYNC, compress=COMPRESS):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.fsync = fsync
+        self.compress = compress
+        self._pending = {}      # 경로 → [행 문자열, ...]
+        self._pending_rows = 0
+        self._handles = {}      # 경로 → 열린 파일
+        self._day_of = {}       # 티커 → 현재 열려 있는 날짜
+        self._last_flush = time.monotonic()
+        self._closed = False
+        atexit.register(self.close)
+
+    def path_for(self, ticker, day_str):
+        ext = ".csv.gz" if self.compress else ".csv"
+        return os.path.join(self.root, ticker, f"signals_{day_str}{ext}")
+
+    def write(self, ts, ticker, price, state):
+        day_str = ts.strftime("%Y-%m-%d")
+        if self._day_of.get(ticker) != day_str:
+            self._rotate(ticker, day_str)
+        path = self.path_for(ticker, day_str)
+        self._pending.setdefault(path, []).append(
+            f"{ts.strftime('%Y-%m-%d %H:%M:%S')},{ticker},{price},{state}\n"
+        )
+        self._pending_rows += 1
+        if (self._pending_rows >= self.flush_rows
+                or time.monotonic() - self._last_flush >= self.flush_sec):
+            self.flush()
+
+    def _rotate(self, ticker, day_str):
+        """티커의 이전 날짜 파일: 남은 행 기록 후 닫기"""
+        old = self._day_of.get(ticker)
+        if old is not None:
+            path = self.path_for(ticker, old)
+            self._flush_path(path)
+            f = self._handles.pop(path, None)
+            if f is not None:
+                f.close()
+        self._day_of[ticker] = day_str
+
+    def _handle(self, path):
+        f = self._handles.get(path)
+        if f is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            header_needed = not os.path.exists(path) or os.path.getsize(path) == 0
+            if self.compress:
+                f = gzip.open(path, "at", encoding="utf-8")
+            else:
+                f = open(path, "a", encoding="utf-8")
+            if header_needed:
+                f.write(HEADER)
+            self._handles[path] = f
+        return f
+
+    def _flush_path(self, path):
+        rows = self._pending.pop(path, None)
+        if not rows:
+            return
+        f = self._handle(path)
+        f.write("".join(rows))
+        if self.compress:
+            f.close()   # gzip 은 멤버를 닫아야 내용이 온전히 남음 → 다음 기록 때 다시 열어 이어씀
+            self._handles.pop(path, None)
+        else:
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._pending_rows -= len(rows)
+
+    def flush(self):
+        for path in list(self._pending):
+            self._flush_path(path)
+        self._pending_rows = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        for f in self._handles.values():
+            f.close()
+        self._handles.clear()
+        self._closed = True
+
+
+def open_log(path):
+    """압축 여부에 맞춰 로그 파일을 텍스트로 열기"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
@@ -1,56 +1,73 @@
 # make_daily_report.py
-# daily_summary.csv + 생성된 차트들을 한 장의 리포트 PNG/PDF로 합치기
+# daily_summary.csv 로 티커별 한 장짜리 리포트 PNG/PDF 만들기
+# - 패널은 PNG 를 다시 읽어 붙이지 않고 데이터로 직접 그림 (종가 추이 / 일일 변동 / ENTRY·EXIT 횟수)
+# - 티커 데이터가 지난번과 같으면 건너뜀 (report_deps manifest)
+# - 프로세스별 Figure 재사용, --workers N 이면 티커를 여러 프로세스로 나눠 그림
+# - matplotlib 은 그릴 티커가 있을 때만 import (make_report 와 같음)
+#
+# 사용 예)
+#   python make_daily_report.py                 # 바뀐 티커만
+#   python make_daily_report.py --force         # 전부 다시
+#   python make_daily_report.py --workers 4
 
 import os
-import csv
-from datetime import datetime
-import matplotlib.pyplot as plt
-import matplotlib.gridspec as gridspec
-
-SUMMARY_CSV = "reports/daily_summary.csv"
-PRICE_CURVE = "reports/summary_price_curve.png"
-CHANGE_BARS = "reports/summary_change_bars.png"
-COMBO_CHART = "reports/price_with_combo.png"   # 있으면 썸네일로 넣음(선택)
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from make_report import read_summary, group_by_ticker, rows_key, draw_price, draw_change
+from report_deps import Manifest
+import summary_io
+
+SUMMARY_CSV = summary_io.SUMMARY_CSV
 OUT_PNG     = "reports/daily_report.png"
 OUT_PDF     = "reports/daily_report.pdf"
+TICKER_DIR  = "reports/tickers"
+SAVE_PDF    = True
+
+_fig = None
 
 def read_summary_rows(path=SUMMARY_CSV):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"{path}가 없습니다. run_loop.py가 하루 이상 돌아간 뒤 생성됩니다.")
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rows.append({
-                "date": datetime.strptime(row["date"], "%Y-%m-%d"),
-                "ticker": row["ticker"],
-                "open": float(row["open"]),
-                "high": float(row["high"]),
-                "low": float(row["low"]),
-                "close": float(row["close"]),
-                "entry_count": int(row["entry_count"]),
-                "exit_count": int(row["exit_count"]),
-            })
-    rows.sort(key=lambda x: x["date"])
-    return rows
+    return read_summary(path)
 
 def latest_summary(rows):
-    return rows[-1] if rows else None
+    return rows.row(-1) if len(rows) else None
+
+def report_paths(ticker, single):
+    if single:
+        png, pdf = OUT_PNG, OUT_PDF
+    else:
+        d = os.path.join(TICKER_DIR, ticker)
+        png, pdf = os.path.join(d, "daily_report.png"), os.path.join(d, "daily_report.pdf")
+    return (png, pdf) if SAVE_PDF else (png,)
 
-def build_report():
-    rows = read_summary_rows()
+def draw_signals(ax, dates, entries, exits):
+    ax.vlines(dates, 0, entries, linewidth=1.5, label="ENTRY", color="green")
+    ax.vlines(dates, 0, -exits, linewidth=1.5, label="EXIT", color="red")
+    ax.axhline(0, color="gray", linewidth=0.5)
+    ax.set_title("ENTRY / EXIT count")
+    ax.legend()
+
+def _figure():
+    global _fig
+    if _fig is None:
+        from matplotlib.figure import Figure
+        _fig = Figure(figsize=(11.7, 8.3), dpi=150)  # A4 가로 비슷한 비율
+    else:
+        _fig.clf()
+    return _fig
+
+def render_report(ticker, rows, outs):
+    """티커 한 개 리포트 → outs 경로들에 저장"""
     last = latest_summary(rows)
-    if not last:
-        raise RuntimeError("daily_summary.csv에 데이터가 없습니다.")
+    dates = rows["date"]
 
-    # 리포트 캔버스 레이아웃
-    fig = plt.figure(figsize=(11.7, 8.3), dpi=150)  # A4 가로 비슷한 비율
-    gs = gridspec.GridSpec(3, 4, figure=fig, wspace=0.5, hspace=0.6)
+    fig = _figure()
+    gs = fig.add_gridspec(3, 4, wspace=0.5, hspace=0.6)
 
     # (1) 헤더 / 요약 박스
     ax1 = fig.add_subplot(gs[0, :])
     ax1.axis("off")
-    title = f"Daily Report - {last['ticker']}  ({last['date'].strftime('%Y-%m-%d')})"
+    title = f"Daily Report - {ticker}  ({last['date'].strftime('%Y-%m-%d')})"
     stats = (
         f"Open: {last['open']:.0f}   High: {last['high']:.0f}   "
         f"Low: {last['low']:.0f}   Close: {last['close']:.0f}   "
@@ -61,48 +78,52 @@ def build_report():
     ax1.text(0.01, 0.35, stats, fontsize=12, va="top")
 
     # (2) 좌측 큰 패널: 종가 추이
-    ax2 = fig.add_subplot(gs[1:, :2])
-    if os.path.exists(PRICE_CURVE):
-        img = plt.imread(PRICE_CURVE)
-        ax2.imshow(img)
-        ax2.axis("off")
-        ax2.set_title("Daily Close Curve", pad=6)
-    else:
-        ax2.text(0.5, 0.5, "summary_price_curve.png 없음", ha="center", va="center")
-        ax2.axis("off")
-
+    draw_price(fig.add_subplot(gs[1:, :2]), dates, rows["close"])
     # (3) 우측 상단: 일일 변동 막대
-    ax3 = fig.add_subplot(gs[1, 2:])
-    if os.path.exists(CHANGE_BARS):
-        img = plt.imread(CHANGE_BARS)
-        ax3.imshow(img)
-        ax3.axis("off")
-        ax3.set_title("Daily Change (Close - Open)", pad=6)
-    else:
-        ax3.text(0.5, 0.5, "summary_change_bars.png 없음", ha="center", va="center")
-        ax3.axis("off")
-
-    # (4) 우측 하단: 콤보 차트 썸네일(선택)
-    ax4 = fig.add_subplot(gs[2, 2:])
-    if os.path.exists(COMBO_CHART):
-        img = plt.imread(COMBO_CHART)
-        ax4.imshow(img)
-        ax4.axis("off")
-        ax4.set_title("Price + SMA200 with MACD Entries/Exits", pad=6)
-    else:
-        ax4.text(0.5, 0.5, "price_with_combo.png 없음(선택)", ha="center", va="center")
-        ax4.axis("off")
+    draw_change(fig.add_subplot(gs[1, 2:]), dates, rows["close"] - rows["open"])
+    # (4) 우측 하단: ENTRY/EXIT 횟수
+    draw_signals(fig.add_subplot(gs[2, 2:]), dates, rows["entry_count"], rows["exit_count"])
+
+    os.makedirs(os.path.dirname(outs[0]) or ".", exist_ok=True)
+    for out in outs:
+        fig.savefig(out)
+    return outs
+
+def _render_job(job):
+    ticker, rows, outs = job
+    return render_report(ticker, rows, outs)
 
-    # 저장
-    os.makedirs("reports", exist_ok=True)
-    fig.suptitle("", y=0.99)  # 기본 여백 조절
-    plt.tight_layout()
-    fig.savefig(OUT_PNG)
-    fig.savefig(OUT_PDF)
-    plt.close(fig)
+def build_report(force=False, workers=1, path=SUMMARY_CSV):
+    """바뀐 티커만 리포트 생성. 반환: (생성 티커 수, 건너뛴 티커 수)"""
+    groups = group_by_ticker(read_summary_rows(path))
+    if not groups:
+        raise RuntimeError("daily_summary.csv에 데이터가 없습니다.")
+
+    manifest = Manifest()
+    single = len(groups) == 1
+    jobs, keys = [], {}
+    for ticker, rows in groups.items():
+        outs = report_paths(ticker, single)
+        key = rows_key(rows, "daily_report", SAVE_PDF)
+        if not force and manifest.fresh(outs, key):
+            continue
+        jobs.append((ticker, rows, outs))
+        keys[outs] = key
+
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            done = list(pool.map(_render_job, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        done = [_render_job(job) for job in jobs]
 
-    print(f"✅ 리포트 저장: {OUT_PNG}")
-    print(f"✅ 리포트 저장: {OUT_PDF}")
+    for outs in done:
+        manifest.mark(outs, keys[outs])
+        print(f"✅ 리포트 저장: {', '.join(outs)}")
+    manifest.save()
+    return len(done), len(groups) - len(done)
 
 if __name__ == "__main__":
-    build_report()
+    args = sys.argv[1:]
+    workers = int(args[args.index("--workers") + 1]) if "--workers" in args else 1
+    drawn, skipped = build_report(force="--force" in args, workers=workers)
+    print(f"리포트: {drawn}개 티커 생성 / {skipped}개 티커 변경 없음")
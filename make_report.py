@@ -3,68 +3,108 @@
 # 1) 날짜별 종가 라인차트
 # 2) 일일 변동(종가-시가) 막대 차트
 # 를 reports/ 아래 PNG로 저장
+# - 티커가 여러 개면 티커별로 reports/tickers/{티커}/ 아래에 저장
+# - 티커 데이터가 지난번과 같으면 다시 그리지 않음 (report_deps manifest)
+# - 요약 CSV 는 summary_io 로 열 단위 배열로 읽음
+# - Figure 를 직접 만들어 재사용 (pyplot 전역 상태/GUI 백엔드 사용 안 함)
+# - matplotlib 은 실제로 그릴 티커가 있을 때 처음 import → 바뀐 게 없는 실행은 matplotlib 없이 끝남
 
 import os
-import csv
-from datetime import datetime
-import matplotlib.pyplot as plt
-
-SUMMARY_CSV = "reports/daily_summary.csv"
-
-def read_summary(path=SUMMARY_CSV):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"{path}가 없습니다. run_loop.py가 하루 이상 돌아간 뒤에 생성됩니다.")
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            # date,ticker,open,high,low,close,entry_count,exit_count
-            rows.append({
-                "date": datetime.strptime(r["date"], "%Y-%m-%d"),
-                "ticker": r["ticker"],
-                "open": float(r["open"]),
-                "high": float(r["high"]),
-                "low": float(r["low"]),
-                "close": float(r["close"]),
-                "entry_count": int(r["entry_count"]),
-                "exit_count": int(r["exit_count"]),
-            })
-    rows.sort(key=lambda x: x["date"])
-    return rows
-
-def save_price_curve(rows, out_path="reports/summary_price_curve.png"):
-    dates  = [r["date"]  for r in rows]
-    closes = [r["close"] for r in rows]
-
-    plt.figure()
-    plt.plot(dates, closes, label="Close")
-    plt.title("Daily Close")
-    plt.xlabel("Date")
-    plt.ylabel("Price")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
-    plt.close()
+import sys
+
+import summary_io
+from report_deps import Manifest, digest
+
+SUMMARY_CSV = summary_io.SUMMARY_CSV
+PRICE_CURVE = "reports/summary_price_curve.png"
+CHANGE_BARS = "reports/summary_change_bars.png"
+TICKER_DIR = "reports/tickers"
+RENDER_VERSION = 2     # 그리는 방식이 바뀌면 올림 → 모든 차트 다시 그림
+
+_fig = None
+
+def read_summary(path=SUMMARY_CSV, tickers=None, start=None, end=None):
+    """날짜순 열 단위 Table (summary_io.read_summary)"""
+    return summary_io.read_summary(path, tickers, start, end)
+
+def group_by_ticker(table):
+    return table.group_by("ticker")
+
+def rows_key(table, *extra):
+    """티커 행들의 내용 해시 (산출물 재사용 판단용)"""
+    return digest(RENDER_VERSION, *extra, *(table[c] for c in table.columns))
+
+def chart_paths(ticker, single):
+    if single:
+        return PRICE_CURVE, CHANGE_BARS
+    d = os.path.join(TICKER_DIR, ticker)
+    return os.path.join(d, "summary_price_curve.png"), os.path.join(d, "summary_change_bars.png")
+
+# ===== 패널 (Axes 에 직접 그림 → make_daily_report 에서도 재사용) =====
+def draw_price(ax, dates, closes):
+    ax.plot(dates, closes, label="Close")
+    ax.set_title("Daily Close")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Price")
+    ax.legend()
+
+def draw_change(ax, dates, changes):
+    # 막대(Rectangle) 수백 개 대신 선 묶음 하나로 그림 → 그리기/저장 시간이 봉 수에 거의 무관
+    ax.vlines(dates, 0, changes, linewidth=1.5, label="Close - Open")
+    ax.axhline(0, color="gray", linewidth=0.5)
+    ax.set_title("Daily Change (Close - Open)")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Change")
+    ax.legend()
+
+def _figure():
+    """프로세스마다 Figure 하나를 지워가며 재사용"""
+    global _fig
+    if _fig is None:
+        from matplotlib.figure import Figure
+        _fig = Figure()
+    else:
+        _fig.clf()
+    return _fig
+
+def _save(fig, out_path):
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    fig.tight_layout()
+    fig.savefig(out_path, dpi=150)
+
+def save_price_curve(rows, out_path=PRICE_CURVE):
+    fig = _figure()
+    draw_price(fig.add_subplot(), rows["date"], rows["close"])
+    _save(fig, out_path)
     print(f"✅ 저장: {out_path}")
 
-def save_change_bars(rows, out_path="reports/summary_change_bars.png"):
-    dates   = [r["date"] for r in rows]
-    changes = [r["close"] - r["open"] for r in rows]
-
-    plt.figure()
-    plt.bar(dates, changes, label="Close - Open")
-    plt.title("Daily Change (Close - Open)")
-    plt.xlabel("Date")
-    plt.ylabel("Change")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=150)
-    plt.close()
+def save_change_bars(rows, out_path=CHANGE_BARS):
+    fig = _figure()
+    draw_change(fig.add_subplot(), rows["date"], rows["close"] - rows["open"])
+    _save(fig, out_path)
     print(f"✅ 저장: {out_path}")
 
-if __name__ == "__main__":
-    rows = read_summary()
-    if len(rows) < 1:
+def render_charts(force=False, path=SUMMARY_CSV):
+    """티커별 차트 2장 - 데이터가 바뀐 티커만 다시 그림. 반환: (그린 티커 수, 건너뛴 티커 수)"""
+    groups = group_by_ticker(read_summary(path))
+    if not groups:
         raise RuntimeError("daily_summary.csv에 데이터가 없습니다.")
-    save_price_curve(rows)
-    save_change_bars(rows)
+    manifest = Manifest()
+    single = len(groups) == 1
+    drawn = skipped = 0
+    for ticker, rows in groups.items():
+        outs = chart_paths(ticker, single)
+        key = rows_key(rows, "charts")
+        if not force and manifest.fresh(outs, key):
+            skipped += 1
+            continue
+        save_price_curve(rows, outs[0])
+        save_change_bars(rows, outs[1])
+        manifest.mark(outs, key)
+        drawn += 1
+    manifest.save()
+    return drawn, skipped
+
+if __name__ == "__main__":
+    drawn, skipped = render_charts(force="--force" in sys.argv[1:])
+    print(f"차트: {drawn}개 티커 생성 / {skipped}개 티커 변경 없음")
@@ -0,0 +1,234 @@
+# market_data.py
+# 비동기 시세 클라이언트
+# - UpbitClient  : pyupbit 호출을 스레드로 돌리고, 요청 제한(토큰 버킷)/동시성 제한/타임아웃/재시도(지수 백오프) 적용
+# - ReplayClient : data/replay/{티커}_{interval}.csv 에서 봉을 읽어 같은 인터페이스로 제공 (거래소 없이 실행/벤치마크)
+# 두 클라이언트 모두 get_ohlcv 는 pyupbit 와 같은 형식(index=시각, open/high/low/close/volume)을 반환
+
+import asyncio
+import os
+import random
+import time
+
+import pandas as pd
+
+from instrument import error
+
+DATA_SOURCE = os.environ.get("MARKET_DATA_SOURCE", "upbit")   # "upbit" 또는 "replay"
+REPLAY_DIR  = "data/replay"
+
+# ===== 업비트 요청 설정 =====
+RATE_PER_SEC = 8        # 시세 API 초당 요청 수 (업비트 제한 10회/초보다 약간 낮게)
+MAX_INFLIGHT = 8        # 동시에 진행할 요청 수
+TIMEOUT_SEC  = 5.0
+RETRIES      = 3
+BACKOFF_SEC  = 0.5      # 재시도 대기: BACKOFF_SEC * 2^n (+지터)
+PRICE_BATCH  = 100      # 현재가 조회 한 번에 묶을 티커 수
+
+OHLCV_COLS = ["open", "high", "low", "close", "volume"]
+
+
+def to_price_frame(df):
+    """pyupbit 형식 → data/price.csv 형식(Date,Open,High,Low,Close,Volume)"""
+    # Upbit df: index=Datetime, columns=['open','high','low','close','volume','value']
+    df = df.rename(columns={
+        "open":"Open", "high":"High", "low":"Low", "close":"Close", "volume":"Volume"
+    })
+    df["Date"] = pd.to_datetime(df.index.date)  # YYYY-MM-DD
+    return df[["Date","Open","High","Low","Close","Volume"]].sort_values("Date")
+
+
+class RateLimiter:
+    """토큰 버킷: 평균 rate 회/초, 순간 최대 burst 회"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class MarketDataClient:
+    """공통 인터페이스 + 여러 티커 동시 요청 헬퍼"""
+
+    def __init__(self):
+        self.stats = {"requests": 0, "retries": 0, "failures": 0, "latency_sec": 0.0}
+
+    async def get_ohlcv(self, ticker, interval="day", count=200):
+        raise NotImplementedError
+
+    async def get_current_price(self, tickers):
+        """{티커: 현재가}"""
+        raise NotImplementedError
+
+    async def get_ohlcv_many(self, tickers, interval="day", count=200):
+        """여러 티커 동시 요청 → {티커: DataFrame} (실패한 티커는 제외)"""
+        results = await asyncio.gather(
+            *(self.get_ohlcv(t, interval, count) for t in tickers), return_exceptions=True
+        )
+        out = {}
+        for ticker, res in zip(tickers, results):
+            if isinstance(res, Exception):
+                error("fetch", res, f"{ticker} {interval} 시세 실패")
+            else:
+                out[ticker] = res
+        return out
+
+
+class UpbitClient(MarketDataClient):
+    def __init__(self, rate=RATE_PER_SEC, max_inflight=MAX_INFLIGHT, timeout=TIMEOUT_SEC,
+                 retries=RETRIES, backoff=BACKOFF_SEC):
+        super().__init__()
+        import pyupbit   # replay 만 쓸 때는 pyupbit 없이도 동작하도록 지연 import
+        self._api = pyupbit
+        self.limiter = RateLimiter(rate)
+        self.max_inflight = max_inflight
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._sem = None
+        self._sem_loop = None
+
+    def _semaphore(self):
+        # asyncio.run 을 사이클마다 새로 호출해도 쓸 수 있게 이벤트 루프별로 생성
+        loop = asyncio.get_running_loop()
+        if self._sem_loop is not loop:
+            self._sem = asyncio.Semaphore(self.max_inflight)
+            self._sem_loop = loop
+        return self._sem
+
+    async def _call(self, fn, *args, **kwargs):
+        """요청 제한 + 타임아웃 + 재시도. pyupbit 는 실패 시 None 을 돌려주므로 None 도 실패로 처리"""
+        last_err = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+            async with self._semaphore():
+                await self.limiter.acquire()
+                started = time.perf_counter()
+                self.stats["requests"] += 1
+                try:
+                    res = await asyncio.wait_for(
+                        asyncio.to_thread(fn, *args, **kwargs), timeout=self.timeout
+                    )
+                except Exception as e:   # 타임아웃/네트워크 오류
+                    last_err = e
+                    continue
+                finally:
+                    self.stats["latency_sec"] += time.perf_counter() - started
+            if res is not None:
+                return res
+            last_err = RuntimeError(f"{getattr(fn, '__name__', fn)} 응답 없음")
+        self.stats["failures"] += 1
+        raise last_err
+
+    async def get_ohlcv(self, ticker, interval="day", count=200):
+        return await self._call(self._api.get_ohlcv, ticker=ticker, interval=interval, count=count)
+
+    async def get_current_price(self, tickers):
+        """{티커: 현재가} - 실패한 묶음의 티커만 빠지고 나머지는 그대로 반환"""
+        tickers = list(tickers)
+        batches = [tickers[i:i + PRICE_BATCH] for i in range(0, len(tickers), PRICE_BATCH)]
+        results = await asyncio.gather(
+            *(self._call(self._api.get_current_price, b) for b in batches), return_exceptions=True
+        )
+        prices = {}
+        for batch, res in zip(batches, results):
+            if isinstance(res, Exception):
+                error("fetch", res, f"현재가 {len(batch)}개 티커 ({batch[0]}~) 실패")
+                continue
+            if len(batch) == 1 and not isinstance(res, dict):
+                res = {batch[0]: res}
+            prices.update(res)
+        return prices
+
+
+class ReplayClient(MarketDataClient):
+    """
+    파일 기반 재생 클라이언트
+       - 파일: {root}/{티커}_{interval}.csv (price.csv 형식 또는 pyupbit 소문자 컬럼 모두 허용)
+       - now 를 정하면 그 시각까지의 봉만 보임 (set_time 으로 재생 시계를 앞으로 이동)
+       - latency 초만큼 응답을 늦춰 네트워크 지연을 흉내냄
+    """
+
+    def __init__(self, root=REPLAY_DIR, now=None, latency=0.0, price_interval="day"):
+        super().__init__()
+        self.root = root
+        self.now = pd.Timestamp(now) if now is not None else None
+        self.latency = latency
+        self.price_interval = price_interval
+        self._frames = {}
+
+    def set_time(self, now):
+        self.now = pd.Timestamp(now)
+
+    def path_for(self, ticker, interval):
+        return os.path.join(self.root, f"{ticker}_{interval}.csv")
+
+    def _frame(self, ticker, interval):
+        key = (ticker, interval)
+        if key not in self._frames:
+            path = self.path_for(ticker, interval)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"{path} 없음")
+            df = pd.read_csv(path)
+            df.columns = [c.lower() for c in df.columns]
+            time_col = "date" if "date" in df.columns else df.columns[0]
+            df[time_col] = pd.to_datetime(df[time_col])
+            df = df.set_index(time_col).sort_index()
+            df.index.name = None
+            self._frames[key] = df[OHLCV_COLS]
+        return self._frames[key]
+
+    def _visible(self, ticker, interval):
+        df = self._frame(ticker, interval)
+        if self.now is None:
+            return df
+        return df.iloc[:df.index.searchsorted(self.now, side="right")]
+
+    async def _delay(self):
+        self.stats["requests"] += 1
+        if self.latency:
+            started = time.perf_counter()
+            await asyncio.sleep(self.latency)
+            self.stats["latency_sec"] += time.perf_counter() - started
+
+    async def get_ohlcv(self, ticker, interval="day", count=200):
+        await self._delay()
+        return self._visible(ticker, interval).tail(count).copy()
+
+    async def get_current_price(self, tickers):
+        await self._delay()
+        prices = {}
+        for t in tickers:
+            df = self._visible(t, self.price_interval)
+            if len(df):
+                prices[t] = float(df["close"].iloc[-1])
+        return prices
+
+
+def save_replay(df, ticker, interval, root=REPLAY_DIR):
+    """pyupbit 형식 DataFrame 을 ReplayClient 가 읽는 파일로 저장 (라이브 시세 녹화용)"""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"{ticker}_{interval}.csv")
+    df[OHLCV_COLS].to_csv(path, index_label="date", encoding="utf-8")
+    return path
+
+
+def make_client(source=None, **kwargs):
+    source = source or DATA_SOURCE
+    if source == "upbit":
+        return UpbitClient(**kwargs)
+    if source == "replay":
+        return ReplayClient(**kwargs)
+    raise ValueError(f"알 수 없는 시세 소스: {source}")
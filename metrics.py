@@ -0,0 +1,147 @@
+# metrics.py
+# 잔고곡선 / 거래 목록 성과지표 (NumPy 벡터 연산)
+# - trade_ledger    : simulate/simulate_intrabar 거래 목록 → 거래 원장 DataFrame (시각, 가격, 사유, 손익)
+# - batch_metrics   : 잔고곡선 여러 개 (k, n) 를 한 번에 → 지표별 길이 k 배열 (스윕 결과 수천 개용)
+# - equity_metrics  : 잔고곡선 하나 → dict
+# - trade_metrics   : 거래 원장 → 승률/손익비/노출/회전율
+# - evaluate        : 위를 모아 {"metrics": dict, "ledger": DataFrame}
+#
+# 연율화 기준: 코인 시장은 24시간/365일 → 일봉 365, 분봉 365*1440 (periods_per_year 로 날짜에서 추정)
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 365     # 날짜 정보가 없을 때 (일봉 가정)
+RISK_FREE = 0.0            # 연 무위험 수익률
+
+LEDGER_COLS = ["entry_idx", "exit_idx", "entry_time", "exit_time", "entry_price", "exit_price",
+               "reason", "return", "pnl", "bars"]
+
+
+def periods_per_year(dates):
+    """봉 간격(중앙값)으로 1년 봉 수 추정"""
+    ts = np.asarray(dates, dtype="datetime64[ns]").view(np.int64)
+    if len(ts) < 2:
+        return PERIODS_PER_YEAR
+    step = float(np.median(np.diff(ts))) / 1e9
+    return 365 * 86400 / step if step > 0 else PERIODS_PER_YEAR
+
+
+# ===== 거래 원장 =====
+def trade_ledger(trades, dates=None, close=None, init_cash=None):
+    """
+    trades = [(진입 위치, 청산 위치, 매수가, 매도가, 사유, ...), ...]
+    - 미청산 거래는 close 가 있으면 마지막 종가로 평가 (사유 "open"), 없으면 수익률 nan
+    - pnl 은 init_cash 로 시작해 전액 복리로 거래했을 때의 원화 손익
+    """
+    if not trades:
+        return pd.DataFrame(columns=LEDGER_COLS)
+    entry = np.array([t[0] for t in trades], dtype=np.int64)
+    exit_ = np.array([t[1] for t in trades], dtype=np.int64)
+    buy = np.array([t[2] for t in trades], dtype=np.float64)
+    sell = np.array([t[3] for t in trades], dtype=np.float64)
+    reason = np.array([t[4] for t in trades], dtype=object)
+
+    is_open = exit_ < 0
+    end = exit_.copy()
+    if close is not None:
+        n = len(close)
+        end[is_open] = n - 1
+        sell = np.where(is_open, float(close[-1]), sell)
+    ret = sell / buy - 1
+    growth = np.concatenate(([1.0], np.cumprod(1 + np.nan_to_num(ret))[:-1]))
+    pnl = (init_cash if init_cash is not None else 1.0) * growth * ret
+
+    out = {
+        "entry_idx": entry, "exit_idx": exit_,
+        "entry_time": None, "exit_time": None,
+        "entry_price": buy, "exit_price": sell, "reason": reason,
+        "return": ret, "pnl": pnl, "bars": np.where(end >= 0, end - entry, -1),
+    }
+    if dates is not None:
+        idx = pd.DatetimeIndex(dates)
+        out["entry_time"] = idx[entry]
+        out["exit_time"] = idx[np.where(end >= 0, end, 0)].where(end >= 0)
+    return pd.DataFrame(out, columns=LEDGER_COLS)
+
+
+# ===== 잔고곡선 지표 =====
+def batch_metrics(equity, ppy=PERIODS_PER_YEAR, init_cash=None, risk_free=RISK_FREE):
+    """
+    equity: (k, n) 또는 (n,) 배열 → {지표: 길이 k 배열}
+    total_return, cagr, vol, sharpe, sortino, mdd, calmar, max_dd_bars, avg_dd_bars
+    """
+    eq = np.atleast_2d(np.asarray(equity, dtype=np.float64))
+    k, n = eq.shape
+    start = eq[:, 0] if init_cash is None else np.full(k, float(init_cash))
+
+    rets = eq[:, 1:] / eq[:, :-1] - 1 if n > 1 else np.zeros((k, 1))
+    excess = rets - risk_free / ppy
+    mean = excess.mean(axis=1)
+    std = rets.std(axis=1, ddof=1) if rets.shape[1] > 1 else np.zeros(k)
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=1))
+
+    total = eq[:, -1] / start - 1
+    years = n / ppy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.where(1 + total > 0, (1 + total) ** (1 / years) - 1, -1.0)
+        sharpe = np.where(std > 0, mean / std * np.sqrt(ppy), 0.0)
+        sortino = np.where(downside > 0, mean / downside * np.sqrt(ppy), 0.0)
+
+    peak = np.maximum.accumulate(eq, axis=1)
+    dd = eq / peak - 1
+    mdd = dd.min(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        calmar = np.where(mdd < 0, cagr / np.abs(mdd), 0.0)
+
+    # 낙폭 지속 기간: 마지막 고점 이후 경과 봉 수
+    under = eq < peak
+    pos = np.arange(n)
+    last_peak = np.maximum.accumulate(np.where(under, 0, pos), axis=1)
+    max_dd_bars = (pos - last_peak).max(axis=1)
+    starts = under & ~np.concatenate((np.zeros((k, 1), dtype=bool), under[:, :-1]), axis=1)
+    episodes = starts.sum(axis=1)
+    avg_dd_bars = np.where(episodes > 0, under.sum(axis=1) / np.maximum(episodes, 1), 0.0)
+
+    return {
+        "total_return": total, "cagr": cagr, "vol": std * np.sqrt(ppy),
+        "sharpe": sharpe, "sortino": sortino, "mdd": mdd, "calmar": calmar,
+        "max_dd_bars": max_dd_bars, "avg_dd_bars": avg_dd_bars,
+    }
+
+
+def equity_metrics(equity, ppy=PERIODS_PER_YEAR, init_cash=None, risk_free=RISK_FREE):
+    """잔고곡선 하나 → {지표: float}"""
+    return {k: float(v[0]) for k, v in batch_metrics(equity, ppy, init_cash, risk_free).items()}
+
+
+# ===== 거래 지표 =====
+def trade_metrics(ledger, n_bars, ppy=PERIODS_PER_YEAR):
+    """
+    win_rate, avg_trade, profit_factor, exposure(보유 봉 비율), turnover(연간 매매 횟수 기준, 매수+매도 = 2)
+    """
+    closed = ledger[ledger["reason"] != "open"]
+    ret = closed["return"].to_numpy(dtype=float)
+    gains = ret[ret > 0].sum()
+    losses = -ret[ret < 0].sum()
+    bars = ledger["bars"].to_numpy(dtype=float)
+    held = bars[bars >= 0]
+    years = n_bars / ppy if n_bars else np.nan
+    return {
+        "trades": int(len(ledger)),
+        "win_rate": float((ret > 0).mean()) if len(ret) else 0.0,
+        "avg_trade": float(ret.mean()) if len(ret) else 0.0,
+        "profit_factor": float(gains / losses) if losses > 0 else (float("inf") if gains > 0 else 0.0),
+        "exposure": float(np.clip(bars, 0, None).sum() / n_bars) if n_bars else 0.0,
+        "turnover": float((len(closed) * 2 + (len(ledger) - len(closed))) / years) if years else 0.0,
+        "avg_bars": float(held.mean()) if len(held) else 0.0,
+    }
+
+
+def evaluate(equity, trades, dates=None, close=None, init_cash=None):
+    """잔고곡선 + 거래 목록 → {"metrics": {...}, "ledger": DataFrame}"""
+    ppy = periods_per_year(dates) if dates is not None else PERIODS_PER_YEAR
+    ledger = trade_ledger(trades, dates, close, init_cash)
+    metrics = equity_metrics(equity, ppy, init_cash)
+    metrics.update(trade_metrics(ledger, len(equity), ppy))
+    return {"metrics": metrics, "ledger": ledger}
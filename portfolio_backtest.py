@@ -0,0 +1,390 @@
+# portfolio_backtest.py
+# 여러 티커를 (시각 × 종목) 2차원 배열로 맞춰 한 번에 백테스트
+# - candle_store 이력(memmap)을 모든 티커 시각의 합집합 위에 정렬 → close/high/low 행렬 (열 = 종목)
+#   상장 전·상장 폐지 후는 NaN, 상장 기간 안의 빈 봉(거래 없음)은 직전 종가로 채운 평평한 봉
+# - MACD/SMA/Entry/Exit 는 시간 축을 CHUNK_BARS 행씩 나눠 전 종목을 한 번에 계산
+#   (EMA 는 직전 청크 마지막 값, SMA 는 직전 window-1 행을 이어 붙여 계산 → 청크 경계에서도 같은 값)
+#   → 지표 중간 배열은 청크 크기만큼만, 전체 크기로 남는 것은 가격 행렬과 Entry/Exit bool 행렬뿐
+# - 종목별 결과: 종목마다 INIT_CASH 로 따로 돌린 것 (backtest_fast.simulate, backtest_equity 와 같은 룰)
+# - 포트폴리오: 현금 하나를 나눠 쓰며 최대 MAX_POSITIONS 종목 동시 보유
+#   거래 단위 이벤트 루프 (Entry 가 있는 봉 / 청산 봉만 방문), 청산 봉·가격은 backtest_fast.exit_trade
+#   같은 봉에서는 청산 먼저 → 남은 현금으로 진입 (Entry 가 여러 개면 열 순서), 청산한 봉에는 재진입하지 않음
+#
+# 자금 배분 규칙 (ALLOC)
+#   "equal" : 평가자산 / MAX_POSITIONS 만큼 (현금이 모자라면 남은 현금)
+#   "cash"  : 남은 현금 / 빈 자리 수
+#   "fixed" : 평가자산 × WEIGHT
+#
+# 사용 예)
+#   python portfolio_backtest.py minute60
+#   python portfolio_backtest.py day --tickers KRW-BTC,KRW-ETH --alloc cash --max-pos 2
+#   python portfolio_backtest.py minute60 --start 2022-01-01 --float32
+
+import heapq
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from backtest_equity import INIT_CASH, FEE, SLIP, STOP_PCT, TAKE_PCT
+from backtest_fast import simulate, exit_trade
+from candle_store import CandleStore, STORE_DIR, TS_COL
+from metrics import evaluate, equity_metrics, periods_per_year
+
+OUT_EQUITY = "reports/portfolio_equity.csv"
+OUT_ASSETS = "reports/portfolio_assets.csv"
+OUT_TRADES = "reports/portfolio_trades.csv"
+
+CHUNK_BARS = 4096          # 지표 계산 시 한 번에 처리할 행(봉) 수
+PRICE_DTYPE = np.float64   # 가격 행렬 dtype (float32 면 메모리 절반)
+
+ALLOC = "equal"
+MAX_POSITIONS = 10
+WEIGHT = 0.1               # ALLOC="fixed" 일 때 종목당 평가자산 비율
+MIN_ORDER = 5000           # 업비트 최소 주문 금액(원) - 이보다 작으면 진입하지 않음
+
+TRADE_COLS = ["ticker", "entry_time", "exit_time", "entry_price", "exit_price", "reason",
+              "qty", "cost", "proceeds", "return", "pnl"]
+
+
+class PriceMatrix:
+    """티커 여러 개를 같은 시각 축에 맞춘 (시각, 종목) 가격 행렬 (열 단위 연속 배열)"""
+
+    def __init__(self, ts, tickers, close, high, low, first, last):
+        self.ts = ts              # int64 (ns), 모든 티커 시각의 합집합
+        self.tickers = tickers
+        self.close = close
+        self.high = high
+        self.low = low
+        self.first = first        # 종목별 첫 유효 행
+        self.last = last          # 종목별 마지막 유효 행
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self.ts.view("datetime64[ns]"))
+
+    @property
+    def nbytes(self):
+        return self.close.nbytes + self.high.nbytes + self.low.nbytes
+
+    @classmethod
+    def from_arrays(cls, tickers, series, dtype=PRICE_DTYPE):
+        """series: 티커별 {ts, high, low, close} 배열 dict (ts 오름차순)"""
+        ts = np.unique(np.concatenate([np.asarray(s[TS_COL], dtype=np.int64) for s in series]))
+        n, k = len(ts), len(tickers)
+        close = np.full((n, k), np.nan, dtype=dtype, order="F")
+        high = np.full((n, k), np.nan, dtype=dtype, order="F")
+        low = np.full((n, k), np.nan, dtype=dtype, order="F")
+        first = np.zeros(k, dtype=np.int64)
+        last = np.full(k, -1, dtype=np.int64)
+        for a, s in enumerate(series):
+            if not len(s[TS_COL]):
+                continue
+            pos = np.searchsorted(ts, np.asarray(s[TS_COL], dtype=np.int64))
+            lo, hi = int(pos[0]), int(pos[-1]) + 1
+            first[a], last[a] = lo, hi - 1
+            c, h, l = close[lo:hi, a], high[lo:hi, a], low[lo:hi, a]
+            c[pos - lo] = s["close"]
+            h[pos - lo] = s["high"]
+            l[pos - lo] = s["low"]
+            # 상장 기간 안의 빈 봉 → 직전 종가로 채운 평평한 봉
+            gap = np.isnan(c)
+            if gap.any():
+                src = np.maximum.accumulate(np.where(gap, 0, np.arange(hi - lo)))
+                filled = c[src]
+                c[gap] = filled[gap]
+                h[gap] = filled[gap]
+                l[gap] = filled[gap]
+        return cls(ts, list(tickers), close, high, low, first, last)
+
+
+def store_tickers(interval="day", root=STORE_DIR):
+    """저장소에 해당 interval 이력이 있는 티커 목록 (이름순)"""
+    if not os.path.isdir(root):
+        return []
+    store = CandleStore(root)
+    return sorted(t for t in os.listdir(root)
+                  if os.path.isdir(store.path_for(t, interval)) and store.length(t, interval) > 0)
+
+
+def load_matrix(tickers=None, interval="day", start=None, end=None, root=STORE_DIR, dtype=PRICE_DTYPE):
+    """candle_store 이력 → PriceMatrix (start/end: 'YYYY-MM-DD', 양 끝 포함)"""
+    store = CandleStore(root)
+    tickers = tickers or store_tickers(interval, root)
+    lo = np.datetime64(start, "ns").astype(np.int64) if start else None
+    hi = (np.datetime64(end, "D") + 1).astype("datetime64[ns]").astype(np.int64) if end else None
+    kept, series = [], []
+    for t in tickers:
+        arrays = store.load_arrays(t, interval)
+        ts = np.asarray(arrays[TS_COL])
+        s = 0 if lo is None else int(np.searchsorted(ts, lo))
+        e = len(ts) if hi is None else int(np.searchsorted(ts, hi))
+        if e > s:
+            kept.append(t)
+            series.append({c: arrays[c][s:e] for c in (TS_COL, "high", "low", "close")})
+    if not series:
+        raise FileNotFoundError(f"{root} 에 {interval} 이력이 있는 티커가 없습니다.")
+    return PriceMatrix.from_arrays(kept, series, dtype)
+
+
+# ===== 지표/신호 (시간 축 청크) =====
+def _ema_chunk(x, span, last):
+    """ewm(adjust=False) - last(직전 청크 마지막 EMA 행)를 첫 행으로 붙여 점화식을 이어감"""
+    if last is None:
+        return pd.DataFrame(x).ewm(span=span, adjust=False).mean().to_numpy()
+    out = pd.DataFrame(np.vstack([last, x])).ewm(span=span, adjust=False).mean().to_numpy()
+    return out[1:]
+
+
+def _sma_chunk(x, window, head):
+    """rolling(window, min_periods=1) - head(직전 window-1 행)를 앞에 붙여 계산"""
+    if len(head):
+        x = np.vstack([head, x])
+    out = pd.DataFrame(x).rolling(window=window, min_periods=1).mean().to_numpy()
+    return out[len(head):]
+
+
+def signal_matrix(close, short=12, long=26, signal=9, window=200, chunk=CHUNK_BARS):
+    """
+    (시각, 종목) 종가 → (Entry, Exit) bool 행렬
+    종목마다 MacdMaFilter / macd_with_ma_filter 를 따로 돌린 것과 같은 룰
+    (상장 첫 봉은 이전 값이 없으므로 False, NaN 구간은 모두 False)
+    """
+    n, k = close.shape
+    entry = np.zeros((n, k), dtype=bool, order="F")
+    exit_ = np.zeros((n, k), dtype=bool, order="F")
+    ema_s = ema_l = sig = None
+    prev_diff = np.full((1, k), np.nan)
+    head = close[:0]
+    for s in range(0, n, chunk):
+        e = min(s + chunk, n)
+        c = np.asarray(close[s:e], dtype=np.float64)
+        es = _ema_chunk(c, short, ema_s)
+        el = _ema_chunk(c, long, ema_l)
+        macd = es - el
+        sg = _ema_chunk(macd, signal, sig)
+        diff = macd - sg
+        prev = np.vstack([prev_diff, diff[:-1]])
+        with np.errstate(invalid="ignore"):
+            golden = (prev <= 0) & (diff > 0)
+            dead = (prev >= 0) & (diff < 0)
+            above = c > _sma_chunk(c, window, head)
+        entry[s:e] = golden & above
+        exit_[s:e] = dead
+        ema_s, ema_l, sig, prev_diff = es[-1:], el[-1:], sg[-1:], diff[-1:]
+        head = np.asarray(close[max(0, e - window + 1):e], dtype=np.float64)
+    # 상장 폐지 후 NaN 구간의 EMA 는 직전 값이 이어지므로 신호를 지움
+    nan = np.isnan(close)
+    entry[nan] = False
+    exit_[nan] = False
+    return entry, exit_
+
+
+# ===== 종목별 백테스트 =====
+def asset_backtests(pm, entry, exit_, stop_pct=STOP_PCT, take_pct=TAKE_PCT):
+    """종목마다 INIT_CASH 로 따로 시뮬레이션 → 종목별 성과 DataFrame (index=티커)"""
+    dates = pm.dates
+    rows = {}
+    for a, t in enumerate(pm.tickers):
+        s, e = int(pm.first[a]), int(pm.last[a]) + 1
+        if e <= s:
+            continue
+        close = pm.close[s:e, a]
+        equity, trades = simulate(close, pm.high[s:e, a], pm.low[s:e, a], entry[s:e, a], exit_[s:e, a],
+                                  FEE, SLIP, stop_pct, take_pct, INIT_CASH)
+        m = evaluate(equity, trades, dates=dates[s:e], close=close, init_cash=INIT_CASH)["metrics"]
+        m["bars"] = e - s
+        m["final_equity"] = float(equity[-1])
+        rows[t] = m
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+# ===== 포트폴리오 =====
+def _order_size(rule, cash, equity, free, max_positions, weight):
+    if rule == "equal":
+        return min(cash, equity / max_positions)
+    if rule == "cash":
+        return cash / free
+    if rule == "fixed":
+        return min(cash, equity * weight)
+    raise ValueError(f"알 수 없는 자금 배분 규칙: {rule}")
+
+
+def simulate_portfolio(pm, entry, exit_, alloc=ALLOC, max_positions=MAX_POSITIONS, weight=WEIGHT,
+                       stop_pct=STOP_PCT, take_pct=TAKE_PCT, init_cash=INIT_CASH, min_order=MIN_ORDER):
+    """
+    현금 하나로 여러 종목 보유 → (equity, trades)
+       - equity : 봉별 평가자산 (현금 + 보유 종목 종가 평가액)
+       - trades : [(종목 열, 진입 위치, 청산 위치, 매수 체결가, 매도 체결가, 사유, 수량, 매수 금액), ...]
+                  사유 = "stop" / "take" / "signal" / "delist"(상장 폐지 전 마지막 봉) / "open"(청산 위치 -1)
+    한 종목 + max_positions=1 + alloc="cash" 면 backtest_fast.simulate 와 같은 잔고곡선
+    """
+    close, high, low = pm.close, pm.high, pm.low
+    n, k = close.shape
+    exit_idx = [np.flatnonzero(exit_[:, a]) for a in range(k)]
+    entry_rows = np.flatnonzero(entry.any(axis=1))
+
+    cash = float(init_cash)
+    holding = {}             # 종목 열 → (수량, 진입 위치, 매수 체결가, 매수 금액)
+    exits = []               # 힙: (청산 위치, 종목 열, 매도 체결가, 사유)
+    trades = []
+    events, levels = [], []  # 현금이 바뀐 봉과 그 뒤 현금
+
+    ei = 0
+    while ei < len(entry_rows) or exits:
+        t = min(int(entry_rows[ei]) if ei < len(entry_rows) else n, exits[0][0] if exits else n)
+
+        # 1) 이 봉의 청산
+        closed = set()
+        while exits and exits[0][0] == t:
+            _, a, sell, reason = heapq.heappop(exits)
+            coin, e, buy, cost = holding.pop(a)
+            cash += coin * sell
+            trades.append((a, e, t, buy, sell, reason, coin, cost))
+            closed.add(a)
+
+        # 2) 이 봉의 진입
+        if ei < len(entry_rows) and int(entry_rows[ei]) == t:
+            ei += 1
+            free = max_positions - len(holding)
+            equity_t = None
+            for a in np.flatnonzero(entry[t]):
+                if free <= 0:
+                    break
+                a = int(a)
+                end = int(pm.last[a]) + 1
+                if a in holding or a in closed or (end < n and t == end - 1):
+                    continue    # 보유 중 / 이 봉에 청산 / 상장 폐지 전 마지막 봉
+                if equity_t is None and alloc != "cash":
+                    equity_t = cash + sum(c * float(close[t, b]) for b, (c, *_) in holding.items())
+                spend = _order_size(alloc, cash, equity_t, free, max_positions, weight)
+                if spend < min_order:
+                    break
+                buy = float(close[t, a]) * (1 + FEE + SLIP)
+                coin = spend / buy
+                cash -= spend
+                free -= 1
+                holding[a] = (coin, t, buy, spend)
+                j, sell, reason = exit_trade(close[:end, a], high[:end, a], low[:end, a], exit_idx[a],
+                                             t, buy, FEE, SLIP, stop_pct, take_pct)
+                if j < 0 and end < n:
+                    j, sell, reason = end - 1, float(close[end - 1, a]) * (1 - FEE - SLIP), "delist"
+                if j >= 0:
+                    heapq.heappush(exits, (j, a, sell, reason))
+
+        events.append(t)
+        levels.append(cash)
+
+    # 미청산 포지션
+    for a, (coin, e, buy, cost) in holding.items():
+        trades.append((a, e, -1, buy, np.nan, "open", coin, cost))
+    trades.sort(key=lambda tr: (tr[1], tr[0]))
+
+    # 평가자산 = 현금(계단) + 보유 수량 × 종가
+    idx = np.searchsorted(events, np.arange(n), side="right") - 1
+    equity = np.where(idx >= 0, np.asarray(levels + [init_cash], dtype=np.float64)[idx], float(init_cash))
+    for a, e, j, _, _, _, coin, _ in trades:
+        end = j if j >= 0 else n
+        equity[e:end] += close[e:end, a] * coin
+    return equity, trades
+
+
+def portfolio_ledger(pm, trades):
+    """simulate_portfolio 거래 목록 → 거래 원장 DataFrame (미청산은 마지막 종가로 평가)"""
+    if not trades:
+        return pd.DataFrame(columns=TRADE_COLS)
+    dates = pm.dates
+    a = np.array([tr[0] for tr in trades], dtype=np.int64)
+    e = np.array([tr[1] for tr in trades], dtype=np.int64)
+    j = np.array([tr[2] for tr in trades], dtype=np.int64)
+    coin = np.array([tr[6] for tr in trades], dtype=np.float64)
+    cost = np.array([tr[7] for tr in trades], dtype=np.float64)
+    sell = np.array([tr[4] for tr in trades], dtype=np.float64)
+    is_open = j < 0
+    mark = np.asarray(pm.close[pm.last[a], a], dtype=np.float64)
+    sell = np.where(is_open, mark, sell)
+    proceeds = coin * sell
+    return pd.DataFrame({
+        "ticker": np.array(pm.tickers, dtype=object)[a],
+        "entry_time": dates[e],
+        "exit_time": dates[np.where(is_open, 0, j)].where(~is_open),
+        "entry_price": [tr[3] for tr in trades],
+        "exit_price": sell,
+        "reason": [tr[5] for tr in trades],
+        "qty": coin, "cost": cost, "proceeds": proceeds,
+        "return": proceeds / cost - 1, "pnl": proceeds - cost,
+    }, columns=TRADE_COLS)
+
+
+def run_portfolio(pm, alloc=ALLOC, max_positions=MAX_POSITIONS, weight=WEIGHT,
+                  short=12, long=26, signal=9, window=200, chunk=CHUNK_BARS):
+    """
+    PriceMatrix → {"equity": DataFrame, "metrics": dict, "ledger": DataFrame, "assets": DataFrame}
+    """
+    entry, exit_ = signal_matrix(pm.close, short, long, signal, window, chunk)
+    equity, trades = simulate_portfolio(pm, entry, exit_, alloc, max_positions, weight)
+    ledger = portfolio_ledger(pm, trades)
+    dates = pm.dates
+
+    ppy = periods_per_year(dates)
+    metrics = equity_metrics(equity, ppy, INIT_CASH)
+    ret = ledger.loc[ledger["reason"] != "open", "return"].to_numpy(dtype=float)
+    held = np.zeros(len(dates) + 1, dtype=np.int64)
+    for _, e, j, *_ in trades:
+        held[e] += 1
+        held[j if j >= 0 else len(dates)] -= 1
+    held = np.cumsum(held[:-1])
+    metrics.update({
+        "trades": len(trades),
+        "win_rate": float((ret > 0).mean()) if len(ret) else 0.0,
+        "exposure": float((held > 0).mean()),
+        "avg_positions": float(held.mean()),
+    })
+    return {
+        "equity": pd.DataFrame({"Equity": equity, "Positions": held}, index=dates.rename("Date")),
+        "metrics": metrics,
+        "ledger": ledger,
+        "assets": asset_backtests(pm, entry, exit_),
+    }
+
+
+def _opt(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    interval = args[0] if args and not args[0].startswith("--") else "day"
+    tickers = _opt(args, "--tickers")
+    alloc = _opt(args, "--alloc", ALLOC)
+    max_pos = int(_opt(args, "--max-pos", MAX_POSITIONS))
+    weight = float(_opt(args, "--weight", WEIGHT))
+
+    pm = load_matrix(tickers.split(",") if tickers else None, interval,
+                     _opt(args, "--start"), _opt(args, "--end"),
+                     dtype=np.float32 if "--float32" in args else PRICE_DTYPE)
+    n, k = pm.shape
+    print(f"=== 포트폴리오 백테스트: {k}종목 × {n:,}봉 ({interval}, 가격 행렬 {pm.nbytes / 2**20:,.0f}MB) ===")
+    result = run_portfolio(pm, alloc, max_pos, weight)
+    m = result["metrics"]
+    print(f"배분 규칙 : {alloc} (최대 {max_pos}종목{f', 종목당 {weight*100:.0f}%' if alloc == 'fixed' else ''})")
+    print(f"최종 자본 : {result['equity']['Equity'].iloc[-1]:,.0f}원  (초기 {INIT_CASH:,.0f}원)")
+    print(f"총 수익률 : {m['total_return']*100:.2f}%  (연 {m['cagr']*100:.2f}%)")
+    print(f"최대 낙폭 : {m['mdd']*100:.2f}%  |  샤프 {m['sharpe']:.2f}")
+    print(f"거래 횟수 : {m['trades']}회  승률 {m['win_rate']*100:.1f}%  "
+          f"노출 {m['exposure']*100:.1f}%  평균 보유 {m['avg_positions']:.2f}종목")
+    assets = result["assets"]
+    if len(assets):
+        print(f"종목별(각각 단독) 수익률 중앙값 {assets['total_return'].median()*100:.2f}% | "
+              f"수익 종목 {int((assets['total_return'] > 0).sum())}/{len(assets)}")
+
+    os.makedirs("reports", exist_ok=True)
+    result["equity"].to_csv(OUT_EQUITY, encoding="utf-8")
+    result["assets"].to_csv(OUT_ASSETS, index_label="ticker", encoding="utf-8")
+    result["ledger"].to_csv(OUT_TRADES, index=False, encoding="utf-8")
+    print(f"✅ 결과 저장: {OUT_EQUITY}, {OUT_ASSETS}, {OUT_TRADES}")
@@ -0,0 +1,63 @@
+# report_deps.py
+# 리포트 산출물 의존성 추적 (입력이 그대로면 다시 그리지 않음)
+# - 산출물 경로 → 입력 키(데이터 내용 해시 + 그리기 코드 버전) 를 manifest JSON 에 기록
+# - 다음 실행에서 키가 같고 산출물 파일이 있으면 건너뜀
+#   (키는 읽어 들인 데이터 내용으로 만들므로 touch 만 된 파일은 다시 그리지 않음)
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+MANIFEST_PATH = "reports/render_manifest.json"
+
+
+def digest(*parts):
+    """문자열/숫자/bytes/NumPy 배열 조각들 → 짧은 해시"""
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        if isinstance(p, np.ndarray):
+            a = np.ascontiguousarray(p)
+            if a.dtype == object:
+                h.update(repr(a.tolist()).encode())
+            else:
+                h.update(a.dtype.str.encode())
+                h.update(a.view(np.uint8))
+        elif isinstance(p, bytes):
+            h.update(p)
+        else:
+            h.update(repr(p).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+        self.outputs = state.get("outputs", {})   # 산출물 경로 → 키
+        self._dirty = False
+
+    def fresh(self, outputs, key):
+        """산출물이 모두 있고 같은 키로 만들어졌으면 True"""
+        return all(self.outputs.get(out) == key and os.path.exists(out) for out in outputs)
+
+    def mark(self, outputs, key):
+        for out in outputs:
+            self.outputs[out] = key
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"outputs": self.outputs}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -0,0 +1,208 @@
+# resample.py
+# 1분봉 하나의 흐름으로 상위 봉(5분/15분/60분/4시간/일)을 증분 생성하고 봉마다 신호 평가
+# - 봉 경계는 업비트와 같은 UTC epoch 격자 (입력 시각은 KST naive → 일봉은 09:00 시작)
+# - 같은 1분봉(진행 중)이 다시 들어오면 교체, 새 1분봉이면 현재 상위 봉에 합침
+# - 타임프레임마다 두 엔진을 O(1) 로 갱신
+#     filter : macd_with_ma_filter 룰 (ewm adjust=False + SMA200)
+#     alert  : alert_macd 룰 (ewm 기본 adjust=True + 히스토그램 전환 / 5MA 하락)
+# - 상위 봉이 마감되면 그 봉 기준 평가를 돌려줌 → 여러 타임프레임 합류(confluence) 룰 평가
+#
+# 사용 예)
+#   mtf = MultiTimeframe()
+#   mtf.seed("minute60", df_60m)         # 시작할 때 타임프레임별 이력으로 한 번만 시드
+#   for ev in mtf.on_bar(ts, o, h, l, c, v):   # 이후로는 1분봉만 받아 넣으면 됨
+#       print(ev["interval"], ev["Alert"], ev["Entry"])
+
+import pandas as pd
+
+from candle_store import INTERVAL_SEC
+from live_indicators import LiveMacd
+from strategies.macd_strategy import hist_alert
+
+BASE_INTERVAL = "minute1"
+TIMEFRAMES = ["minute5", "minute15", "minute60", "minute240", "day"]
+KST_OFFSET = 9 * 3600     # 입력 시각(KST naive)과 UTC 의 차이 (초)
+SMA_WINDOW = 200
+
+# 합류 룰: (신호 타임프레임, 추세 확인 타임프레임들)
+#   신호 타임프레임 봉 마감 시 Entry 또는 GOLDEN 이고, 추세 타임프레임이 모두 상승(Hist > 0, 종가 > SMA) 이면 알림
+CONFLUENCE = [("minute60", ("minute240", "day"))]
+
+
+def to_sec(ts):
+    """시각 → 정수 초 (naive 시각 그대로, 내부 키로 사용). 정수는 이미 초로 보고 그대로"""
+    if isinstance(ts, int):
+        return ts
+    return pd.Timestamp(ts).value // 1_000_000_000
+
+
+def to_time(sec):
+    return pd.Timestamp(sec, unit="s")
+
+
+def bar_start(sec, interval):
+    """KST naive 시각(초) → 그 시각이 속한 봉의 시작(초)"""
+    step = INTERVAL_SEC[interval]
+    return (sec - KST_OFFSET) // step * step + KST_OFFSET
+
+
+def _merge(agg, bar):
+    """시간순 OHLCV 튜플 두 개 합치기"""
+    if agg is None:
+        return bar
+    return (agg[0], max(agg[1], bar[1]), min(agg[2], bar[2]), bar[3], agg[4] + bar[4])
+
+
+class BarBuilder:
+    """하위 봉 → 상위 봉 하나를 증분으로 만드는 빌더"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.start = None          # 현재 상위 봉 시작 (초)
+        self._done = None          # 현재 상위 봉에서 확정된 하위 봉 합계 (o, h, l, c, v)
+        self._base_key = None      # 진행 중인 하위 봉 시각 (초)
+        self._base = None          # 진행 중인 하위 봉 (o, h, l, c, v)
+
+    def prime(self, start, o, h, l, c, v=0.0):
+        """시드 이력의 마지막(진행 중) 상위 봉으로 시작 상태 지정"""
+        self.start = bar_start(to_sec(start), self.interval)
+        self._done = (float(o), float(h), float(l), float(c), float(v))
+        self._base_key = None
+        self._base = None
+
+    def update(self, key, o, h, l, c, v=0.0):
+        """
+        하위 봉 하나 반영 (key = 시각(초), 같은 key 면 교체, 과거 key 는 무시)
+        반환: 이번 갱신으로 마감된 상위 봉 dict (없으면 None)
+        """
+        bar = (float(o), float(h), float(l), float(c), float(v))
+        if self._base_key is not None and key == self._base_key:
+            self._base = bar
+            return None
+        if self._base_key is not None and key < self._base_key:
+            return None
+
+        start = bar_start(key, self.interval)
+        if self.start is not None and start < self.start:
+            return None
+        closed = None
+        if self.start is not None and start != self.start:
+            closed = self.bar()
+            self._done = None
+        else:
+            self._done = _merge(self._done, self._base) if self._base else self._done
+        self.start = start
+        self._base_key = key
+        self._base = bar
+        return closed
+
+    def bar(self):
+        """현재(진행 중) 상위 봉 dict (Date = 시작 시각(초))"""
+        agg = _merge(self._done, self._base) if self._base else self._done
+        if agg is None:
+            return None
+        return {"Date": self.start, "Open": agg[0], "High": agg[1], "Low": agg[2],
+                "Close": agg[3], "Volume": agg[4]}
+
+
+class TimeframeSignals:
+    """타임프레임 하나: 봉 빌더 + 두 룰의 증분 엔진"""
+
+    def __init__(self, interval, sma_window=SMA_WINDOW):
+        self.interval = interval
+        self.builder = BarBuilder(interval)
+        self.filter = LiveMacd(sma_window=sma_window)
+        self.alert = LiveMacd(sma_window=5, adjust=True, sma_min_periods=5)
+        self.last_closed = None    # 마지막으로 마감된 봉의 평가
+
+    def seed(self, df):
+        """pyupbit 형식(index=시각, open/high/low/close/volume) 이력으로 시드. 마지막 봉은 진행 중으로 간주"""
+        self.filter.reset()
+        self.alert.reset()
+        keys = [to_sec(k) for k in df.index]
+        closes = df["close"].to_numpy(dtype=float)
+        for key, close in zip(keys, closes):
+            self.filter.update(key, close)
+            self.alert.update(key, close)
+        if keys:
+            last = df.iloc[-1]
+            self.builder.prime(df.index[-1], last["open"], last["high"], last["low"], last["close"],
+                               last.get("volume", 0.0))
+        return self
+
+    def evaluate(self):
+        """엔진의 마지막 봉 기준 평가 dict"""
+        f = self.filter.snapshot()
+        a = self.alert.snapshot()
+        if f is None:
+            return None
+        sma_key = f"SMA{self.filter.sma_window}"
+        return {
+            "interval": self.interval,
+            "Date": to_time(f["Date"]),
+            "Close": f["Close"],
+            "Hist": f["Hist"],
+            "SMA": f[sma_key],
+            "Entry": f["Entry"],
+            "Exit": f["Exit"],
+            "AlertHist": a["Hist"],
+            "MA5": a["SMA5"],
+            "Alert": hist_alert(a["Prev_Hist"], a["Hist"], a["Prev_SMA5"], a["SMA5"]),
+        }
+
+    def on_bar(self, key, o, h, l, c, v=0.0):
+        """하위 봉 반영 (key = 시각(초)). 반환: 상위 봉이 마감됐으면 그 봉의 평가, 아니면 None"""
+        closed = self.builder.update(key, o, h, l, c, v)
+        ev = None
+        if closed is not None:
+            # 엔진에는 마감 봉의 최종 종가가 이미 반영되어 있음 → 새 봉을 넣기 전에 평가
+            ev = self.last_closed = self.evaluate()
+        cur = self.builder.bar()
+        if cur is not None:
+            self.filter.update(cur["Date"], cur["Close"])
+            self.alert.update(cur["Date"], cur["Close"])
+        return ev
+
+    def is_uptrend(self):
+        """진행 중인 봉 기준 상승 추세 (Hist > 0 이고 종가 > SMA)"""
+        ev = self.evaluate()
+        return ev is not None and ev["Hist"] > 0 and ev["Close"] > ev["SMA"]
+
+
+class MultiTimeframe:
+    def __init__(self, intervals=TIMEFRAMES, sma_window=SMA_WINDOW, confluence=CONFLUENCE):
+        self.frames = {iv: TimeframeSignals(iv, sma_window) for iv in intervals}
+        self.confluence = [(trig, trend) for trig, trend in confluence
+                           if trig in self.frames and all(t in self.frames for t in trend)]
+
+    def seed(self, interval, df):
+        self.frames[interval].seed(df)
+
+    def on_bar(self, key, o, h, l, c, v=0.0):
+        """
+        1분봉 하나를 모든 타임프레임에 반영
+        반환: 이번에 마감된 상위 봉 평가 리스트 (합류 룰 충족 시 "Confluence": True)
+        """
+        key = to_sec(key)
+        events = [ev for ev in (tf.on_bar(key, o, h, l, c, v) for tf in self.frames.values())
+                  if ev is not None]
+        for ev in events:
+            ev["Confluence"] = self._confluence(ev)
+        return events
+
+    def on_price(self, ts, price):
+        """1분봉 대신 현재가(틱)로 갱신 - 시/고/저/종가 = 현재가, 거래량 0"""
+        return self.on_bar(ts, price, price, price, price, 0.0)
+
+    def _confluence(self, ev):
+        for trig, trend in self.confluence:
+            if ev["interval"] != trig:
+                continue
+            if (ev["Entry"] or ev["Alert"] == "GOLDEN") and all(
+                    self.frames[t].is_uptrend() for t in trend):
+                return True
+        return False
+
+    def latest(self):
+        """타임프레임별 진행 중인 봉 기준 평가"""
+        return {iv: tf.evaluate() for iv, tf in self.frames.items()}
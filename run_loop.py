@@ -1,34 +1,78 @@
 # run_loop.py
-# 매 60초마다 업비트 XRP 데이터를 갱신하고
+# 매 60초마다 업비트 시세(TICKERS 전체)를 갱신하고
 # MACD+SMA200 복합전략의 최신 Entry/Exit 신호를 콘솔로 알림 + 로그 저장 + 일일 요약
+# - 티커별 지표 엔진/알림 상태는 메모리에 보관, 현재가는 한 번의 묶음 요청으로 갱신
+# - 매 사이클 끝에 엔진/알림 상태/요약 날짜/요약 집계기를 체크포인트 한 파일로 원자적 저장
+#   → 재시작 시 이력 재계산 없이 바로 이어서 판정 (웜 스타트)
+# - 단계별/티커별 소요 시간 + 카운터 → reports/metrics/run_loop.json (instrument, LOOP_METRICS=0 이면 끔)
+# - 신호는 alert_bus 로 보내고 바로 다음 티커로 → 중복 제거/쿨다운/콘솔·파일·웹훅 전달은 디스패처 스레드
+# - --stream : WebSocket 체결 스트림으로 1분봉 마감 즉시 판정 (ws_feed, websockets 패키지 필요)
 
-import time
+import asyncio
 import os
+import signal
+import sys
+import pandas as pd
 from datetime import datetime, timedelta
-from fetch_upbit import main as fetch_prices
-from backtest import load_price_data, calc_macd, calc_sma
-from strategies.macd_strategy import macd_with_ma_filter
+from live_indicators import LiveMacd
+from market_data import make_client
+from candle_store import CandleStore
+from summary_agg import SummaryAggregator, AGG_STATE_FILE
+from log_sink import LogSink
+from scheduler import BarScheduler
+from summary_io import read_signal_log, summarize_signals, append_summary
+from checkpoint import CHECKPOINT_FILE, save_checkpoint, load_checkpoint
+from instrument import stage, count, error, add_source, maybe_write, setup as setup_metrics
+from alert_bus import Signal, make_bus
 
 TICKER = "KRW-XRP"
+TICKERS = [TICKER]      # 감시할 마켓 목록 (100개 이상도 한 프로세스에서 처리)
 INTERVAL_SEC = 60
+METRICS_EVERY_SEC = 3600   # 스케줄러 지연 지표 출력 주기
 
 # 로그/요약 경로
 LOG_DIR = "reports/logs"
 DAILY_SUMMARY_CSV = "reports/daily_summary.csv"
-STATE_FILE = "reports/last_state.txt"      # 마지막 알림 상태 (ENTRY/EXIT/NONE)
-LAST_DAY_FILE = "reports/last_day.txt"     # 마지막으로 요약 처리한 날짜(YYYY-MM-DD)
+STATE_DIR = "reports/state"                # 체크포인트 위치 (예전 티커별 알림 상태 파일도 여기)
+LAST_DAY_FILE = "reports/last_day.txt"     # 예전 형식: 마지막으로 요약 처리한 날짜 (체크포인트 없을 때만 읽음)
+
+# 증분 지표 엔진 (티커별로 첫 사이클에 저장소 전체 이력으로 시드, 이후에는 현재가만 반영)
+SMA_WINDOW = 200
+RECENT_BARS = 2      # 봉 마감 시 엔진에 다시 반영할 최근 봉 개수 (마감된 봉 + 새 봉)
+DAY_CANDLE_START_HOUR = 9   # 업비트 일봉은 09:00(KST)에 새로 시작
+_client = None       # market_data 클라이언트 (MARKET_DATA_SOURCE 로 upbit/replay 선택)
+_store = CandleStore()   # 일봉 이력 (새 봉만 받아 붙임)
+_engines = {}        # 티커 → LiveMacd
+_states = {}         # 티커 → 마지막 알림 상태
+_agg = SummaryAggregator.load(AGG_STATE_FILE)   # 일/시간/주 단위 OHLC + 신호 횟수 (체크포인트가 있으면 그쪽으로 교체)
+_sink = LogSink(LOG_DIR)   # 파일 핸들 유지 + 버퍼링 기록 (FLUSH_ROWS/FLUSH_SEC 기준, 종료 시 자동 기록)
+_bus = None          # 알림 버스 (main 에서 체크포인트 복원 직후 생성, 마지막 상태로 중복 제거 상태를 채움)
+ALERT_RULE = f"macd_sma{SMA_WINDOW}"
+_dirs_ready = False
+_last_day_done = None   # 마지막으로 요약 처리한 날짜 (체크포인트 또는 LAST_DAY_FILE 에서 처음 한 번만 읽음)
 
 def ensure_dirs():
+    global _dirs_ready
+    if _dirs_ready:
+        return
     os.makedirs("reports", exist_ok=True)
     os.makedirs(LOG_DIR, exist_ok=True)
+    os.makedirs(STATE_DIR, exist_ok=True)
+    _dirs_ready = True
 
 def now_kr():
     # 간단히 로컬 시간을 한국시간처럼 사용 (PC 시간대 기준)
     # 필요하면 timezone 라이브러리로 Asia/Seoul 명시 가능
     return datetime.now()
 
-def log_path_for(date_obj):
-    return os.path.join(LOG_DIR, f"signals_{date_obj.strftime('%Y-%m-%d')}.csv")
+def log_path_for(date_obj, ticker=TICKER):
+    return log_path_for_day(date_obj.strftime('%Y-%m-%d'), ticker)
+
+def log_path_for_day(day_str, ticker=TICKER):
+    return _sink.path_for(ticker, day_str)
+
+def state_path_for(ticker):
+    return os.path.join(STATE_DIR, f"last_state_{ticker}.txt")
 
 def read_text(path, default=""):
     try:
@@ -37,122 +81,278 @@ def read_text(path, default=""):
     except FileNotFoundError:
         return default
 
-def write_text(path, text):
-    ensure_dirs()
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
+def append_log_row(ts, price, state, ticker=TICKER):
+    """티커별 하루 단위 로그에 한 줄 추가 (버퍼링 - 실제 기록은 LogSink 가 묶어서 처리)"""
+    _sink.write(ts, ticker, price, state)
+    _agg.update(ts, ticker, price, state)
 
-def append_log_row(ts, price, state):
-    """하루 단위 로그 파일에 한 줄 추가"""
-    ensure_dirs()
-    log_path = log_path_for(ts)
-    header_needed = not os.path.exists(log_path)
-    with open(log_path, "a", encoding="utf-8") as f:
-        if header_needed:
-            f.write("timestamp,ticker,price,state\n")
-        f.write(f"{ts.strftime('%Y-%m-%d %H:%M:%S')},{TICKER},{price},{state}\n")
-
-def summarize_day(day_str):
-    """해당 날짜의 로그를 읽어 일일 요약(ENTRY/EXIT 횟수, 시가/종가, 고가/저가) 생성"""
-    path = os.path.join(LOG_DIR, f"signals_{day_str}.csv")
+def summarize_log(day_str, ticker=TICKER):
+    """해당 날짜/티커의 로그를 읽어 일일 요약 계산 (집계기 체크포인트가 없을 때만 사용)"""
+    path = log_path_for_day(day_str, ticker)
     if not os.path.exists(path):
         return None  # 로그가 없으면 요약 불가
 
-    # 간단 파서(표준 라이브러리만 사용)
-    rows = []
-    with open(path, "r", encoding="utf-8") as f:
-        lines = [line.strip() for line in f if line.strip()]
-    if len(lines) <= 1:
+    _sink.flush()
+    summary = summarize_signals(read_signal_log(path, tickers=[ticker]))
+    if summary is None:
         return None  # 데이터 없음
-    for line in lines[1:]:
-        ts, ticker, price, state = line.split(",")
-        rows.append((ts, ticker, float(price), state))
+    return {"date": day_str, "ticker": ticker, **summary}
 
-    if not rows:
+def summarize_day(day_str, ticker=TICKER):
+    """집계기에서 해당 날짜/티커의 일일 요약(ENTRY/EXIT 횟수, 시가/종가, 고가/저가)을 꺼내 요약 CSV에 추가"""
+    summary = _agg.day_summary(day_str, ticker) or summarize_log(day_str, ticker)
+    if summary is None:
         return None
 
-    prices = [r[2] for r in rows]
-    open_price = rows[0][2]
-    close_price = rows[-1][2]
-    high_price = max(prices)
-    low_price = min(prices)
-    entry_cnt = sum(1 for r in rows if r[3] == "ENTRY")
-    exit_cnt  = sum(1 for r in rows if r[3] == "EXIT")
-
     # 요약 CSV에 추가(헤더 자동)
-    header_needed = not os.path.exists(DAILY_SUMMARY_CSV)
-    with open(DAILY_SUMMARY_CSV, "a", encoding="utf-8") as f:
-        if header_needed:
-            f.write("date,ticker,open,high,low,close,entry_count,exit_count\n")
-        f.write(f"{day_str},{TICKER},{open_price},{high_price},{low_price},{close_price},{entry_cnt},{exit_cnt}\n")
-    return {
-        "date": day_str,
-        "open": open_price,
-        "high": high_price,
-        "low": low_price,
-        "close": close_price,
-        "entry_count": entry_cnt,
-        "exit_count": exit_cnt
-    }
-
-def check_signal_once():
-    # 1) 최신 데이터 갱신
-    fetch_prices()  # data/price.csv 업데이트
-
-    # 2) 지표 계산
-    df = load_price_data("data/price.csv")
-    df = calc_macd(df)
-    df = calc_sma(df, 200)
-
-    # 3) 복합전략 신호
-    combo = macd_with_ma_filter(df)
-    last = combo.tail(1).iloc[0]
-
-    # 4) 상태 판정
-    state = "NONE"
+    append_summary({**summary, "date": day_str, "ticker": ticker}, DAILY_SUMMARY_CSV)
+    return summary
+
+def candle_key(ts):
+    """ts 시각에 진행 중인 일봉의 키 (저장소 일봉 Date 와 같은 자정 Timestamp)"""
+    return pd.Timestamp((ts - timedelta(hours=DAY_CANDLE_START_HOUR)).date())
+
+def get_bus():
+    global _bus
+    if _bus is None:
+        # NONE 으로 바뀌는 것도 알림 ("변화 없음")
+        _bus = make_bus(quiet_kinds=())
+        for ticker, state in _states.items():
+            _bus.prime(ticker, ALERT_RULE, state)
+    return _bus
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = make_client()
+    return _client
+
+def new_engine():
+    return LiveMacd(sma_window=SMA_WINDOW)
+
+def seed_engine(ticker):
+    """저장소의 전체 일봉 이력으로 티커의 지표 엔진을 초기화"""
+    with stage("seed", ticker):
+        df = _store.load_price_frame(ticker, "day")
+        _engines[ticker] = new_engine().seed(df)
+    count("seeds")
+    return _engines[ticker]
+
+def roll_engine(ticker):
+    """일봉이 바뀌었을 때: 저장소의 최근 봉으로 마감 종가 확정 + 새 봉 추가"""
+    engine = _engines[ticker]
+    with stage("roll", ticker):
+        recent = _store.load_price_frame(ticker, "day", tail=RECENT_BARS)
+        if recent.index[0] <= engine.last_key:
+            for key, close in zip(recent.index, recent["Close"]):
+                engine.update(key, close)
+            return engine
+    return seed_engine(ticker)   # 중간에 빠진 봉이 있으면 저장소 이력으로 다시 시드
+
+async def refresh_engines(client, tickers, ts):
+    """
+    모든 티커를 한 사이클에 갱신 (요청은 클라이언트가 요청 제한 안에서 동시에 처리)
+       - 시드 안 된 티커 / 일봉이 바뀐 티커: 저장소를 새 봉만 동기화한 뒤 반영
+       - 나머지는 현재가 묶음 요청(PRICE_BATCH 개당 1회)으로 진행 중인 봉을 교체
+    반환: {티커: 스냅샷}
+    """
+    new = [t for t in tickers if t not in _engines]
+    if new:
+        with stage("store_sync"):
+            synced = await _store.sync_many(client, new, "day")
+        for ticker in synced:
+            if _store.length(ticker, "day"):
+                seed_engine(ticker)
+
+    key = candle_key(ts)
+    live = [t for t in tickers if t in _engines]
+    rolling = [t for t in live if key > _engines[t].last_key]
+    steady = [t for t in live if key <= _engines[t].last_key]
+
+    async def no_prices():
+        return {}
+
+    with stage("fetch"):   # 현재가 + 일봉이 바뀐 티커의 새 봉 (동시에)
+        prices, synced = await asyncio.gather(
+            client.get_current_price(steady) if steady else no_prices(),
+            _store.sync_many(client, rolling, "day"),
+        )
+    count("prices", len(prices))
+    for ticker in synced:
+        roll_engine(ticker)
+    with stage("indicators"):
+        for ticker, price in prices.items():
+            if price is not None:
+                engine = _engines[ticker]
+                engine.update(engine.last_key, price)
+        return {t: _engines[t].snapshot() for t in live if t in _engines}
+
+def signal_state(last):
     if last["Entry"]:
-        state = "ENTRY"
-    elif last["Exit"]:
-        state = "EXIT"
+        return "ENTRY"
+    if last["Exit"]:
+        return "EXIT"
+    return "NONE"
 
+def handle_ticker(ticker, last, ts):
+    """한 티커의 상태 판정 → 로그 → 알림 버스로 신호 (같은 상태 반복은 버스에서 걸러짐)"""
+    state = signal_state(last)
     price = float(last["Close"])
-    ts = now_kr()
-
-    # 5) 로그 남기기 (매 루프 한 줄씩 기록)
-    append_log_row(ts, price, state)
-
-    # 6) 변화 있을 때만 콘솔 알림
-    prev_state = read_text(STATE_FILE, default="")
-    if state != prev_state:
-        if state == "NONE":
-            print(f"[{TICKER}] 변화 없음")
-        else:
-            print(f"[{TICKER}] {state} 신호 - 종가: {price:,.0f}  ({ts.strftime('%Y-%m-%d %H:%M:%S')})")
-        write_text(STATE_FILE, state)
+    count(f"signals.{state}")
+
+    # 로그 남기기 (매 루프 한 줄씩 기록)
+    append_log_row(ts, price, state, ticker)
+
+    # 상태는 메모리 → 사이클 끝에 체크포인트로 저장
+    if ticker not in _states:
+        _states[ticker] = read_text(state_path_for(ticker), default="")   # 예전 형식 파일에서 이어받기
+        get_bus().prime(ticker, ALERT_RULE, _states[ticker])
+    _states[ticker] = state
+    if state == "NONE":
+        msg = f"[{ticker}] 변화 없음"
     else:
-        print(f"[{TICKER}] 유지 - {state} (가격 {price:,.0f})")
+        msg = f"[{ticker}] {state} 신호 - 종가: {price:,.0f}  ({ts.strftime('%Y-%m-%d %H:%M:%S')})"
+    get_bus().emit(Signal(ticker, ALERT_RULE, state, price, ts, msg))
+
+def check_signal_once(tickers=None):
+    asyncio.run(run_cycle(get_client(), tickers or TICKERS, now_kr()))
+
+async def run_cycle(client, tickers, ts):
+    with stage("cycle"):
+        await _run_cycle(client, tickers, ts)
+    count("cycles")
+    maybe_write()
+
+async def _run_cycle(client, tickers, ts):
+    # 1~3) 최신 가격 반영 + 지표/복합전략 신호 (티커별 증분 계산)
+    with stage("refresh"):
+        snaps = await refresh_engines(client, tickers, ts)
+
+    # 4~6) 티커별 상태 판정 / 로그 / 알림
+    for ticker, last in snaps.items():
+        with stage("handle", ticker):
+            handle_ticker(ticker, last, ts)
 
     # 7) 날짜 바뀌면 어제자 요약 생성
+    global _last_day_done
     today_str = ts.strftime("%Y-%m-%d")
-    last_day_done = read_text(LAST_DAY_FILE, default="")
+    if _last_day_done is None:
+        _last_day_done = read_text(LAST_DAY_FILE, default="")
     # 날짜가 바뀌었고, 아직 어제자 요약을 안 했다면 요약 실행
-    if last_day_done != today_str:
+    if _last_day_done != today_str:
         # 어제 날짜
         yday_str = (ts - timedelta(days=1)).strftime("%Y-%m-%d")
-        summary = summarize_day(yday_str)
-        if summary:
-            print(f"[요약] {yday_str} → open:{summary['open']:.0f} high:{summary['high']:.0f} low:{summary['low']:.0f} close:{summary['close']:.0f} (ENTRY:{summary['entry_count']} / EXIT:{summary['exit_count']})")
-        write_text(LAST_DAY_FILE, today_str)
+        for ticker in tickers:
+            with stage("summary", ticker):
+                summary = summarize_day(yday_str, ticker)
+            if summary:
+                print(f"[요약] {ticker} {yday_str} → open:{summary['open']:.0f} high:{summary['high']:.0f} low:{summary['low']:.0f} close:{summary['close']:.0f} (ENTRY:{summary['entry_count']} / EXIT:{summary['exit_count']})")
+        _last_day_done = today_str
 
-def main():
-    ensure_dirs()
-    print("=== DRYRUN 루프 시작 (Ctrl+C 로 종료) ===")
-    while True:
+    # 8) 체크포인트 저장 (재시작 시 이력 재계산/로그 재스캔 없이 이어서 진행)
+    with stage("checkpoint"):
+        _sink.flush()   # 체크포인트의 집계기가 센 행은 로그 파일에도 있도록 (사이클 단위 기록)
+        save_state(ts)
+
+# ===== 체크포인트 =====
+def save_state(ts, path=CHECKPOINT_FILE):
+    """티커별 엔진 상태 + 마지막 알림 상태 + 요약 처리 날짜 + 요약 집계기를 한 파일로 원자적 저장"""
+    tickers = {}
+    for ticker in set(_engines) | set(_states):
+        entry = {"state": _states.get(ticker, "")}
+        engine = _engines.get(ticker)
+        if engine is not None:
+            st = engine.to_state()
+            st["last_key"] = st["last_key"].isoformat()   # 일봉 키(Timestamp) → 문자열
+            entry["engine"] = st
+        tickers[ticker] = entry
+    save_checkpoint({"ts": ts.isoformat(), "last_day": _last_day_done, "tickers": tickers,
+                     "agg": _agg.to_state()}, path)
+
+def restore_state(path=CHECKPOINT_FILE):
+    """
+    체크포인트로 엔진/알림 상태 복원 (웜 스타트). 반환: 엔진을 복원한 티커 수
+    - 파일이 없거나 손상됐으면 아무것도 안 함 → 첫 사이클에서 저장소 이력으로 시드 (콜드 스타트)
+    - 멈춰 있던 사이 일봉이 바뀌었으면 첫 사이클의 roll_engine 이 새 봉만 받아 반영
+      (RECENT_BARS 보다 많이 밀렸으면 로컬 저장소 이력으로 다시 시드)
+    """
+    global _last_day_done, _agg
+    state = load_checkpoint(path)
+    if state is None:
+        return 0
+    if "agg" in state:   # 예전 체크포인트에는 없음 → AGG_STATE_FILE 에서 읽은 것 유지
+        _agg = SummaryAggregator.from_state(state["agg"])
+    params = new_engine().to_state()["params"]
+    restored = 0
+    for ticker, entry in state["tickers"].items():
+        _states[ticker] = entry["state"]
+        st = entry.get("engine")
+        if st is None or st["params"] != params:
+            continue   # 설정(기간/adjust/최소 봉 수)이 바뀐 엔진은 버리고 새로 시드
+        st["last_key"] = pd.Timestamp(st["last_key"])
+        _engines[ticker] = LiveMacd.from_state(st)
+        restored += 1
+    _last_day_done = state.get("last_day") or None
+    return restored
+
+# ===== WebSocket 모드 =====
+async def stream_main(tickers=None):
+    """
+    REST 폴링 대신 체결 스트림으로 실행 (python run_loop.py --stream)
+       - 현재가는 피드의 마지막 체결가 (사이클마다 현재가 요청 없음)
+       - 1분봉이 마감되는 순간(어느 티커든 그 분의 첫 마감 이벤트) 바로 한 사이클
+       - 끊김/재연결/빈 구간 보충은 WsFeed 가 처리
+    """
+    from ws_feed import WsFeed, StreamPriceClient
+
+    tickers = tickers or TICKERS
+    rest = get_client()
+    last_bar = None
+
+    async def cycle():
+        # REST 모드의 BarScheduler 처럼 한 사이클 실패는 기록만 하고 스트림은 계속
         try:
-            check_signal_once()
+            await run_cycle(client, tickers, now_kr())
         except Exception as e:
-            print("ERROR:", e)
-        time.sleep(INTERVAL_SEC)
+            error("cycle", e)
+
+    async def on_event(ev):
+        nonlocal last_bar
+        if ev["type"] != "close" or (last_bar is not None and ev["Date"] <= last_bar):
+            return
+        last_bar = ev["Date"]
+        await cycle()
+
+    feed = WsFeed(tickers, on_event, client=rest)
+    client = StreamPriceClient(rest, feed)
+    add_source("ws", lambda: dict(feed.stats, late=feed.agg.late, dupes=feed.agg.dupes))
+    await cycle()   # 시작 직후 한 번 (시드 포함)
+    await feed.run()
+
+def main():
+    # SIGTERM 으로 종료돼도 atexit 이 돌아 버퍼에 남은 로그 행을 기록하도록
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    ensure_dirs()
+    setup_metrics("run_loop")   # LOOP_METRICS_PORT 엔드포인트 / LOOP_PROFILE·SIGUSR1 프로파일러
+    add_source("client", lambda: dict(get_client().stats))
+    add_source("alerts", lambda: _bus.stats() if _bus is not None else {})   # 지표 스레드에서 버스를 만들지 않음
+    print(f"=== DRYRUN 루프 시작: {len(TICKERS)}개 티커 (Ctrl+C 로 종료) ===")
+    restored = restore_state()
+    if restored:
+        print(f"체크포인트에서 {restored}개 티커 상태 복원 (웜 스타트)")
+    get_bus()   # 복원한 상태로 중복 제거 상태를 채워 메인 스레드에서 한 번만 생성
+    if "--stream" in sys.argv[1:]:
+        asyncio.run(stream_main())
+        return
+    try:
+        check_signal_once()   # 시작 직후 한 번 (시드 포함) - 실패해도 다음 경계에서 다시 시도
+    except Exception as e:
+        error("signal", e)
+    # 이후에는 INTERVAL_SEC 경계(분봉 마감)마다 실행 - 작업 시간만큼 주기가 밀리지 않음
+    sched = BarScheduler()
+    sched.add("signal", INTERVAL_SEC, lambda bar_close: check_signal_once())
+    add_source("scheduler", sched.metrics)
+    sched.run_forever(report_every=METRICS_EVERY_SEC)
 
 if __name__ == "__main__":
     main()
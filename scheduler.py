@@ -0,0 +1,144 @@
+# scheduler.py
+# 봉 마감 시각에 맞춰 작업을 실행하는 스케줄러 (고정 sleep 루프 대체)
+# - 봉 경계는 UTC epoch 기준 격자 (업비트 분/시간봉, 일봉 09:00 KST 와 동일)
+# - 다음 실행 시각을 절대 시각으로 계산해 대기 → 작업 시간만큼 주기가 밀리지 않음
+# - 휴식 시간대(quiet) 동안은 건너뜀 (alert_macd.is_active_time 일반화)
+# - 실행이 늦어져 경계를 놓치면 마지막 경계 1회로 몰아서 실행(catch_up) + 놓친 횟수 기록
+# - 작업별 지연(봉 마감 → 실행 시작)/소요 시간 지표
+
+import time
+from collections import deque
+from datetime import datetime
+
+from candle_store import INTERVAL_SEC
+from instrument import error
+
+CLOSE_DELAY_SEC = 2.0     # 봉 마감 후 거래소 캔들이 확정될 때까지 기다릴 시간
+LATENCY_WINDOW = 500      # 분위수 계산에 쓸 최근 실행 기록 수
+
+
+def interval_seconds(interval):
+    """"minute1"/"minute60"/"day" 등 또는 초(숫자) → 초"""
+    if isinstance(interval, (int, float)):
+        return float(interval)
+    return float(INTERVAL_SEC[interval])
+
+
+def in_quiet(now, windows):
+    """now 가 휴식 구간 [("HH:MM", "HH:MM"), ...] 중 하나에 들어가면 True (자정 넘김 구간 허용)"""
+    hm = now.strftime("%H:%M")
+    for start, end in windows:
+        if start <= end:
+            if start <= hm < end:
+                return True
+        elif hm >= start or hm < end:
+            return True
+    return False
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Job:
+    def __init__(self, name, interval, fn, delay=CLOSE_DELAY_SEC, quiet=(), catch_up=True):
+        self.name = name
+        self.step = interval_seconds(interval)
+        self.fn = fn                # fn(bar_close: datetime) - 마감된 봉의 경계 시각을 받음
+        self.delay = delay
+        self.quiet = list(quiet)
+        self.catch_up = catch_up
+        self.next_boundary = None
+        # 지표
+        self.runs = 0
+        self.errors = 0
+        self.missed = 0
+        self.skipped_quiet = 0
+        self.latency = deque(maxlen=LATENCY_WINDOW)    # 봉 마감 → 실행 시작 (초)
+        self.duration = deque(maxlen=LATENCY_WINDOW)   # 작업 소요 (초)
+
+    def schedule_from(self, now_ts):
+        """now 이후 첫 경계"""
+        self.next_boundary = (now_ts // self.step + 1) * self.step
+
+    @property
+    def due(self):
+        return self.next_boundary + self.delay
+
+    def metrics(self):
+        return {
+            "job": self.name,
+            "runs": self.runs,
+            "errors": self.errors,
+            "missed": self.missed,
+            "skipped_quiet": self.skipped_quiet,
+            "latency_p50": round(_percentile(self.latency, 0.50), 4),
+            "latency_p95": round(_percentile(self.latency, 0.95), 4),
+            "latency_max": round(max(self.latency, default=0.0), 4),
+            "duration_p50": round(_percentile(self.duration, 0.50), 4),
+            "duration_p95": round(_percentile(self.duration, 0.95), 4),
+        }
+
+
+class BarScheduler:
+    def __init__(self, clock=time.time, sleep=time.sleep):
+        self.jobs = []
+        self.clock = clock
+        self.sleep = sleep
+
+    def add(self, name, interval, fn, delay=CLOSE_DELAY_SEC, quiet=(), catch_up=True):
+        job = Job(name, interval, fn, delay, quiet, catch_up)
+        job.schedule_from(self.clock())
+        self.jobs.append(job)
+        return job
+
+    def _run(self, job, now_ts):
+        # 놓친 경계: 현재 시각 기준으로 이미 지나간 경계가 더 있으면 마지막 것만 실행
+        behind = int((now_ts - job.due) // job.step)
+        if behind > 0:
+            job.missed += behind
+            job.next_boundary += behind * job.step
+            if not job.catch_up:
+                job.next_boundary += job.step   # 늦은 경계는 실행하지 않고 다음 경계부터
+                return
+
+        boundary = datetime.fromtimestamp(job.next_boundary)
+        if in_quiet(boundary, job.quiet):
+            job.skipped_quiet += 1
+        else:
+            started = self.clock()
+            job.latency.append(started - job.next_boundary)
+            try:
+                job.fn(boundary)
+            except Exception as e:
+                job.errors += 1
+                error(job.name, e)
+            job.runs += 1
+            job.duration.append(self.clock() - started)
+        job.next_boundary += job.step
+
+    def run_pending(self):
+        """지금까지 도래한 작업 실행. 반환: 다음 실행까지 남은 초"""
+        now_ts = self.clock()
+        for job in sorted(self.jobs, key=lambda j: j.due):
+            if job.due <= now_ts:
+                self._run(job, now_ts)
+                now_ts = self.clock()
+        return max(0.0, min(j.due for j in self.jobs) - self.clock())
+
+    def run_forever(self, report_every=None):
+        """report_every 초마다 작업별 지표 출력 (None 이면 출력 안 함)"""
+        last_report = self.clock()
+        while True:
+            wait = self.run_pending()
+            if report_every and self.clock() - last_report >= report_every:
+                for m in self.metrics():
+                    print(f"[스케줄러] {m}")
+                last_report = self.clock()
+            self.sleep(wait)
+
+    def metrics(self):
+        return [job.metrics() for job in self.jobs]
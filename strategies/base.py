@@ -0,0 +1,125 @@
+# strategies/base.py
+# 전략 공통 인터페이스
+# - 전략은 필요한 지표를 (이름, 파라미터) 로 선언하고, 신호는 (Entry, Exit) bool 배열로 돌려줌
+# - 지표는 데이터셋(IndicatorSet)마다 한 번만 계산해 여러 전략이 함께 사용
+#   → 전략 10개를 같은 데이터에 돌려도 EMA/SMA 계산은 파라미터 조합당 1회
+# - 입력 배열은 복사/변경하지 않음 (memmap 뷰 그대로 사용 가능)
+# - cache(indicator_cache.IndicatorCache) 를 주면 EMA/SMA 는 데이터셋을 넘어서도 재사용
+
+import numpy as np
+
+from backtest import ema_values, sma_values
+
+# 지표 이름 → fn(ind, **params). fn 안에서 ind.get(...) 으로 다른 지표를 재사용할 수 있음
+INDICATORS = {}
+
+
+def indicator(name):
+    """지표 계산 함수 등록 데코레이터"""
+    def register(fn):
+        INDICATORS[name] = fn
+        return fn
+    return register
+
+
+@indicator("ema")
+def _ema(ind, span):
+    return ind.ema(ind.close, span, fp=ind.fingerprint)
+
+
+@indicator("sma")
+def _sma(ind, window):
+    if ind.cache is not None:
+        return ind.cache.get("sma", ind.close, fp=ind.fingerprint, window=window)
+    return sma_values(ind.close, window)
+
+
+@indicator("macd")
+def _macd(ind, short=12, long=26):
+    return ind.get("ema", span=short) - ind.get("ema", span=long)
+
+
+@indicator("macd_signal")
+def _macd_signal(ind, short=12, long=26, signal=9):
+    return ind.ema(ind.get("macd", short=short, long=long), signal)
+
+
+@indicator("macd_cross")
+def _macd_cross(ind, short=12, long=26, signal=9):
+    """(GoldenCross, DeadCross) - 첫 봉은 이전 값이 없으므로 False"""
+    curr = ind.get("macd", short=short, long=long) - ind.get("macd_signal", short=short,
+                                                              long=long, signal=signal)
+    golden = np.zeros(len(curr), dtype=bool)
+    dead = np.zeros(len(curr), dtype=bool)
+    golden[1:] = (curr[:-1] <= 0) & (curr[1:] > 0)
+    dead[1:] = (curr[:-1] >= 0) & (curr[1:] < 0)
+    return golden, dead
+
+
+class IndicatorSet:
+    """데이터셋 하나(가격 배열)의 지표 저장소 - 같은 (이름, 파라미터) 는 한 번만 계산"""
+
+    def __init__(self, close, high=None, low=None, cache=None):
+        self.close = close
+        self.high = high
+        self.low = low
+        self.cache = cache
+        self._fp = None
+        self._values = {}
+        self.computed = 0      # 실제로 계산한 지표 수
+
+    @property
+    def fingerprint(self):
+        """close 지문 (캐시 사용 시 한 번만 계산)"""
+        if self._fp is None and self.cache is not None:
+            self._fp = self.cache.fingerprint(self.close)
+        return self._fp
+
+    def ema(self, values, span, fp=None):
+        if self.cache is not None:
+            return self.cache.get("ema", values, fp=fp, span=span)
+        return ema_values(values, span)
+
+    @staticmethod
+    def key(name, params):
+        return (name, tuple(sorted(params.items())))
+
+    def get(self, name, **params):
+        key = self.key(name, params)
+        if key not in self._values:
+            self._values[key] = INDICATORS[name](self, **params)
+            self.computed += 1
+        return self._values[key]
+
+    def prepare(self, requires):
+        """선언된 의존 지표 [(이름, {파라미터}), ...] 를 미리 계산"""
+        for name, params in requires:
+            self.get(name, **params)
+        return self
+
+
+class Strategy:
+    """
+    전략 기본 클래스
+       - name     : 결과 구분용 이름
+       - requires : 필요한 지표 [(이름, {파라미터}), ...]
+       - signals  : IndicatorSet → (Entry, Exit) bool 배열
+    """
+    name = "strategy"
+
+    def requires(self):
+        return []
+
+    def signals(self, ind):
+        raise NotImplementedError
+
+
+def run_strategies(strategies, close, high=None, low=None, ind=None, cache=None):
+    """
+    여러 전략을 같은 데이터에 실행 (지표는 전략 간 공유)
+    반환: {전략 이름: (Entry, Exit)}
+    """
+    ind = ind or IndicatorSet(close, high, low, cache)
+    for s in strategies:
+        ind.prepare(s.requires())
+    return {s.name: s.signals(ind) for s in strategies}
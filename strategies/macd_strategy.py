@@ -1,32 +1,99 @@
-def macd_cross_signals(df):
-    df["Prev_diff"] = (df["MACD"] - df["Signal"]).shift(1)
-    df["Curr_diff"] = df["MACD"] - df["Signal"]
+import numpy as np
+import pandas as pd
+
+from strategies.base import Strategy
 
-    df["GoldenCross"] = (df["Prev_diff"] <= 0) & (df["Curr_diff"] > 0)
-    df["DeadCross"] = (df["Prev_diff"] >= 0) & (df["Curr_diff"] < 0)
+def _cross_arrays(df):
+    """입력 프레임을 바꾸지 않고 (GoldenCross, DeadCross) bool 배열 계산"""
+    curr = df["MACD"].to_numpy(dtype=float) - df["Signal"].to_numpy(dtype=float)
+    golden = np.zeros(len(curr), dtype=bool)
+    dead = np.zeros(len(curr), dtype=bool)
+    golden[1:] = (curr[:-1] <= 0) & (curr[1:] > 0)
+    dead[1:] = (curr[:-1] >= 0) & (curr[1:] < 0)
+    return golden, dead
 
-    signals = df[(df["GoldenCross"]) | (df["DeadCross"])]
-    return signals[["Close", "MACD", "Signal", "GoldenCross", "DeadCross"]]
+def macd_cross_signals(df):
+    golden, dead = _cross_arrays(df)
+    rows = golden | dead
+    signals = df.loc[rows, ["Close", "MACD", "Signal"]]
+    signals["GoldenCross"] = golden[rows]
+    signals["DeadCross"] = dead[rows]
+    return signals
 
 def macd_with_ma_filter(df, ma_col="SMA200"):
     """
     룰:
        - 진입: MACD 골든크로스 AND 종가가 200일선 위
        - 청산: MACD 데드크로스
-       - 반환: 기존 컬럼 + Entry(매수신호), Exit(매도신호)
+       - 반환: Close/MACD/Signal/MA + GoldenCross/DeadCross + Entry(매수신호), Exit(매도신호)
+         (필요한 컬럼만 새로 만들고 입력 프레임 전체는 복사하지 않음)
     """
-    out = df.copy()
-    out["Prev_diff"] = (out["MACD"] - out["Signal"]).shift(1)
-    out["Curr_diff"] = out["MACD"] - out["Signal"]
+    golden, dead = _cross_arrays(df)
 
-    out["GoldenCross"] = (out["Prev_diff"] <= 0) & (out["Curr_diff"] > 0)
-    out["DeadCross"] = (out["Prev_diff"] >= 0) & (out["Curr_diff"] < 0)
-    
     #200일선 필터
-    above_ma = out["Close"] > out[ma_col]
-    
-    out["Entry"] = out["GoldenCross"] & above_ma
-    out["Exit"] = out["DeadCross"]
+    above_ma = df["Close"].to_numpy(dtype=float) > df[ma_col].to_numpy(dtype=float)
+
+    return pd.DataFrame({
+        "Close": df["Close"], "MACD": df["MACD"], "Signal": df["Signal"], ma_col: df[ma_col],
+        "GoldenCross": golden, "DeadCross": dead,
+        "Entry": golden & above_ma, "Exit": dead,
+    }, index=df.index)
+
+def ma_filter_arrays(macd, signal, close, ma):
+    """
+    macd_with_ma_filter 와 같은 룰을 배열로 계산 (입력 복사/변경 없음)
+       - 반환: (Entry, Exit) bool 배열
+    """
+    curr = macd - signal
+    prev = curr[:-1]
+    golden = (prev <= 0) & (curr[1:] > 0)
+    dead = (prev >= 0) & (curr[1:] < 0)
+
+    entry = np.zeros(len(curr), dtype=bool)
+    exit_ = np.zeros(len(curr), dtype=bool)
+    entry[1:] = golden & (close[1:] > ma[1:])
+    exit_[1:] = dead
+    return entry, exit_
+
+def hist_alert(prev_hist, curr_hist, prev_ma5, curr_ma5):
+    """
+    alert_macd 룰 (히스토그램 + 5MA):
+       - "GOLDEN" : 히스토그램 파랑→핑크 전환 (이전 < 0, 현재 > 0)
+       - "PEAK"   : 핑크 상태인데 5MA 하락 전환
+       - 해당 없으면 None
+    """
+    if prev_hist < 0 and curr_hist > 0:
+        return "GOLDEN"
+    if curr_hist > 0 and curr_ma5 < prev_ma5:
+        return "PEAK"
+    return None
+
+# ===== 전략 클래스 (strategies.base 인터페이스) =====
+class MacdCross(Strategy):
+    """MACD 골든크로스 진입 / 데드크로스 청산"""
+
+    def __init__(self, short=12, long=26, signal=9):
+        self.params = {"short": short, "long": long, "signal": signal}
+        self.name = f"macd_cross_{short}_{long}_{signal}"
+
+    def requires(self):
+        return [("macd_cross", self.params)]
+
+    def signals(self, ind):
+        golden, dead = ind.get("macd_cross", **self.params)
+        return golden, dead
+
+class MacdMaFilter(Strategy):
+    """macd_with_ma_filter 와 같은 룰: 골든크로스 AND 종가 > SMA(window) 진입 / 데드크로스 청산"""
+
+    def __init__(self, short=12, long=26, signal=9, window=200):
+        self.params = {"short": short, "long": long, "signal": signal}
+        self.window = window
+        self.name = f"macd_ma_{short}_{long}_{signal}_{window}"
+
+    def requires(self):
+        return [("macd_cross", self.params), ("sma", {"window": self.window})]
 
-    cols = ["Close", "MACD", "Signal", ma_col, "GoldenCross", "DeadCross", "Entry", "Exit"]
-    return out[cols]
\ No newline at end of file
+    def signals(self, ind):
+        golden, dead = ind.get("macd_cross", **self.params)
+        return golden & (ind.close > ind.get("sma", window=self.window)), dead
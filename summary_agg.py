@@ -0,0 +1,167 @@
+# summary_agg.py
+# run_loop 로그 행을 받는 즉시 갱신하는 시가/고가/저가/종가 + ENTRY/EXIT 집계기
+# - 티커별로 당일은 1시간 버킷, 지난 날은 1일 버킷으로 보관 (로그 파일을 다시 읽지 않음)
+# - 같은 버킷들로 시간/일/주 단위 롤업
+# - 작은 JSON 상태로 저장 → 재시작 시 그대로 이어서 집계
+#   (run_loop 는 엔진 상태와 같은 체크포인트 파일에 함께 저장, AGG_STATE_FILE 은 예전 형식)
+
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+AGG_STATE_FILE = "reports/agg_state.json"
+KEEP_HOURLY_DAYS = 2    # 시간 버킷을 유지할 일수 (그 이전은 일 버킷으로 합침)
+KEEP_DAYS = 35          # 일 버킷을 유지할 일수 (주 단위 롤업용)
+
+HOUR_FMT = "%Y-%m-%d %H"
+DAY_FMT = "%Y-%m-%d"
+
+
+def _new_bucket(price):
+    return {"open": price, "high": price, "low": price, "close": price,
+            "entry_count": 0, "exit_count": 0, "rows": 0}
+
+
+def _merge(dst, src):
+    """시간순으로 src 를 dst 뒤에 이어 붙임"""
+    if dst is None:
+        return dict(src)
+    dst["high"] = max(dst["high"], src["high"])
+    dst["low"] = min(dst["low"], src["low"])
+    dst["close"] = src["close"]
+    dst["entry_count"] += src["entry_count"]
+    dst["exit_count"] += src["exit_count"]
+    dst["rows"] += src["rows"]
+    return dst
+
+
+def _period_key(key, freq):
+    """버킷 키(시간 'YYYY-MM-DD HH' 또는 일 'YYYY-MM-DD') → 롤업 구간 키"""
+    if freq == "hour":
+        return key if len(key) > len("YYYY-MM-DD") else None
+    day = key[:10]
+    if freq == "day":
+        return day
+    if freq == "week":
+        d = datetime.strptime(day, DAY_FMT)
+        return (d - timedelta(days=d.weekday())).strftime(DAY_FMT)   # 그 주 월요일
+    raise ValueError(f"지원하지 않는 롤업 단위: {freq}")
+
+
+class SummaryAggregator:
+    def __init__(self):
+        self.hourly = {}   # 티커 → {"YYYY-MM-DD HH": 버킷}
+        self.daily = {}    # 티커 → {"YYYY-MM-DD": 버킷} (지난 날만)
+
+    # ===== 갱신 =====
+    def update(self, ts, ticker, price, state):
+        price = float(price)
+        key = ts.strftime(HOUR_FMT)
+        buckets = self.hourly.setdefault(ticker, {})
+        b = buckets.get(key)
+        if b is None:
+            b = buckets[key] = _new_bucket(price)
+            self._compact(ticker, ts)
+        b["high"] = max(b["high"], price)
+        b["low"] = min(b["low"], price)
+        b["close"] = price
+        b["rows"] += 1
+        if state == "ENTRY":
+            b["entry_count"] += 1
+        elif state == "EXIT":
+            b["exit_count"] += 1
+
+    def _compact(self, ticker, ts):
+        """오래된 시간 버킷은 일 버킷으로 합치고, 아주 오래된 일 버킷은 버림"""
+        hour_cut = (ts - timedelta(days=KEEP_HOURLY_DAYS)).strftime(DAY_FMT)
+        day_cut = (ts - timedelta(days=KEEP_DAYS)).strftime(DAY_FMT)
+        hourly = self.hourly.get(ticker, {})
+        daily = self.daily.setdefault(ticker, {})
+        for key in sorted(k for k in hourly if k[:10] < hour_cut):
+            daily[key[:10]] = _merge(daily.get(key[:10]), hourly.pop(key))
+        for key in [k for k in daily if k < day_cut]:
+            del daily[key]
+
+    # ===== 조회 =====
+    def rollup(self, freq="day", ticker=None):
+        """
+        freq = "hour" / "day" / "week"
+        반환: [{"period", "ticker", "open", "high", "low", "close", "entry_count", "exit_count"}, ...]
+        """
+        tickers = [ticker] if ticker else sorted(set(self.hourly) | set(self.daily))
+        rows = []
+        for t in tickers:
+            merged = {}
+            buckets = list(self.daily.get(t, {}).items()) + list(self.hourly.get(t, {}).items())
+            for key, b in sorted(buckets):
+                period = _period_key(key, freq)
+                if period is not None:
+                    merged[period] = _merge(merged.get(period), b)
+            for period, b in merged.items():
+                rows.append({"period": period, "ticker": t, "open": b["open"], "high": b["high"],
+                             "low": b["low"], "close": b["close"],
+                             "entry_count": b["entry_count"], "exit_count": b["exit_count"]})
+        return rows
+
+    def day_summary(self, day_str, ticker):
+        """summarize_day 와 같은 형식의 dict (데이터 없으면 None)"""
+        for row in self.rollup("day", ticker):
+            if row["period"] == day_str:
+                row["date"] = row.pop("period")
+                return row
+        return None
+
+    # ===== 체크포인트 =====
+    def to_state(self):
+        return {"hourly": self.hourly, "daily": self.daily}
+
+    @classmethod
+    def from_state(cls, state):
+        agg = cls()
+        agg.hourly = state.get("hourly", {})
+        agg.daily = state.get("daily", {})
+        return agg
+
+    def save(self, path=AGG_STATE_FILE):
+        """임시 파일에 쓴 뒤 교체 → 중간에 죽어도 이전 체크포인트는 온전"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_state(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=AGG_STATE_FILE):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls.from_state(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return cls()
+
+
+def write_rollup(agg, freq, out_path=None):
+    """롤업 결과를 reports/summary_{freq}.csv 로 저장"""
+    out_path = out_path or f"reports/summary_{freq}.csv"
+    rows = agg.rollup(freq)
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["period", "ticker", "open", "high", "low", "close",
+                                          "entry_count", "exit_count"])
+        w.writeheader()
+        w.writerows(rows)
+    return out_path
+
+
+if __name__ == "__main__":
+    from checkpoint import load_checkpoint
+
+    freq = sys.argv[1] if len(sys.argv) > 1 else "day"
+    state = load_checkpoint()
+    if state and "agg" in state:
+        agg = SummaryAggregator.from_state(state["agg"])
+    else:
+        agg = SummaryAggregator.load(AGG_STATE_FILE)
+    path = write_rollup(agg, freq)
+    print(f"✅ 롤업 저장: {path}")
@@ -0,0 +1,168 @@
+# summary_io.py
+# daily_summary.csv / 신호 로그(signals_YYYY-MM-DD.csv[.gz]) 공용 읽기·쓰기
+# - 한 번 훑어서 열(column)별 NumPy 배열로 변환 (행마다 dict/strptime 만들지 않음)
+# - 티커/기간 필터는 변환 전에 문자열 비교로 적용 → 필요한 행만 숫자로 바꿈
+#   (날짜·시각은 ISO 형식이라 문자열 대소 비교 = 시간 순서)
+# - make_report / make_daily_report / run_loop 가 함께 사용
+#
+# 사용 예)
+#   t = read_summary(tickers=["KRW-XRP"], start="2024-01-01")
+#   t["close"], t["date"], t.row(-1)
+
+import os
+from itertools import compress
+
+import numpy as np
+
+from log_sink import open_log
+
+SUMMARY_CSV = "reports/daily_summary.csv"
+SUMMARY_HEADER = "date,ticker,open,high,low,close,entry_count,exit_count"
+LOG_HEADER = "timestamp,ticker,price,state"
+
+# 열 이름 → dtype (여기 없는 열은 문자열)
+DTYPES = {
+    "date": "datetime64[D]",
+    "timestamp": "datetime64[s]",
+    "open": np.float64, "high": np.float64, "low": np.float64, "close": np.float64,
+    "price": np.float64,
+    "entry_count": np.int64, "exit_count": np.int64,
+}
+
+
+class Table:
+    """열 이름 → 같은 길이의 NumPy 배열"""
+
+    def __init__(self, cols):
+        self.cols = cols
+
+    def __len__(self):
+        return len(next(iter(self.cols.values()))) if self.cols else 0
+
+    def __getitem__(self, name):
+        return self.cols[name]
+
+    @property
+    def columns(self):
+        return list(self.cols)
+
+    def take(self, idx):
+        return Table({k: v[idx] for k, v in self.cols.items()})
+
+    def row(self, i):
+        """i 번째 행 → dict (날짜/시각은 datetime, 숫자는 파이썬 float/int)"""
+        out = {}
+        for k, v in self.cols.items():
+            x = v[i]
+            if isinstance(x, np.datetime64):
+                x = x.astype("datetime64[s]")
+            out[k] = x.item() if isinstance(x, np.generic) else x
+        return out
+
+    def group_by(self, name):
+        """열 값별 Table (처음 나온 순서, 각 그룹 안의 행 순서 유지)"""
+        keys = self.cols[name]
+        uniq, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(inv, kind="stable")
+        bounds = np.searchsorted(inv[order], np.arange(len(uniq) + 1))
+        groups = {}
+        for g in np.argsort(first):
+            groups[str(uniq[g])] = self.take(order[bounds[g]:bounds[g + 1]])
+        return groups
+
+
+_NOT_SEP = bytes(b for b in range(256) if b not in b",\n")
+
+
+def _aligned(body, nc):
+    """모든 행의 필드 수가 nc 인지 - 구분자(쉼표/줄바꿈)만 남긴 바이트열이 ",,,\n" 반복과 같은지 한 번에 비교"""
+    seps = body.encode("utf-8").translate(None, _NOT_SEP)
+    rows = seps.count(b"\n") + 1
+    return seps == (b"," * (nc - 1) + b"\n") * (rows - 1) + b"," * (nc - 1)
+
+
+def _split_columns(f):
+    """파일 → (헤더, 열별 문자열 리스트). 본문을 한 번에 쪼갠 뒤 열 개수 간격으로 잘라냄"""
+    header = f.readline().strip().split(",")
+    nc = len(header)
+    body = f.read().replace("\r", "").strip()
+    flat = body.replace("\n", ",").split(",") if body else []
+    if body and not _aligned(body, nc):
+        # 빈 줄/깨진 행이 섞인 파일 → 행 단위로 다시 쪼갬 (열 개수가 맞는 행만)
+        # (필드 수 합계만 보면 3개 + 5개 행처럼 서로 상쇄되는 깨진 행이 열을 밀어버림)
+        rows = [r for r in (line.split(",") for line in body.split("\n")) if len(r) == nc]
+        flat = [x for r in rows for x in r]
+    return header, [flat[c::nc] for c in range(nc)]
+
+
+def _scan(f, key_col, time_col, tickers=None, start=None, end=None):
+    """헤더 + 쉼표 구분 행 → Table (필터는 숫자 변환 전에 문자열로 적용)"""
+    header, cols = _split_columns(f)
+    keys, times = cols[header.index(key_col)], cols[header.index(time_col)]
+    keep = None
+    if tickers is not None:
+        wanted = set(tickers)
+        keep = [k in wanted for k in keys]
+    if start is not None or end is not None:
+        lo, hi = str(start or ""), str(end or "")
+        n = len(hi)
+        in_range = [t >= lo and (not n or t[:n] <= hi) for t in times]   # 날짜만 주면 그날 끝까지 포함
+        keep = in_range if keep is None else [a and b for a, b in zip(keep, in_range)]
+    if keep is not None:
+        cols = [list(compress(col, keep)) for col in cols]
+    return Table({name: np.array(col, dtype=DTYPES.get(name, str))
+                  for name, col in zip(header, cols)})
+
+
+def _sorted_by(table, name):
+    order = np.argsort(table[name], kind="stable")
+    return table.take(order)
+
+
+# ===== 일일 요약 =====
+def read_summary(path=SUMMARY_CSV, tickers=None, start=None, end=None):
+    """
+    daily_summary.csv → 날짜순 Table
+    열: date(datetime64[D]), ticker, open/high/low/close(float64), entry_count/exit_count(int64)
+    start/end: 'YYYY-MM-DD' (양 끝 포함)
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path}가 없습니다. run_loop.py가 하루 이상 돌아간 뒤에 생성됩니다.")
+    with open(path, "r", encoding="utf-8") as f:
+        table = _scan(f, "ticker", "date", tickers, start, end)
+    return _sorted_by(table, "date")
+
+
+def append_summary(row, path=SUMMARY_CSV):
+    """요약 한 행 추가 (파일이 없으면 헤더부터)"""
+    header_needed = not os.path.exists(path)
+    with open(path, "a", encoding="utf-8") as f:
+        if header_needed:
+            f.write(SUMMARY_HEADER + "\n")
+        f.write(",".join(str(row[k]) for k in SUMMARY_HEADER.split(",")) + "\n")
+
+
+# ===== 신호 로그 =====
+def read_signal_log(path, tickers=None, start=None, end=None):
+    """
+    신호 로그(.csv / .csv.gz) → Table
+    열: timestamp(datetime64[s]), ticker, price(float64), state
+    start/end: 'YYYY-MM-DD' 또는 'YYYY-MM-DD HH:MM:SS' (양 끝 포함)
+    """
+    with open_log(path) as f:
+        return _scan(f, "ticker", "timestamp", tickers, start, end)
+
+
+def summarize_signals(log):
+    """신호 로그 Table → 시가/고가/저가/종가 + ENTRY/EXIT 횟수 (행이 없으면 None)"""
+    if not len(log):
+        return None
+    price, state = log["price"], log["state"]
+    return {
+        "open": float(price[0]),
+        "high": float(price.max()),
+        "low": float(price.min()),
+        "close": float(price[-1]),
+        "entry_count": int(np.count_nonzero(state == "ENTRY")),
+        "exit_count": int(np.count_nonzero(state == "EXIT")),
+    }
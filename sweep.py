@@ -0,0 +1,184 @@
+# sweep.py
+# MACD + SMA 필터 전략 파라미터 그리드 서치 (멀티프로세스)
+# - 가격 배열(Close/High/Low)은 공유 메모리에 한 번만 올리고 워커는 뷰로 붙어서 사용
+# - 작업 단위 = (short, long, signal, sma) 1개 + 그에 딸린 (손절, 익절) 조합 전체
+#   → MACD/신호는 작업당 한 번만 계산, EMA/SMA 는 워커별 지표 캐시(indicator_cache)로 조합 간 재사용
+# - 결과는 총수익률 순으로 정렬해 reports/sweep_results.csv 로 저장
+
+import os
+import csv
+import itertools
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from backtest import load_price_data, ema_values
+from indicator_cache import IndicatorCache, fingerprint
+from backtest_fast import simulate
+from metrics import batch_metrics
+from strategies.macd_strategy import ma_filter_arrays
+from backtest_equity import DATA_PATH, INIT_CASH, FEE, SLIP
+
+OUT_CSV = "reports/sweep_results.csv"
+
+# ===== 기본 탐색 범위 =====
+SHORTS      = range(6, 19, 2)
+LONGS       = range(20, 41, 4)
+SIGNALS     = (5, 7, 9, 12)
+SMA_WINDOWS = (50, 100, 150, 200)
+STOP_PCTS   = (0.02, 0.03, 0.05, 0.08)
+TAKE_PCTS   = (0.04, 0.06, 0.10, 0.15)
+
+EMA_CACHE_BYTES = 64 * 1024 * 1024   # 워커당 EMA/SMA 캐시 상한
+PERIODS_PER_YEAR = 365                # 샤프 등 연율화 기준 (data/price.csv 일봉)
+
+RESULT_FIELDS = ["short", "long", "signal", "sma", "stop_pct", "take_pct",
+                 "total_return", "mdd", "sharpe", "sortino", "calmar", "trades"]
+
+
+# ===== 워커 전역 상태 (initializer 에서 설정) =====
+_shm = None
+_prices = None     # (3, n) 배열 뷰: Close, High, Low
+_close_fp = None   # Close 지문 (워커 시작 시 한 번만 계산)
+_cache = IndicatorCache(EMA_CACHE_BYTES)
+
+
+def _init_worker(shm_name, n):
+    global _shm, _prices, _close_fp
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _prices = np.ndarray((3, n), dtype=np.float64, buffer=_shm.buf)
+    _close_fp = fingerprint(_prices[0])
+    _cache.clear()
+
+
+def _use_local(prices):
+    """단일 프로세스 실행 시: 공유 메모리 없이 같은 배열을 그대로 사용"""
+    global _prices, _close_fp
+    _prices = prices
+    _close_fp = fingerprint(prices[0])
+    _cache.clear()
+
+
+def max_drawdown(equity):
+    peak = np.maximum.accumulate(equity)
+    return float((equity / peak - 1).min())
+
+
+def task_signals(short, long, signal, window):
+    """워커 가격 배열에서 (Entry, Exit) 계산 - EMA/SMA 는 워커 캐시에서 재사용"""
+    close = _prices[0]
+    ema_s = _cache.get("ema", close, fp=_close_fp, span=short)
+    ema_l = _cache.get("ema", close, fp=_close_fp, span=long)
+    ma = _cache.get("sma", close, fp=_close_fp, window=window)
+    macd = ema_s - ema_l
+    sig = ema_values(macd, signal)
+    return ma_filter_arrays(macd, sig, close, ma)
+
+
+def _run_task(task):
+    """(short, long, signal, sma, [(stop, take), ...]) → 결과 dict 리스트"""
+    short, long, signal, window, exits = task
+    close, high, low = _prices
+    entry, exit_ = task_signals(short, long, signal, window)
+
+    curves, counts = [], []
+    for stop_pct, take_pct in exits:
+        equity, trades = simulate(close, high, low, entry, exit_,
+                                  FEE, SLIP, stop_pct, take_pct, INIT_CASH)
+        curves.append(equity)
+        counts.append(len(trades))
+    # 이 작업의 (손절, 익절) 조합 잔고곡선을 한 번에 지표 계산
+    m = batch_metrics(np.vstack(curves), PERIODS_PER_YEAR, INIT_CASH)
+
+    rows = []
+    for k, (stop_pct, take_pct) in enumerate(exits):
+        rows.append({
+            "short": short, "long": long, "signal": signal, "sma": window,
+            "stop_pct": stop_pct, "take_pct": take_pct,
+            "total_return": float(m["total_return"][k]),
+            "mdd": float(m["mdd"][k]),
+            "sharpe": float(m["sharpe"][k]),
+            "sortino": float(m["sortino"][k]),
+            "calmar": float(m["calmar"][k]),
+            "trades": counts[k],
+        })
+    return rows
+
+
+def build_tasks(shorts=SHORTS, longs=LONGS, signals=SIGNALS, sma_windows=SMA_WINDOWS,
+                stop_pcts=STOP_PCTS, take_pcts=TAKE_PCTS):
+    """같은 EMA 를 쓰는 작업이 이어지도록 (short, long) 순으로 정렬된 작업 목록"""
+    exits = list(itertools.product(stop_pcts, take_pcts))
+    tasks = []
+    for short, long in itertools.product(shorts, longs):
+        if short >= long:
+            continue
+        for signal, window in itertools.product(signals, sma_windows):
+            tasks.append((short, long, signal, window, exits))
+    return tasks
+
+
+def load_prices(path=DATA_PATH):
+    """(3, n) float64 배열: Close, High, Low"""
+    df = load_price_data(path)
+    return np.ascontiguousarray(df[["Close", "High", "Low"]].to_numpy(dtype=np.float64).T)
+
+
+def run_pool(fn, tasks, prices, workers=None):
+    """
+    작업마다 fn(task) 실행 → 결과 리스트를 이어붙여 반환 (순서 보장 없음)
+    가격 배열은 공유 메모리에 한 번만 올리고, fn 은 워커 전역(_prices, _cache)을 사용
+    """
+    workers = workers or os.cpu_count() or 1
+    results = []
+
+    if workers == 1:
+        _use_local(prices)
+        for task in tasks:
+            results.extend(fn(task))
+    else:
+        n = prices.shape[1]
+        shm = shared_memory.SharedMemory(create=True, size=prices.nbytes)
+        try:
+            np.ndarray(prices.shape, dtype=np.float64, buffer=shm.buf)[:] = prices
+            # 같은 (short, long) 작업이 한 워커로 몰리도록 묶어서 전달
+            chunk = max(1, len(tasks) // (workers * 8))
+            with Pool(workers, initializer=_init_worker, initargs=(shm.name, n)) as pool:
+                for rows in pool.imap_unordered(fn, tasks, chunksize=chunk):
+                    results.extend(rows)
+        finally:
+            shm.close()
+            shm.unlink()
+    return results
+
+
+def run_sweep(tasks, prices, workers=None):
+    """모든 작업을 실행해 총수익률 내림차순으로 정렬된 결과 리스트 반환"""
+    results = run_pool(_run_task, tasks, prices, workers)
+    results.sort(key=lambda r: r["total_return"], reverse=True)
+    return results
+
+
+def write_results(results, out_path=OUT_CSV):
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=["rank"] + RESULT_FIELDS)
+        w.writeheader()
+        for rank, row in enumerate(results, 1):
+            w.writerow({"rank": rank, **row})
+
+
+if __name__ == "__main__":
+    if not os.path.exists(DATA_PATH):
+        raise FileNotFoundError(f"{DATA_PATH} 없음")
+    prices = load_prices(DATA_PATH)
+    tasks = build_tasks()
+    combos = sum(len(t[4]) for t in tasks)
+    print(f"=== 파라미터 스윕 시작: {combos:,}개 조합 / 작업 {len(tasks):,}개 ===")
+    results = run_sweep(tasks, prices)
+    write_results(results)
+    print(f"✅ 결과 저장: {OUT_CSV}")
+    for r in results[:5]:
+        print(f"  MACD({r['short']},{r['long']},{r['signal']}) SMA{r['sma']} "
+              f"손절 {r['stop_pct']*100:.0f}% 익절 {r['take_pct']*100:.0f}% → "
+              f"수익률 {r['total_return']*100:.2f}%  MDD {r['mdd']*100:.2f}%  거래 {r['trades']}회")
@@ -0,0 +1,201 @@
+# walk_forward.py
+# MACD + SMA 필터 전략 워크포워드(롤링 표본 외) 검증
+# - 이력을 [학습 창 → 바로 다음 검증 창] 폴드로 나눔 (롤링 또는 시작 고정 anchored)
+# - 학습 창마다 sweep 과 같은 그리드에서 최적 파라미터(MACD/SMA/손절/익절)를 고르고,
+#   다음 검증 창에서만 그 파라미터로 새로 시뮬레이션 → 검증 창 잔고를 이어붙여 표본 외 곡선 생성
+# - 속도: 지표/신호는 파라미터 조합당 전체 이력에서 한 번만 계산 (EMA/SMA 는 과거만 보므로 잘라 써도 동일)
+#   조합 × (손절, 익절) 마다 전체 이력을 한 번 시뮬레이션하고, 모든 폴드의 학습 점수는 그 거래 목록에서 계산
+#   → 폴드 수와 무관하게 조합당 비용 1회, 조합들은 sweep 의 공유 메모리 워커 풀에서 병렬 실행
+# - 학습 점수 = 학습 창 안에서 진입·청산이 모두 끝난 거래들의 누적 수익률 (창 시작 시 보유 중이던 거래 제외)
+# - 폴드 경계에서 보유 중인 포지션은 마지막 종가 평가액으로 다음 검증 창의 시작 자금이 됨
+#
+# 사용 예)
+#   python walk_forward.py                     # data/price.csv
+#   python walk_forward.py KRW-XRP minute1     # candle_store 이력(memmap)
+
+import csv
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import sweep
+from backtest import load_price_data
+from backtest_equity import DATA_PATH, INIT_CASH, FEE, SLIP, strategy_signals
+from backtest_fast import simulate
+from indicator_cache import IndicatorCache
+from strategies.base import IndicatorSet
+
+OUT_FOLDS = "reports/walk_forward.csv"
+OUT_EQUITY = "reports/walk_forward_equity.csv"
+
+TRAIN_PERIOD = "365D"     # 학습 창 길이
+TEST_PERIOD = "90D"       # 검증 창 길이 (= 기본 이동 간격)
+STEP_PERIOD = None        # None 이면 TEST_PERIOD 만큼씩 이동
+ANCHORED = False          # True 면 학습 창 시작을 처음으로 고정 (확장 창)
+MIN_TRAIN_TRADES = 3      # 학습 창 거래가 이보다 적은 조합은 후보에서 제외
+MIN_TEST_BARS = 10
+
+FOLD_FIELDS = ["fold", "train_start", "train_end", "test_start", "test_end",
+               "short", "long", "signal", "sma", "stop_pct", "take_pct",
+               "train_return", "train_trades", "test_return", "test_mdd", "test_trades"]
+
+
+# ===== 폴드 =====
+def make_folds(dates, train=TRAIN_PERIOD, test=TEST_PERIOD, step=STEP_PERIOD, anchored=ANCHORED):
+    """반환: [(학습 시작, 학습 끝=검증 시작, 검증 끝), ...] 봉 위치 (끝은 미포함)"""
+    dates = pd.DatetimeIndex(dates)
+    train, test = pd.Timedelta(train), pd.Timedelta(test)
+    step = pd.Timedelta(step) if step else test
+    folds = []
+    start = dates[0]
+    while True:
+        a = 0 if anchored else int(dates.searchsorted(start))
+        b = int(dates.searchsorted(start + train))
+        c = int(dates.searchsorted(start + train + test))
+        if b >= len(dates) or c - b < MIN_TEST_BARS:
+            break
+        folds.append((a, b, c))
+        start += step
+    return folds
+
+
+def window_returns(trades, ranges):
+    """
+    거래 목록에서 창별 (누적 수익률, 거래 수)
+    창 [a, b) 안에서 진입하고 청산까지 끝난 거래만 포함 (미청산 거래 제외)
+    """
+    closed = [(e, j, buy, sell) for e, j, buy, sell, _ in trades if j >= 0]
+    if not closed:
+        return [(0.0, 0)] * len(ranges)
+    arr = np.array(closed, dtype=np.float64)
+    entries, exits = arr[:, 0], arr[:, 1]
+    log_cum = np.concatenate(([0.0], np.cumsum(np.log(arr[:, 3] / arr[:, 2]))))
+    out = []
+    for a, b in ranges:
+        lo = int(np.searchsorted(entries, a))
+        hi = int(np.searchsorted(exits, b))     # 청산 위치 < b 인 거래 (청산 위치도 오름차순)
+        if hi <= lo:
+            out.append((0.0, 0))
+        else:
+            out.append((float(np.expm1(log_cum[hi] - log_cum[lo])), hi - lo))
+    return out
+
+
+# ===== 워커 (sweep.run_pool 에서 실행) =====
+def _score_combo(task):
+    """(short, long, signal, sma, exits, 학습 창들) → 폴드별 이 조합의 최고 (손절, 익절) 결과"""
+    short, long, signal, window, exits, train_ranges = task
+    close, high, low = sweep._prices
+    entry, exit_ = sweep.task_signals(short, long, signal, window)
+
+    best = {}
+    for stop_pct, take_pct in exits:
+        _, trades = simulate(close, high, low, entry, exit_, FEE, SLIP, stop_pct, take_pct, INIT_CASH)
+        for k, (ret, count) in enumerate(window_returns(trades, train_ranges)):
+            if count >= MIN_TRAIN_TRADES and (k not in best or ret > best[k][0]):
+                best[k] = (ret, count, stop_pct, take_pct)
+    return [{"fold": k, "short": short, "long": long, "signal": signal, "sma": window,
+             "stop_pct": stop, "take_pct": take, "train_return": ret, "train_trades": count}
+            for k, (ret, count, stop, take) in best.items()]
+
+
+def _param_key(r):
+    return (r["short"], r["long"], r["signal"], r["sma"], r["stop_pct"], r["take_pct"])
+
+
+def optimize_folds(prices, folds, grid_tasks, workers=None):
+    """폴드별 최적 파라미터 dict (후보가 없는 폴드는 빠짐)"""
+    ranges = [(a, b) for a, b, _ in folds]
+    tasks = [t + (ranges,) for t in grid_tasks]
+    rows = sweep.run_pool(_score_combo, tasks, prices, workers)
+    best = {}
+    # 워커 수/완료 순서와 무관하게 같은 결과: 점수 동점이면 파라미터가 작은 쪽
+    for r in sorted(rows, key=_param_key):
+        cur = best.get(r["fold"])
+        if cur is None or r["train_return"] > cur["train_return"]:
+            best[r["fold"]] = r
+    return best
+
+
+# ===== 검증 =====
+def run_walk_forward(dates, prices, folds=None, grid_tasks=None, workers=None):
+    """
+    반환: (폴드 결과 리스트, 표본 외 잔고 Series)
+    prices = (3, n) float64 배열 (Close, High, Low)
+    """
+    dates = pd.DatetimeIndex(dates)
+    folds = folds if folds is not None else make_folds(dates)
+    grid_tasks = grid_tasks if grid_tasks is not None else sweep.build_tasks()
+    best = optimize_folds(prices, folds, grid_tasks, workers)
+
+    close, high, low = prices
+    ind = IndicatorSet(close, high, low, cache=IndicatorCache())
+    cash = float(INIT_CASH)
+    rows, curves = [], []
+    for k, (a, b, c) in enumerate(folds):
+        p = best.get(k)
+        if p is None:
+            continue
+        entry, exit_ = strategy_signals(close, p["short"], p["long"], p["signal"], p["sma"], ind=ind)
+        equity, trades = simulate(close[b:c], high[b:c], low[b:c], entry[b:c], exit_[b:c],
+                                  FEE, SLIP, p["stop_pct"], p["take_pct"], cash)
+        rows.append({
+            "fold": k,
+            "train_start": dates[a].strftime("%Y-%m-%d %H:%M"),
+            "train_end": dates[b - 1].strftime("%Y-%m-%d %H:%M"),
+            "test_start": dates[b].strftime("%Y-%m-%d %H:%M"),
+            "test_end": dates[c - 1].strftime("%Y-%m-%d %H:%M"),
+            **{key: p[key] for key in ("short", "long", "signal", "sma", "stop_pct", "take_pct",
+                                       "train_return", "train_trades")},
+            "test_return": float(equity[-1] / cash - 1),
+            "test_mdd": sweep.max_drawdown(equity),
+            "test_trades": len(trades),
+        })
+        curves.append(pd.Series(equity, index=dates[b:c]))
+        cash = float(equity[-1])
+    oos = pd.concat(curves) if curves else pd.Series(dtype=float)
+    oos = oos[~oos.index.duplicated(keep="last")]     # anchored/겹치는 검증 창이면 뒤 폴드 우선
+    return rows, oos.rename("Equity")
+
+
+def load_data(args):
+    """인자 없으면 data/price.csv, 있으면 candle_store 이력 (티커, interval)"""
+    if args:
+        from history import open_history
+        h = open_history(args[0], args[1] if len(args) > 1 else "day")
+        prices = np.vstack([h.close, h.high, h.low]).astype(np.float64)
+        return pd.DatetimeIndex(h.dates), prices
+    if not os.path.exists(DATA_PATH):
+        raise FileNotFoundError(f"{DATA_PATH} 없음")
+    df = load_price_data(DATA_PATH)
+    return df.index, sweep.load_prices(DATA_PATH)
+
+
+def write_outputs(rows, oos):
+    os.makedirs(os.path.dirname(OUT_FOLDS) or ".", exist_ok=True)
+    with open(OUT_FOLDS, "w", encoding="utf-8", newline="") as f:
+        w = csv.DictWriter(f, fieldnames=FOLD_FIELDS)
+        w.writeheader()
+        w.writerows(rows)
+    oos.to_csv(OUT_EQUITY, index_label="Date", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    dates, prices = load_data(sys.argv[1:])
+    folds = make_folds(dates)
+    print(f"=== 워크포워드: {len(dates):,}봉 / 폴드 {len(folds)}개 "
+          f"(학습 {TRAIN_PERIOD}, 검증 {TEST_PERIOD}{', anchored' if ANCHORED else ''}) ===")
+    rows, oos = run_walk_forward(dates, prices, folds)
+    write_outputs(rows, oos)
+    for r in rows:
+        print(f"  [{r['fold']:>2}] {r['test_start'][:10]}~{r['test_end'][:10]} "
+              f"MACD({r['short']},{r['long']},{r['signal']}) SMA{r['sma']} "
+              f"손절 {r['stop_pct']*100:.0f}% 익절 {r['take_pct']*100:.0f}% | "
+              f"학습 {r['train_return']*100:+.2f}% → 검증 {r['test_return']*100:+.2f}%")
+    if len(oos):
+        total = oos.iloc[-1] / INIT_CASH - 1
+        print(f"표본 외 총 수익률 : {total*100:.2f}%  |  최대 낙폭 : "
+              f"{sweep.max_drawdown(oos.to_numpy())*100:.2f}%")
+    print(f"✅ 결과 저장: {OUT_FOLDS}, {OUT_EQUITY}")
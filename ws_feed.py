@@ -0,0 +1,618 @@
+# ws_feed.py
+# 업비트 WebSocket 체결(trade) 스트림 → 메모리에서 봉 생성 → 봉 갱신/마감 이벤트 전달
+# - REST 폴링(60초) 대신 체결이 들어오는 즉시 봉을 갱신 → 봉 마감 직후 바로 신호 평가
+# - 봉 경계는 resample 과 같은 UTC epoch 격자 (시각은 KST naive 초)
+# - 진행 중인 봉 갱신 이벤트는 티커별 UPDATE_SEC 에 한 번으로 묶음, 마감 이벤트는 즉시
+#   (체결이 없는 티커도 경계 + CLOSE_GRACE_SEC 가 지나면 시계로 마감)
+# - 연결이 끊기면 지수 백오프로 재연결 → 끊긴 동안 빠진 봉은 REST(get_ohlcv)로 메워 마감 이벤트로 전달
+#   (백오프는 메시지를 하나라도 받은 뒤에만 처음으로 돌아감, 연결/프로토콜 오류만 재연결 대상
+#    - on_event 에서 난 예외는 그대로 호출한 쪽으로 전달)
+# - 같은 체결 중복(sequential_id) 은 버림 - 업비트 문서상 id 는 유일하지만 순서는 보장되지 않으므로
+#   크기 비교가 아니라 티커별 최근 SEEN_IDS 개 id 집합으로 판정 (순서가 뒤바뀐 체결도 반영)
+# - websockets 패키지는 실제 접속/로컬 재생 서버에만 필요 (없으면 파일 재생만 가능)
+# - 녹화: record=경로 → 받은 메시지를 한 줄씩 저장, ReplaySource 로 그대로 재생
+#
+# 사용 예)
+#   feed = WsFeed(["KRW-XRP"], on_event=print, client=make_client())
+#   asyncio.run(feed.run())
+#   python ws_feed.py record data/ws/trades.jsonl KRW-XRP KRW-BTC    # 실시간 메시지 녹화
+#   python ws_feed.py serve data/ws/trades.jsonl 8765                 # 로컬 재생 서버 (ws://127.0.0.1:8765)
+#   python ws_feed.py replay data/ws/trades.jsonl                     # 파일 재생 → 처리량 측정
+#   python ws_feed.py check [data/ws/trades.jsonl]                    # 재생/끊김+보충 봉 = pandas resample 확인
+
+import asyncio
+import gzip
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import deque
+
+from candle_store import INTERVAL_SEC
+from instrument import error
+from market_data import MarketDataClient
+from resample import KST_OFFSET
+
+WS_URL = "wss://api.upbit.com/websocket/v1"
+FEED_INTERVALS = ["minute1"]
+UPDATE_SEC = 1.0         # 진행 중인 봉 갱신 이벤트 최소 간격 (티커별)
+CLOSE_GRACE_SEC = 2.0    # 체결 없는 봉은 경계 + 이 시간 뒤 시계 기준으로 마감
+HOUSEKEEP_SEC = 0.5      # 시계 기준 마감/갱신 이벤트 점검 주기
+PING_SEC = 60            # 업비트는 120초 무응답 시 연결을 끊음
+RECONNECT_BACKOFF = 0.5  # 재연결 대기: RECONNECT_BACKOFF * 2^n (최대 RECONNECT_MAX)
+RECONNECT_MAX = 30.0
+BACKFILL_BARS = 200      # 재연결 시 REST 로 메울 최대 봉 수
+SEEN_IDS = 10_000        # 중복 판정용으로 티커별 기억할 최근 체결 id 수
+
+
+def _wall_clock():
+    """현재 시각 → KST naive 초"""
+    return time.time() + KST_OFFSET
+
+
+def parse_trade(msg):
+    """
+    체결/현재가 메시지(bytes/str/dict, DEFAULT 또는 SIMPLE 형식) → (티커, 시각(KST 초), 가격, 수량, 순번)
+    체결 정보가 없는 메시지는 None
+    """
+    if not isinstance(msg, dict):
+        msg = json.loads(msg)
+    if "cd" in msg:   # SIMPLE
+        ticker, ts, price, vol, seq = msg["cd"], msg.get("ttms"), msg.get("tp"), msg.get("tv"), msg.get("sid")
+    else:
+        ticker, ts = msg.get("code"), msg.get("trade_timestamp")
+        price, vol, seq = msg.get("trade_price"), msg.get("trade_volume"), msg.get("sequential_id")
+    if ticker is None or ts is None or price is None:
+        return None
+    return ticker, ts / 1000.0 + KST_OFFSET, float(price), float(vol or 0.0), seq
+
+
+def _event(kind, ticker, interval, bar, source):
+    return {"type": kind, "ticker": ticker, "interval": interval, "Date": bar[0],
+            "Open": bar[1], "High": bar[2], "Low": bar[3], "Close": bar[4], "Volume": bar[5],
+            "source": source}
+
+
+class TickAggregator:
+    """
+    체결 → (티커, interval) 별 진행 중인 봉 [시작(초), o, h, l, c, v]
+    마감 이벤트는 반환값으로, 갱신 이벤트는 updates() 로 모아서 꺼냄
+    """
+
+    def __init__(self, intervals=FEED_INTERVALS, seen_ids=SEEN_IDS):
+        self.intervals = [(iv, int(INTERVAL_SEC[iv])) for iv in intervals]
+        self.seen_ids = seen_ids
+        self.bars = {}          # (티커, interval) → 진행 중인 봉
+        self.last_closed = {}   # (티커, interval) → 마지막 마감 봉 시작(초)
+        self._seen = {}         # 티커 → (최근 체결 id 집합, 들어온 순서 deque)
+        self.last_price = {}    # 티커 → 마지막 체결가
+        self.last_sec = 0.0     # 지금까지 본 가장 늦은 체결 시각 (재생용 시계)
+        self._dirty = set()     # 갱신 이벤트를 보낼 (티커, interval)
+        self._next_due = float("inf")   # 가장 먼저 시계 마감될 봉의 마감 시각 (그 전에는 훑지 않음)
+        self.late = 0           # 이미 마감된 봉에 속한 늦은 체결 수
+        self.dupes = 0
+
+    def on_trade(self, ticker, sec, price, vol, seq=None):
+        """체결 하나 반영. 반환: 이번 체결로 마감된 봉 이벤트 리스트"""
+        if seq is not None:
+            seen = self._seen.get(ticker)
+            if seen is None:
+                seen = self._seen[ticker] = (set(), deque())
+            ids, order = seen
+            if seq in ids:
+                self.dupes += 1
+                return []
+            ids.add(seq)
+            order.append(seq)
+            if len(order) > self.seen_ids:
+                ids.discard(order.popleft())
+        self.last_price[ticker] = price
+        if sec > self.last_sec:
+            self.last_sec = sec
+        closed = []
+        for interval, step in self.intervals:
+            start = int((sec - KST_OFFSET) // step) * step + KST_OFFSET
+            key = (ticker, interval)
+            bar = self.bars.get(key)
+            if bar is not None and bar[0] == start:
+                if price > bar[2]:
+                    bar[2] = price
+                elif price < bar[3]:
+                    bar[3] = price
+                bar[4] = price
+                bar[5] += vol
+            elif bar is None or start > bar[0]:
+                if start <= self.last_closed.get(key, -1):
+                    self.late += 1
+                    continue
+                if bar is not None:
+                    closed.append(self._close(key, bar, "ws"))
+                self.bars[key] = [start, price, price, price, price, vol]
+                if start + step < self._next_due:
+                    self._next_due = start + step
+            else:
+                self.late += 1
+                continue
+            self._dirty.add(key)
+        return closed
+
+    def _close(self, key, bar, source):
+        self.last_closed[key] = bar[0]
+        self._dirty.discard(key)
+        return _event("close", key[0], key[1], bar, source)
+
+    def close_due(self, now, grace=CLOSE_GRACE_SEC):
+        """봉 끝 + grace 가 지난 진행 중인 봉 마감 (체결이 없는 티커용)"""
+        if now < self._next_due + grace:
+            return []
+        steps = dict(self.intervals)
+        closed = []
+        self._next_due = float("inf")
+        for key, bar in list(self.bars.items()):
+            end = bar[0] + steps[key[1]]
+            if end + grace <= now:
+                closed.append(self._close(key, bar, "clock"))
+                del self.bars[key]
+            elif end < self._next_due:
+                self._next_due = end
+        return closed
+
+    def updates(self):
+        """마지막 호출 이후 바뀐 진행 중인 봉 이벤트"""
+        out = [_event("update", key[0], key[1], self.bars[key], "ws")
+               for key in self._dirty if key in self.bars]
+        self._dirty.clear()
+        return out
+
+    def backfill(self, ticker, interval, df, now):
+        """
+        REST 봉(pyupbit 형식, index=KST 시각)으로 빈 구간 메우기
+           - 마지막 마감 봉 이후 ~ 마지막 REST 봉 직전: 마감 이벤트 (source="backfill")
+           - 마지막 REST 봉: 진행 중인 봉으로 교체 (끊긴 동안의 체결이 들어 있음)
+           - 처음 연결(이전 봉 없음)이면 진행 중인 봉만 채움 (과거 봉은 호출 쪽이 이미 시드)
+        이후 들어오는 같은 봉의 체결은 REST 봉에 더해지므로 그 봉 거래량은 약간 겹칠 수 있음
+        """
+        key = (ticker, interval)
+        step = dict(self.intervals)[interval]
+        rows = [(int(k.value // 1_000_000_000), r) for k, r in
+                zip(df.index, df[["open", "high", "low", "close", "volume"]].itertuples(index=False))]
+        rows = [(k, r) for k, r in rows if k <= now]
+        if not rows:
+            return []
+        cur = self.bars.get(key)
+        fresh = cur is None and key not in self.last_closed
+        closed = []
+        if not fresh:
+            done = self.last_closed.get(key, -1)
+            for k, r in rows[:-1]:
+                # REST 가 진행 중인 봉보다 늦게 반영됐으면(k < cur 시작) 건드리지 않음
+                if k > done and k + step <= now and (cur is None or k >= cur[0]):
+                    if cur is not None and cur[0] < k:
+                        closed.append(self._close(key, cur, "backfill"))
+                    closed.append(self._close(key, [k, *map(float, r)], "backfill"))
+                    self.bars.pop(key, None)
+                    cur, done = None, k
+        k, r = rows[-1]
+        if k > self.last_closed.get(key, -1) and (cur is None or k >= cur[0]):
+            if cur is not None and cur[0] < k:
+                closed.append(self._close(key, cur, "backfill"))
+            self.bars[key] = [k, *map(float, r)]
+            self._next_due = min(self._next_due, k + step)
+            self._dirty.add(key)
+            self.last_price[ticker] = float(r[3])
+        return closed
+
+
+# ===== 연결 =====
+def connection_errors():
+    """재연결로 처리할 예외 (소켓/타임아웃 + websockets 의 연결 종료·프로토콜 오류)"""
+    try:
+        from websockets.exceptions import WebSocketException
+    except ImportError:
+        return (OSError,)
+    return (OSError, WebSocketException)
+
+
+def connect_upbit(url=WS_URL):
+    """업비트 WebSocket 연결 (async with 로 사용)"""
+    try:
+        import websockets
+    except ImportError as e:
+        raise ImportError("WebSocket 접속에는 websockets 패키지가 필요합니다 (pip install websockets)") from e
+    return websockets.connect(url, ping_interval=PING_SEC, max_size=None)
+
+
+class ReplayConnection:
+    """ReplaySource 의 연결 하나 (websockets 연결처럼 send / async for 지원)"""
+
+    def __init__(self, source):
+        self.source = source
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, msg):
+        self.source.subscriptions.append(msg)
+
+    def __aiter__(self):
+        return self.source._messages()
+
+
+class ReplaySource:
+    """
+    녹화 파일(한 줄 = 메시지 하나, .gz 가능)을 WebSocket 처럼 재생하는 대역
+       - speed=0 이면 최대 속도, 1 이면 체결 시각 간격 그대로, 10 이면 10배속
+       - drop_every=N : N 메시지마다 연결 끊김 흉내, 이때 skip 개 메시지를 잃어버림 (재연결/보충 확인용)
+    WsFeed(connect=source.connect, clock=source.clock) 로 사용
+    """
+
+    def __init__(self, path, speed=0.0, drop_every=None, skip=0):
+        self.path = path
+        self.speed = speed
+        self.drop_every = drop_every
+        self.skip = skip
+        self.subscriptions = []
+        self.exhausted = False
+        self._clock = 0.0
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as f:
+            self._lines = [line.rstrip(b"\n") for line in f if line.strip()]
+        self._pos = 0
+
+    def connect(self):
+        return ReplayConnection(self)
+
+    async def _messages(self):
+        sent = 0
+        first_ts = started = None
+        while self._pos < len(self._lines):
+            raw = self._lines[self._pos]
+            self._pos += 1
+            if self.speed:
+                ts = parse_trade(raw)
+                if ts is not None:
+                    if first_ts is None:
+                        first_ts, started = ts[1], time.monotonic()
+                    wait = (ts[1] - first_ts) / self.speed - (time.monotonic() - started)
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+            yield raw
+            sent += 1
+            if self.drop_every and sent >= self.drop_every and self._pos < len(self._lines):
+                self._pos = min(len(self._lines) - 1, self._pos + self.skip)
+                trade = parse_trade(self._lines[self._pos])
+                if trade is not None:
+                    self._clock = trade[1]   # 끊긴 동안 시간이 흐른 것으로
+                raise ConnectionError("재생 연결 끊김 (drop_every)")
+        self.exhausted = True
+
+    def clock(self):
+        """재생 시계 (KST 초) - 끊김 흉내 뒤에는 다시 받을 첫 메시지 시각"""
+        return self._clock
+
+
+async def serve_replay(path, host="127.0.0.1", port=8765, speed=1.0):
+    """녹화 파일을 실제 WebSocket 서버로 재생 (접속할 때마다 처음부터) - websockets 필요"""
+    import websockets
+
+    async def handler(ws, *_):
+        await ws.recv()   # 구독 메시지
+        async for raw in ReplaySource(path, speed)._messages():
+            await ws.send(raw)
+
+    async with websockets.serve(handler, host, port):
+        print(f"재생 서버: ws://{host}:{port}  ({path})")
+        await asyncio.Future()
+
+
+# ===== 피드 =====
+class WsFeed:
+    """
+    on_event(ev) : 봉 이벤트마다 호출 (코루틴을 돌려주면 await)
+        ev = {"type": "update"/"close", "ticker", "interval", "Date"(시작, KST 초),
+              "Open", "High", "Low", "Close", "Volume", "source": "ws"/"clock"/"backfill"}
+    connect      : 연결 팩토리 (기본 업비트, 테스트는 ReplaySource(...).connect)
+    client       : market_data 클라이언트 - 연결될 때마다 빈 구간을 REST 로 메움 (None 이면 보충 안 함)
+    clock        : None 이면 실제 시각. 재생용 시계(source.clock)를 주면 max(그 시계, 마지막 체결 시각)을
+                   현재로 보고, 타이머/재연결 대기 없이 메시지 흐름만으로 진행
+    """
+
+    def __init__(self, tickers, on_event, intervals=FEED_INTERVALS, connect=None, client=None,
+                 url=WS_URL, record=None, update_sec=UPDATE_SEC, grace=CLOSE_GRACE_SEC,
+                 clock=None, fmt="SIMPLE"):
+        self.tickers = list(tickers)
+        self._wanted = set(self.tickers)
+        self.on_event = on_event
+        self.agg = TickAggregator(intervals)
+        self.connect = connect or (lambda: connect_upbit(url))
+        self.client = client
+        self.record = record
+        self.update_sec = update_sec
+        self.grace = grace
+        self.clock = clock
+        self.live = clock is None
+        self.fmt = fmt
+        self.stats = {"messages": 0, "trades": 0, "events": 0, "reconnects": 0, "backfilled": 0}
+        self._stopped = False
+        self._next_update = 0.0
+
+    def now(self):
+        if self.live:
+            return _wall_clock()
+        return max(self.agg.last_sec, self.clock())
+
+    def subscription(self):
+        return json.dumps([{"ticket": str(uuid.uuid4())},
+                           {"type": "trade", "codes": self.tickers},
+                           {"format": self.fmt}])
+
+    def stop(self):
+        self._stopped = True
+
+    async def _emit(self, events):
+        for ev in events:
+            self.stats["events"] += 1
+            res = self.on_event(ev)
+            if inspect.isawaitable(res):
+                await res
+
+    async def _housekeep(self):
+        """시계 기준 마감 + 묶어 둔 갱신 이벤트 보내기"""
+        now = self.now()
+        await self._emit(self.agg.close_due(now, self.grace))
+        if now >= self._next_update:
+            self._next_update = now + self.update_sec
+            await self._emit(self.agg.updates())
+
+    async def _timer(self):
+        while not self._stopped:
+            await asyncio.sleep(HOUSEKEEP_SEC)
+            try:
+                await self._housekeep()
+            except Exception as e:   # on_event 오류로 타이머 태스크가 조용히 죽으면 시계 마감이 멈춤
+                error("ws.timer", e)
+
+    async def _backfill(self):
+        """끊긴 동안 빠진 봉을 REST 로 메움 (실패해도 스트림은 계속 - 다음 재연결 때 다시 시도)"""
+        if self.client is None:
+            return
+        now = self.now()
+        for interval, step in self.agg.intervals:
+            count = BACKFILL_BARS
+            done = [self.agg.last_closed.get((t, interval)) for t in self.tickers]
+            done = [d for d in done if d is not None]
+            if done and now > 0:
+                count = max(2, min(BACKFILL_BARS, int((now - min(done)) // step) + 2))
+            try:
+                frames = await self.client.get_ohlcv_many(self.tickers, interval=interval, count=count)
+            except Exception as e:
+                error("ws.backfill", e, interval)
+                continue
+            now = self.now()
+            for ticker, df in frames.items():
+                events = self.agg.backfill(ticker, interval, df, now)
+                self.stats["backfilled"] += len(events)
+                await self._emit(events)
+
+    async def _session(self, ws, sink):
+        await ws.send(self.subscription())
+        await self._backfill()
+        wanted, agg, stats = self._wanted, self.agg, self.stats
+        async for raw in ws:
+            stats["messages"] += 1
+            if sink is not None:
+                sink.write(raw if isinstance(raw, bytes) else raw.encode("utf-8"))
+                sink.write(b"\n")
+            trade = parse_trade(raw)
+            if trade is None or trade[0] not in wanted:
+                continue
+            stats["trades"] += 1
+            closed = agg.on_trade(*trade)
+            if closed:
+                await self._emit(closed)
+            if not self.live or stats["trades"] % 256 == 0:   # 실시간은 타이머도 같이 점검
+                await self._housekeep()
+            if self._stopped:
+                break
+
+    async def run(self):
+        """연결 → 구독 → 보충 → 수신 루프, 끊기면 백오프 후 재연결 (stop() 또는 재생 끝까지)"""
+        sink = open(self.record, "ab") if self.record else None
+        timer = asyncio.create_task(self._timer()) if self.live else None
+        attempt = 0
+        retry_on = connection_errors()
+        try:
+            while not self._stopped:
+                conn = None
+                received = self.stats["messages"]
+                try:
+                    async with self.connect() as conn:
+                        await self._session(conn, sink)
+                except retry_on as e:   # 네트워크/프로토콜 오류 → 재연결 (그 밖의 예외는 그대로 전달)
+                    error("ws", e, "WebSocket 끊김")
+                if self._stopped or getattr(getattr(conn, "source", None), "exhausted", False):
+                    break
+                if self.stats["messages"] > received:
+                    attempt = 0      # 실제로 받은 게 있을 때만 백오프를 처음으로
+                elif not self.live:
+                    break            # 재생 모드에서 아무것도 못 받으면 다시 붙어도 같음 (바쁜 루프 방지)
+                self.stats["reconnects"] += 1
+                if self.live:
+                    await asyncio.sleep(min(RECONNECT_MAX, RECONNECT_BACKOFF * (2 ** attempt)))
+                attempt += 1
+            await self._housekeep()
+        finally:
+            if timer is not None:
+                timer.cancel()
+            if sink is not None:
+                sink.close()
+        return self.stats
+
+
+class StreamPriceClient(MarketDataClient):
+    """REST 클라이언트 + 피드의 마지막 체결가 (현재가 조회는 네트워크 없이, 체결이 아직 없는 티커만 REST)"""
+
+    def __init__(self, client, feed):
+        super().__init__()
+        self.client = client
+        self.feed = feed
+        self.stats = client.stats
+
+    async def get_ohlcv(self, ticker, interval="day", count=200):
+        return await self.client.get_ohlcv(ticker, interval, count)
+
+    async def get_current_price(self, tickers):
+        last = self.feed.agg.last_price
+        prices = {t: last[t] for t in tickers if t in last}
+        missing = [t for t in tickers if t not in prices]
+        if missing:
+            prices.update(await self.client.get_current_price(missing))
+        return prices
+
+
+def _replay_main(path):
+    """녹화 파일을 최대 속도로 재생해 처리량 출력"""
+    source = ReplaySource(path)
+    tickers = sorted({t[0] for t in map(parse_trade, source._lines) if t is not None})
+    closes = []
+    feed = WsFeed(tickers, on_event=lambda ev: ev["type"] == "close" and closes.append(ev),
+                  connect=source.connect, clock=source.clock)
+    started = time.perf_counter()
+    stats = asyncio.run(feed.run())
+    sec = time.perf_counter() - started
+    print(f"{stats['messages']:,} 메시지 / {sec:.2f}초 = {stats['messages'] / sec:,.0f} msg/s, "
+          f"마감 봉 {len(closes):,}개")
+
+
+# ===== 재생 확인 (녹화 파일 → 봉 = pandas resample) =====
+def synthetic_trades(path, tickers=20, n=60_000, minutes=30, seed=0, swap=0.05, dup=0.01):
+    """
+    녹화 파일 흉내 (SIMPLE 형식, 거래소 접속 없이 확인용)
+       - 체결 시각은 시간순, sequential_id 는 티커별로 유일하지만 swap 비율만큼 이웃과 순서가 뒤바뀜
+       - dup 비율만큼 같은 메시지를 한 번 더 보냄 (재전송 흉내)
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    t0 = 1_704_067_200_000   # 2024-01-01 00:00 UTC (ms)
+    ts = t0 + np.sort(rng.integers(0, minutes * 60_000, n))
+    tick = rng.integers(0, tickers, n)
+    price = (1100 + np.cumsum(rng.normal(0, 1, n))).round(1)
+    vol = rng.uniform(0, 5, n).round(3)
+    sid = ts * 1000 + np.arange(n) % 1000
+    flip = np.flatnonzero(rng.random(n - 1) < swap)
+    sid[flip], sid[flip + 1] = sid[flip + 1], sid[flip].copy()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            line = json.dumps({"ty": "trade", "cd": f"KRW-T{tick[i]}", "tp": float(price[i]),
+                               "tv": float(vol[i]), "ttms": int(ts[i]), "sid": int(sid[i])}) + "\n"
+            f.write(line * (2 if rng.random() < dup else 1))
+    return path
+
+
+def _truth_bars(lines, interval):
+    """녹화 메시지 → 티커별 pandas resample 봉 (id 중복 제거, 첫 체결 기준)"""
+    import pandas as pd
+
+    rows = [t for t in map(parse_trade, lines) if t is not None]
+    df = pd.DataFrame(rows, columns=["ticker", "sec", "price", "vol", "seq"])
+    df = df[df["seq"].isna() | ~df.duplicated(["ticker", "seq"])]
+    df["t"] = pd.to_datetime(df["sec"], unit="s")
+    rule = f"{int(INTERVAL_SEC[interval])}s"
+    out = {}
+    for ticker, g in df.groupby("ticker"):
+        b = g.set_index("t").resample(rule).agg({"price": ["first", "max", "min", "last"], "vol": "sum"})
+        b.columns = ["open", "high", "low", "close", "volume"]
+        out[ticker] = b.dropna()
+    return out
+
+
+def _mismatches(closes, truth, cols):
+    """마감 이벤트와 기준 봉이 다른 티커 목록 (재생 끝에 열려 있는 마지막 봉은 제외)"""
+    import numpy as np
+
+    bad = []
+    for ticker, b in truth.items():
+        evs = closes.get(ticker, [])
+        exp = b.iloc[:-1]
+        got = np.array([[ev[c.capitalize()] for c in cols] for ev in evs], dtype=float).reshape(-1, len(cols))
+        dates = [ev["Date"] for ev in evs]
+        want = [int(k.value // 1_000_000_000) for k in exp.index]
+        if dates != want or not np.allclose(got, exp[cols].to_numpy(dtype=float)):
+            bad.append(ticker)
+    return bad
+
+
+def check_replay(path=None, interval="minute1", drop_every=10_000, skip=2_000):
+    """
+    녹화 파일 재생 확인 → 어긋난 티커 수 (0 이면 통과)
+       1) 그대로 재생      : 마감 봉 OHLCV = pandas resample
+       2) 끊김 + REST 보충 : drop_every 메시지마다 끊고 skip 개를 잃어도 마감 봉 OHLC = pandas resample
+          (REST 는 기준 봉을 ReplayClient 파일로 저장해 흉내, 재생 시계까지의 봉만 보임)
+    path 가 없으면 synthetic_trades 로 만든 파일 사용
+    """
+    import pandas as pd
+    from market_data import ReplayClient, save_replay
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = path or synthetic_trades(os.path.join(tmp, "trades.jsonl"))
+        lines = ReplaySource(path)._lines
+        truth = _truth_bars(lines, interval)
+        rest_dir = os.path.join(tmp, "rest")
+        for ticker, b in truth.items():
+            save_replay(b, ticker, interval, root=rest_dir)
+
+        def run(source, client=None):
+            closes = {}
+
+            def on_event(ev):
+                if ev["type"] == "close":
+                    closes.setdefault(ev["ticker"], []).append(ev)
+
+            feed = WsFeed(sorted(truth), on_event, [interval], connect=source.connect,
+                          clock=source.clock, client=client)
+            if client is not None:
+                fetch = client.get_ohlcv_many
+
+                async def at_replay_time(*args, **kwargs):
+                    client.set_time(pd.Timestamp(int(feed.now()), unit="s"))
+                    return await fetch(*args, **kwargs)
+
+                client.get_ohlcv_many = at_replay_time
+            stats = asyncio.run(feed.run())
+            return closes, stats, feed.agg
+
+        failed = 0
+        closes, stats, agg = run(ReplaySource(path))
+        bad = _mismatches(closes, truth, ["open", "high", "low", "close", "volume"])
+        print(f"재생       : 메시지 {stats['messages']:,} / 중복 {agg.dupes:,} / 어긋난 티커 {len(bad)}")
+        failed += len(bad)
+
+        closes, stats, agg = run(ReplaySource(path, drop_every=drop_every, skip=skip),
+                                 ReplayClient(root=rest_dir))
+        bad = _mismatches(closes, truth, ["open", "high", "low", "close"])
+        print(f"끊김+보충  : 재연결 {stats['reconnects']} / 보충 봉 {stats['backfilled']:,} "
+              f"/ 어긋난 티커 {len(bad)}")
+        failed += len(bad)
+    return failed
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) >= 2 and args[0] == "record":
+        feed = WsFeed(args[2:] or ["KRW-XRP"], on_event=lambda ev: None, record=args[1])
+        asyncio.run(feed.run())
+    elif len(args) >= 2 and args[0] == "serve":
+        asyncio.run(serve_replay(args[1], port=int(args[2]) if len(args) > 2 else 8765))
+    elif len(args) >= 2 and args[0] == "replay":
+        _replay_main(args[1])
+    elif args and args[0] == "check":
+        sys.exit(1 if check_replay(args[1] if len(args) > 1 else None) else 0)
+    else:
+        print("사용법: python ws_feed.py record 경로 [티커...] | serve 경로 [포트] | replay 경로 | check [경로]")